@@ -0,0 +1,163 @@
+import re
+import numpy as np
+from .index_utils import cached_per_frame
+
+# Written by the embedding step next to chunked_pages_with_embeddings.csv; doc ids are CSV row numbers
+DEFAULT_INDEX_PATH = "csv_dataframes/embeddings/bm25_index.npz"
+
+# Lowercased words, keeping technical compounds such as "spr-220", "az4210" or "1.5um" whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+PART_SPLIT = re.compile(r"[-./]")
+
+def tokenize(text):
+    """Split text into index terms; compounds are emitted whole and as their parts ("spr-220", "spr", "220")"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(str(text).lower()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in PART_SPLIT.split(token) if part)
+    return tokens
+
+def chunk_search_text(title, content):
+    """Text indexed for a chunk: tool and page names often only appear in the title"""
+    return f"{title or ''}\n{content or ''}"
+
+def build_chunk_index(chunks_df):
+    """BM25 index over a chunk DataFrame, keyed by its index labels (row numbers of the CSV)"""
+    texts = [chunk_search_text(t, c) for t, c in zip(chunks_df['title'], chunks_df['content'])]
+    return BM25Index.build(texts, doc_ids=chunks_df.index.to_numpy())
+
+def get_chunk_index(chunks_df):
+    """
+    build_chunk_index(chunks_df), built once per DataFrame and cached; for callers without
+    the persisted index, so the corpus is still tokenized only once
+    """
+    return cached_per_frame(chunks_df, 'bm25_index', build_chunk_index)
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index, built once at ingestion time and persisted next to the embeddings.
+
+    Postings are stored CSR-style (one contiguous doc/weight array per term) and every posting
+    already holds its full BM25 contribution idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)),
+    so scoring a query is a gather over its terms' posting lists plus one bincount.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}   # term -> term id
+        self.offsets = None    # (V + 1,) start of each term's postings
+        self.postings = None   # (P,) document positions, sorted within each term
+        self.weights = None    # (P,) precomputed BM25 contribution of each posting
+        self.idf = None        # (V,)
+        self.doc_ids = None    # (N,) caller ids of the documents (CSV row numbers)
+        self.doc_lengths = None
+        self._alignment = (None, None)  # (labels object, positions) of the last aligned DataFrame index
+
+    @classmethod
+    def build(cls, texts, doc_ids=None, k1=1.5, b=0.75):
+        """Tokenize texts and precompute doc lengths, IDF and per-posting BM25 weights"""
+        index = cls(k1, b)
+        doc_terms, lengths = [], []
+        for text in texts:
+            terms = tokenize(text)
+            lengths.append(len(terms))
+            ids = [index.vocabulary.setdefault(t, len(index.vocabulary)) for t in terms]
+            doc_terms.append(np.asarray(ids, dtype=np.int64))
+
+        n_docs = len(doc_terms)
+        index.doc_lengths = np.asarray(lengths, dtype=np.float32)
+        index.doc_ids = np.arange(n_docs) if doc_ids is None else np.asarray(doc_ids, dtype=np.int64)
+
+        # One (term, doc, tf) triple per distinct term in each doc, grouped by term
+        term_col, doc_col, tf_col = [], [], []
+        for doc, ids in enumerate(doc_terms):
+            terms, tf = np.unique(ids, return_counts=True)
+            term_col.append(terms)
+            doc_col.append(np.full(len(terms), doc, dtype=np.int32))
+            tf_col.append(tf)
+        terms = np.concatenate(term_col) if term_col else np.empty(0, dtype=np.int64)
+        docs = np.concatenate(doc_col) if doc_col else np.empty(0, dtype=np.int32)
+        tf = np.concatenate(tf_col).astype(np.float32) if tf_col else np.empty(0, dtype=np.float32)
+        order = np.lexsort((docs, terms))
+        terms, docs, tf = terms[order], docs[order], tf[order]
+
+        df = np.bincount(terms, minlength=len(index.vocabulary))
+        index.offsets = np.concatenate(([0], np.cumsum(df)))
+        index.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = index.doc_lengths.mean() if n_docs else 1.0
+        norm = k1 * (1 - b + b * index.doc_lengths[docs] / max(avgdl, 1e-9))
+        index.postings = docs
+        index.weights = (index.idf[terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+        return index
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def _term_ids(self, query):
+        return sorted({self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary})
+
+    def scores(self, query, require_all=False):
+        """
+        Dense BM25 scores for every document (aligned with doc_ids).
+
+        require_all: Only documents containing every known query term score above zero;
+                     candidates come from intersecting the posting lists, shortest first.
+        """
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        term_ids = self._term_ids(query)
+        if not term_ids:
+            return scores
+        lists = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.postings[s] for s in lists])
+        weights = np.concatenate([self.weights[s] for s in lists])
+        if require_all:
+            candidates = self.postings[min(lists, key=lambda s: s.stop - s.start)]
+            for s in lists:
+                candidates = np.intersect1d(candidates, self.postings[s], assume_unique=True)
+            keep = np.isin(docs, candidates)
+            docs, weights = docs[keep], weights[keep]
+        scores += np.bincount(docs, weights=weights, minlength=len(scores)).astype(np.float32)
+        return scores
+
+    def aligned_scores(self, query, labels, require_all=False):
+        """
+        BM25 scores re-ordered to match labels (e.g. a DataFrame index of CSV row numbers).
+        Labels missing from the index score 0; the label lookup is cached per labels object.
+        """
+        cached_labels, positions = self._alignment
+        if cached_labels is not labels:
+            labels_array = np.asarray(labels, dtype=np.int64)
+            order = np.argsort(self.doc_ids, kind='stable')
+            slots = np.searchsorted(self.doc_ids, labels_array, sorter=order).clip(max=len(order) - 1)
+            positions = order[slots] if len(order) else np.zeros(len(labels_array), dtype=np.int64)
+            found = len(order) > 0 and self.doc_ids[positions] == labels_array
+            positions = np.where(found, positions, -1)
+            self._alignment = (labels, positions)
+        scores = self.scores(query, require_all)
+        aligned = np.zeros(len(positions), dtype=np.float32)
+        hit = positions >= 0
+        aligned[hit] = scores[positions[hit]]
+        return aligned
+
+    def search(self, query, k=10, require_all=False):
+        """Return (scores, doc_ids) of the k best-matching documents that match at least one term"""
+        scores = self.scores(query, require_all)
+        matched = np.flatnonzero(scores > 0)
+        best = matched[np.argsort(-scores[matched], kind='stable')[:k]]
+        return scores[best], self.doc_ids[best]
+
+    def save(self, path):
+        np.savez(path, terms=np.array(list(self.vocabulary)), offsets=self.offsets, postings=self.postings,
+                 weights=self.weights, idf=self.idf, doc_ids=self.doc_ids, doc_lengths=self.doc_lengths,
+                 params=np.array([self.k1, self.b]))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        index = cls(*(float(v) for v in data['params']))
+        index.vocabulary = {term: i for i, term in enumerate(data['terms'].tolist())}
+        for name in ('offsets', 'postings', 'weights', 'idf', 'doc_ids', 'doc_lengths'):
+            setattr(index, name, data[name])
+        return index
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# Chunk kinds written by the chunking step; their order fixes the categorical codes
+CONTENT_TYPES = ["text", "table", "table_row", "image"]
+# content_type -> (display type, icon) shown next to each source
+DISPLAY = {
+    "table_row": ("Table Row", "📊"),
+    "table": ("Complete Table", "📋"),
+    "text": ("Text Content", "📄"),
+}
+DEFAULT_DISPLAY = ("Content", "📝")
+
+def display_info(content_type):
+    """(display type, icon) of a content type"""
+    return DISPLAY.get(content_type, DEFAULT_DISPLAY)
+
+def chunk_display(chunk):
+    """
+    (content_type, display_type, icon) of a chunk row, falling back to display_info for
+    missing or NaN cells (NaN is truthy, so `or` would let it through)
+    """
+    content_type = chunk.get('content_type')
+    content_type = content_type if pd.notna(content_type) else 'text'
+    display_type, icon = display_info(content_type)
+    stored_type, stored_icon = chunk.get('display_type'), chunk.get('icon')
+    return (content_type,
+            stored_type if pd.notna(stored_type) and stored_type != '' else display_type,
+            stored_icon if pd.notna(stored_icon) and stored_icon != '' else icon)
+
+def infer_content_types(df):
+    """
+    content_type for chunk files written before chunking recorded it: "table" titles that
+    mention a row, or JSON-object content, are table rows; other "table" titles are tables
+    """
+    titles = df['title'].fillna('').astype(str).str.lower()
+    content = df['content'].fillna('').astype(str)
+    is_table = titles.str.contains('table', regex=False)
+    is_row = (is_table & titles.str.contains('row', regex=False)) | \
+        (~is_table & content.str.startswith('{') & content.str.endswith('}'))
+    return pd.Series(np.select([is_row, is_table], ['table_row', 'table'], 'text'), index=df.index)
+
+def add_content_columns(df):
+    """
+    Store content_type as a categorical column next to its display_type and icon.
+
+    Called when chunks are written, so searches only read these columns; loaders call it
+    again to restore the categorical dtypes a CSV round trip loses (and to fill in files
+    written before the columns existed, or cells left empty). Mappings are applied per
+    category, not per row.
+    """
+    if 'content_type' not in df.columns:
+        df['content_type'] = infer_content_types(df)
+    values = df['content_type'].astype(object).where(df['content_type'].notna(), 'text').astype(str)
+    extra = sorted(set(values.unique()) - set(CONTENT_TYPES))
+    df['content_type'] = pd.Categorical(values, categories=CONTENT_TYPES + extra)
+    categories = df['content_type'].cat.categories
+    for column, part in (('display_type', 0), ('icon', 1)):
+        mapped = df['content_type'].map({t: display_info(t)[part] for t in categories}).astype(object)
+        if column in df.columns:
+            mapped = df[column].astype(object).fillna(mapped)
+        df[column] = mapped.astype('category')
+    return df
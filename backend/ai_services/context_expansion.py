@@ -0,0 +1,75 @@
+import re
+from .index_utils import cached_per_frame
+
+# Markdown heading at the start of a chunk marks a new wiki section
+SECTION_HEADING = re.compile(r"^\s*#{1,6}\s")
+EXPANSION_MODES = ('neighbours', 'section')
+
+def get_neighbour_map(df):
+    """
+    (url, chunk_number) -> row position for the text chunks of df, built once per DataFrame.
+    Tables, table rows and images reuse chunk numbers per table/image, so they are left out.
+    """
+    return cached_per_frame(df, 'neighbour_map', _build_neighbour_map)
+
+def _build_neighbour_map(df):
+    text = df[df['content_type'] == 'text'] if 'content_type' in df.columns else df
+    positions = df.index.get_indexer(text.index)
+    return {
+        (url, int(chunk_number)): int(position)
+        for url, chunk_number, position in zip(text['url'], text['chunk_number'], positions)
+    }
+
+def _section_numbers(neighbours, df, url, chunk_number, max_chunks):
+    """Chunk numbers of the section around chunk_number: back to its heading, up to the next one"""
+    def starts_section(number):
+        position = neighbours.get((url, number))
+        return position is not None and bool(SECTION_HEADING.match(str(df['content'].iloc[position])))
+
+    first = chunk_number
+    while (first - 1 >= 1 and (url, first - 1) in neighbours and not starts_section(first)
+           and chunk_number - first < max_chunks // 2):
+        first -= 1
+    last = chunk_number
+    while (url, last + 1) in neighbours and not starts_section(last + 1) and last - first + 1 < max_chunks:
+        last += 1
+    return range(first, last + 1)
+
+def expand_results(results, df, window=1, mode='neighbours', max_section_chunks=8):
+    """
+    Retrieve small, feed large: widen text results to neighbouring chunks of the same page.
+
+    Args:
+        results: Retrieval results, best first
+        df: The DataFrame the results came from
+        window: mode 'neighbours' adds chunk_number - window .. chunk_number + window
+        mode: 'neighbours' or 'section' (grow to the surrounding markdown section)
+        max_section_chunks: Upper bound on chunks merged in 'section' mode
+
+    Returns:
+        Results in the same order with merged 'content' and an 'expanded_chunks' list;
+        a result whose chunk was already pulled in by a better-ranked one is dropped
+    """
+    if mode not in EXPANSION_MODES:
+        raise ValueError(f"Unknown expansion mode {mode!r}, expected one of {EXPANSION_MODES}")
+    neighbours = get_neighbour_map(df)
+    covered = set()
+    expanded = []
+    for result in results:
+        url, chunk_number = result.get('url'), result.get('chunk')
+        if result.get('content_type') != 'text' or (url, chunk_number) not in neighbours:
+            expanded.append(result)
+            continue
+        if (url, chunk_number) in covered:
+            continue
+
+        if mode == 'section':
+            numbers = _section_numbers(neighbours, df, url, chunk_number, max_section_chunks)
+        else:
+            numbers = range(chunk_number - window, chunk_number + window + 1)
+        numbers = [n for n in numbers if (url, n) in neighbours and (url, n) not in covered]
+        covered.update((url, n) for n in numbers)
+
+        contents = [str(df['content'].iloc[neighbours[(url, n)]]) for n in numbers]
+        expanded.append(dict(result, content="\n\n".join(contents), expanded_chunks=numbers))
+    return expanded
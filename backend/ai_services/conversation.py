@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .vector_search import embed_query
+from .openai_services import build_context, build_user_message
+
+# Time we wait for the condensed question before falling back to a local rewrite
+DEFAULT_CONDENSE_BUDGET_S = 1.0
+# Turns kept in the model prompt; sources of older turns may be sent again
+MAX_HISTORY_TURNS = 4
+MAX_CACHED_QUERIES = 64
+
+CONDENSE_PROMPT = (
+    "Rewrite the user's last message as one standalone search query for the UCSB Nanofab wiki, "
+    "resolving references such as 'it', 'that tool' or 'the next step' from the conversation. "
+    "Reply with the query only."
+)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="conversation")
+
+class ConversationState:
+    """
+    Per-session retrieval state for follow-up questions; keep one in st.session_state.
+
+    Caches query embeddings and retrieved results by standalone query, numbers every
+    source once per conversation, and keeps the model-side turns (with their context)
+    so sources that were already sent are referenced instead of sent again.
+    """
+
+    def __init__(self, max_turns=MAX_HISTORY_TURNS, max_cached=MAX_CACHED_QUERIES):
+        self.max_turns = max_turns
+        self.max_cached = max_cached
+        self.turns = []  # dicts: question, standalone, messages (user + assistant), sources
+        self.source_numbers = {}  # row position -> source number, for sources still in the prompt
+        self._next_source_number = 1
+        self._embeddings = OrderedDict()
+        self._retrieved = OrderedDict()
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.max_cached:
+            cache.popitem(last=False)
+
+    def standalone_query(self, question, client, model="gpt-4o-mini", budget_s=DEFAULT_CONDENSE_BUDGET_S):
+        """Condense the conversation and question into a standalone search query"""
+        if not self.turns:
+            return question
+        transcript = "\n".join(
+            f"User: {turn['question']}\nAssistant: {turn['answer'][:400]}" for turn in self.turns[-self.max_turns:]
+        )
+        future = _executor.submit(
+            client.chat.completions.create,
+            model=model,
+            messages=[
+                {"role": "system", "content": CONDENSE_PROMPT},
+                {"role": "user", "content": f"{transcript}\nUser: {question}"}
+            ],
+            temperature=0,
+            max_tokens=80
+        )
+        try:
+            condensed = future.result(timeout=budget_s).choices[0].message.content.strip()
+            if condensed:
+                print(f"Standalone query: {condensed}")
+                return condensed
+        except FutureTimeoutError:
+            print(f"Condensing exceeded {budget_s:.1f}s budget, using the previous query as context")
+        except Exception as e:
+            print(f"Condensing failed ({e}), using the previous query as context")
+        # The previous standalone query carries the topic a short follow-up leaves out
+        return f"{self.turns[-1]['standalone']} {question}"
+
+    def embed(self, query_text, client):
+        """Query embedding, cached per session"""
+        if query_text in self._embeddings:
+            self._embeddings.move_to_end(query_text)
+            return self._embeddings[query_text]
+        embedding = embed_query(query_text, client)
+        if embedding is not None:
+            self._remember(self._embeddings, query_text, embedding)
+        return embedding
+
+    def cached_results(self, key):
+        """Results retrieved earlier in this session under key (standalone query + settings), or None"""
+        return self._retrieved.get(key)
+
+    def remember_results(self, key, results):
+        self._remember(self._retrieved, key, results)
+
+    def history(self):
+        """Model-side messages of the kept turns, oldest first"""
+        return [message for turn in self.turns for message in turn['messages']]
+
+    def split_sources(self, retrieved_chunks):
+        """
+        Split results into ones not yet in the prompt and the source numbers of ones that are.
+        New chunks are numbered by number_sources once packing has decided which are sent.
+
+        Returns:
+            (new_chunks, reused_source_numbers)
+        """
+        new_chunks, reused = [], []
+        for chunk in retrieved_chunks:
+            position = chunk.get('row_position')
+            if position in self.source_numbers:
+                reused.append(self.source_numbers[position])
+            else:
+                new_chunks.append(chunk)
+        return new_chunks, reused
+
+    def number_sources(self, packed_chunks):
+        """
+        Give every (score, chunk) that is actually sent the next source number, in place, so
+        sources dropped by pack_context leave no gaps in the numbering
+        """
+        for _, chunk_row in packed_chunks:
+            chunk_row['source_number'] = self._next_source_number
+            self._next_source_number += 1
+        return packed_chunks
+
+    def record_turn(self, question, standalone, converted_chunks, reused, answer):
+        """
+        Keep the turn exactly as it was sent (converted_chunks as passed to
+        generate_response_with_context) so later turns can reference its sources.
+        """
+        self.turns.append({
+            'question': question,
+            'standalone': standalone,
+            'answer': answer,
+            'messages': [
+                {"role": "user", "content": build_user_message(question, build_context(converted_chunks), reused)},
+                {"role": "assistant", "content": answer}
+            ],
+            'sources': {chunk['row_position']: chunk['source_number'] for _, chunk in converted_chunks}
+        })
+        self.source_numbers.update(self.turns[-1]['sources'])
+        # Dropped turns take their context out of the prompt, so their sources count as unsent again
+        while len(self.turns) > self.max_turns:
+            for position in self.turns.pop(0)['sources']:
+                self.source_numbers.pop(position, None)
@@ -0,0 +1,106 @@
+import re
+import numpy as np
+from .vector_search import get_embedding_matrix
+
+# Row chunks are titled "<page> - <table_number> - Row <n>" by chunking.create_row_chunks
+ROW_TITLE_SUFFIX = re.compile(r"\s-\sRow\s\d+$")
+# Candidates retrieved before diversification picks the final k
+DEFAULT_POOL = 20
+# Relevance used by MMR, from the last stage that ordered the results: re-ranker, fusion, cosine
+RELEVANCE_KEYS = ('rerank_score', 'fused_score', 'score')
+
+def table_family(result):
+    """(url, table title) shared by a complete-table chunk and its row chunks; None for other content"""
+    content_type = result.get('content_type')
+    if content_type == 'table':
+        return (result.get('url'), result.get('title'))
+    if content_type == 'table_row':
+        return (result.get('url'), ROW_TITLE_SUFFIX.sub('', str(result.get('title', ''))))
+    return None
+
+def collapse_table_families(results):
+    """
+    When a complete table and rows of that same table were both retrieved, keep only the
+    table (it already contains the rows), placed at the best rank any family member had.
+    """
+    parents = {}
+    for result in results:
+        if result.get('content_type') == 'table':
+            parents.setdefault(table_family(result), result)
+
+    collapsed, emitted = [], set()
+    for result in results:
+        family = table_family(result)
+        if family not in parents:
+            collapsed.append(result)
+        elif family not in emitted:
+            emitted.add(family)
+            collapsed.append(parents[family])
+    return collapsed
+
+def relevance_scores(results):
+    """
+    Relevance of each result from the first of RELEVANCE_KEYS that every result carries.
+    Re-ranker grades and fused scores are min-max scaled to [0, 1] so they weigh against
+    the cosine redundancy term on the same scale as a cosine score.
+    """
+    key = next((key for key in RELEVANCE_KEYS if all(key in r for r in results)), 'score')
+    values = np.asarray([r.get(key, 0.0) for r in results], dtype=np.float32)
+    if key == 'score':
+        return values
+    spread = values.max() - values.min()
+    return (values - values.min()) / spread if spread > 0 else np.ones_like(values)
+
+def mmr_select(relevance, vectors, k, lambda_mult=0.7):
+    """
+    Greedy maximal-marginal-relevance selection.
+
+    Args:
+        relevance: (n,) similarity of each candidate to the query
+        vectors: (n, d) normalized candidate embeddings
+        k: Number of candidates to pick
+        lambda_mult: 1.0 = pure relevance, 0.0 = pure diversity
+
+    Returns:
+        Indices of the selected candidates, in pick order
+    """
+    n = len(relevance)
+    pairwise = vectors @ vectors.T
+    redundancy = np.zeros(n, dtype=np.float32)  # max similarity to anything already picked
+    available = np.ones(n, dtype=bool)
+    selected = []
+    for _ in range(min(k, n)):
+        marginal = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        pick = int(np.argmax(marginal))
+        selected.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, pairwise[pick])
+    return selected
+
+def diversify(results, df, k=5, lambda_mult=0.7, collapse=True, relevance=None):
+    """
+    Drop duplicate context from retrieved results before they reach the prompt.
+
+    Args:
+        results: Retrieval results (with 'row_position' and cosine 'score'), best first
+        df: The DataFrame the results were retrieved from
+        k: Number of results to keep
+        lambda_mult: MMR trade-off between relevance and novelty
+        collapse: Merge table / table_row results from the same table first
+        relevance: Optional function mapping the results to their (n,) relevance;
+            defaults to relevance_scores (re-ranker, then fused, then cosine score)
+
+    Returns:
+        Up to k results in MMR pick order
+    """
+    if collapse:
+        results = collapse_table_families(results)
+    if len(results) <= 1:
+        return results[:k]
+
+    positions = np.asarray([r['row_position'] for r in results], dtype=np.int64)
+    vectors = get_embedding_matrix(df)[positions]
+    scores = (relevance or relevance_scores)(results)
+    picked = mmr_select(np.asarray(scores, dtype=np.float32), vectors, k, lambda_mult)
+    print(f"Diversified {len(results)} candidates down to {len(picked)}")
+    return [results[i] for i in picked]
@@ -3,26 +3,33 @@ import pandas as pd
 import json
 import time
 import numpy as np
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+try:
+    from .bm25_index import build_chunk_index, DEFAULT_INDEX_PATH
+    from .content_types import add_content_columns
+    from .openai_client import get_client
+    from .resilience import resilient_call, bounded
+except ImportError:  # run directly as a script from backend/ai_services/
+    from bm25_index import build_chunk_index, DEFAULT_INDEX_PATH
+    from content_types import add_content_columns
+    from openai_client import get_client
+    from resilience import resilient_call, bounded
 
 def embed_chunks_with_openai(chunks_df, client):
     """Generate embeddings for existing chunks"""
     
+    # Chunk files from before content types were stored get them here, not at query time
+    chunks_df = add_content_columns(chunks_df.copy())
     embedded_chunks = []
     
     for index, row in chunks_df.iterrows():
         print(f"Processing chunk {index + 1}/{len(chunks_df)}")
         
         try:
-            response = client.embeddings.create(
+            response = resilient_call("embed_document", lambda timeout: bounded(client, timeout).embeddings.create(
                 input=row['content'],
                 model="text-embedding-3-small"
-            )
+            ))
             
             # Get the embedding vector
             embedding_vector = response.data[0].embedding
@@ -52,9 +59,10 @@ def embed_chunks_with_openai(chunks_df, client):
                 'vectors': json.dumps(embedding_vector, separators=(',', ':'))
             }
             
-            # Add content_type if it exists
-            if 'content_type' in row:
-                chunk_data['content_type'] = row['content_type']
+            # Add content_type and its display fields if they exist
+            for column in ('content_type', 'display_type', 'icon'):
+                if column in row:
+                    chunk_data[column] = row[column]
                 
             embedded_chunks.append(chunk_data)
             
@@ -73,9 +81,10 @@ def embed_chunks_with_openai(chunks_df, client):
                 'vectors': None
             }
             
-            # Add content_type and total_chunks if they exist
-            if 'content_type' in row:
-                chunk_data['content_type'] = row['content_type']
+            # Add content_type, its display fields and total_chunks if they exist
+            for column in ('content_type', 'display_type', 'icon'):
+                if column in row:
+                    chunk_data[column] = row[column]
             if 'total_chunks' in row:
                 chunk_data['total_chunks'] = row['total_chunks']
                 
@@ -83,46 +92,55 @@ def embed_chunks_with_openai(chunks_df, client):
     
     return pd.DataFrame(embedded_chunks)
 
-print("Loading chunks from processed/chunked_pages.csv...")
-input_path = "csv_dataframes/processed/chunked_pages.csv"
+def main():
+    client = get_client()
+    print("Loading chunks from processed/chunked_pages.csv...")
+    input_path = "csv_dataframes/processed/chunked_pages.csv"
 
-try:
-    chunks_df = pd.read_csv(input_path)
-    print(f"Found {len(chunks_df)} chunks to embed")
+    try:
+        chunks_df = pd.read_csv(input_path)
+        print(f"Found {len(chunks_df)} chunks to embed")
+    
+        # Show breakdown by content type if available
+        if 'content_type' in chunks_df.columns:
+            content_type_counts = chunks_df['content_type'].value_counts()
+            print("Content type breakdown:")
+            for content_type, count in content_type_counts.items():
+                print(f"  - {content_type}: {count} chunks")
     
-    # Show breakdown by content type if available
-    if 'content_type' in chunks_df.columns:
-        content_type_counts = chunks_df['content_type'].value_counts()
-        print("Content type breakdown:")
-        for content_type, count in content_type_counts.items():
-            print(f"  - {content_type}: {count} chunks")
+        # Generate embeddings
+        embedded_df = embed_chunks_with_openai(chunks_df, client)
     
-    # Generate embeddings
-    embedded_df = embed_chunks_with_openai(chunks_df, client)
+        # Save to embeddings folder
+        output_path = "csv_dataframes/embeddings/chunked_pages_with_embeddings.csv"
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    # Save to embeddings folder
-    output_path = "csv_dataframes/embeddings/chunked_pages_with_embeddings.csv"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        embedded_df.to_csv(output_path, index=False)
     
-    embedded_df.to_csv(output_path, index=False)
+        print(f"✅ Embeddings generated and saved to '{output_path}'!")
     
-    print(f"✅ Embeddings generated and saved to '{output_path}'!")
-    print(f"Generated embeddings for {len(embedded_df)} chunks")
+        # Build the keyword index once here so queries never re-tokenize the corpus
+        build_chunk_index(embedded_df).save(DEFAULT_INDEX_PATH)
+        print(f"✅ BM25 keyword index saved to '{DEFAULT_INDEX_PATH}'")
+        print(f"Generated embeddings for {len(embedded_df)} chunks")
     
-    # Show summary
-    print(f"\nSummary:")
-    print(f"- Total chunks: {len(embedded_df)}")
-    print(f"- Average content length: {embedded_df['character_count'].mean():.0f} characters")
+        # Show summary
+        print(f"\nSummary:")
+        print(f"- Total chunks: {len(embedded_df)}")
+        print(f"- Average content length: {embedded_df['character_count'].mean():.0f} characters")
     
-    # Show breakdown by content type if available
-    if 'content_type' in embedded_df.columns:
-        content_type_counts = embedded_df['content_type'].value_counts()
-        print("Final content type breakdown:")
-        for content_type, count in content_type_counts.items():
-            print(f"  - {content_type}: {count} chunks")
+        # Show breakdown by content type if available
+        if 'content_type' in embedded_df.columns:
+            content_type_counts = embedded_df['content_type'].value_counts()
+            print("Final content type breakdown:")
+            for content_type, count in content_type_counts.items():
+                print(f"  - {content_type}: {count} chunks")
+
+    except FileNotFoundError:
+        print(f"Error: Could not find {input_path}")
+        print("Make sure you've run the chunking script first to create the chunked_pages.csv file")
+    except Exception as e:
+        print(f"Error: {e}")
 
-except FileNotFoundError:
-    print(f"Error: Could not find {input_path}")
-    print("Make sure you've run the chunking script first to create the chunked_pages.csv file")
-except Exception as e:
-    print(f"Error: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import re
+import json
+import pandas as pd
+from .bm25_index import tokenize
+from .model_router import classify_question
+from .table_store import RAW_SUFFIX
+
+# Cosine similarity a table_row hit needs before we trust it without the LLM
+DEFAULT_MIN_SCORE = 0.5
+MAX_ANSWER_ROWS = 3
+# Too generic to identify a column or a row on their own
+GENERIC_TERMS = {"the", "of", "in", "for", "a", "an", "and", "or", "to", "on", "at", "is", "what", "which",
+                 "with", "by", "tool", "value", "values", "number", "no", "nm", "um", "min", "s"}
+
+def _terms(text):
+    return set(tokenize(text)) - GENERIC_TERMS
+
+def match_column(question_terms, columns):
+    """Columns whose name is mostly covered by the question, best coverage first"""
+    matches = []
+    for column in columns:
+        column_terms = _terms(column)
+        if not column_terms:
+            continue
+        coverage = len(column_terms & question_terms) / len(column_terms)
+        if coverage >= 0.5:
+            matches.append((coverage, column))
+    return [column for coverage, column in sorted(matches, key=lambda m: -m[0])]
+
+def extractive_answer(question, results, min_score=DEFAULT_MIN_SCORE, max_rows=MAX_ANSWER_ROWS):
+    """
+    Answer a lookup question straight from retrieved table_row JSON, without generation.
+
+    Applies only when the question is a lookup, the best result is a table_row above
+    min_score, the question names one of the row's columns, and the row itself is the one
+    asked about (another of its cells shares a term with the question).
+
+    Args:
+        question: The user's question
+        results: Retrieval results (cosine 'score', 'content' = row JSON), best first
+        min_score: Similarity every answering row must reach
+        max_rows: Most rows quoted in the answer
+
+    Returns:
+        (answer_markdown, answering_results), or None when the LLM should answer
+    """
+    tier, _ = classify_question(question)
+    if tier != "lookup" or not results:
+        return None
+    if results[0].get('content_type') != 'table_row' or results[0].get('score', 0.0) < min_score:
+        return None
+
+    question_terms = _terms(question)
+    lines, used = [], []
+    for result in results:
+        if len(used) == max_rows:
+            break
+        if result.get('content_type') != 'table_row' or result.get('score', 0.0) < min_score:
+            continue
+        try:
+            row = json.loads(result['content'])
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(row, dict):
+            continue
+        columns = match_column(question_terms, [c for c, v in row.items() if str(v).strip()])
+        if not columns:
+            continue
+        column = columns[0]
+        identity = [f"{c}: {v}" for c, v in row.items()
+                    if c != column and str(v).strip() and _terms(str(v)) & question_terms]
+        if not identity:
+            continue
+        lines.append(f"- **{column}**: {row[column]} ({'; '.join(identity)}) — *{result.get('title', '')}*")
+        used.append(result)
+
+    if not used:
+        return None
+    print(f"Extractive answer from {len(used)} table row(s), skipping generation")
+    return "\n".join(lines), used
+
+# "rate above 100", "etch rate between 20 and 60", "thickness < 1.5"
+NUMBER = r"([-+]?\d[\d,]*\.?\d*)"
+COMPARISON_PATTERN = re.compile(
+    r"((?:[a-z0-9]+\s+){1,4}?)(above|over|greater than|more than|higher than|at least|below|under|less than"
+    r"|lower than|at most|>=|<=|>|<)\s*" + NUMBER,
+    re.IGNORECASE
+)
+BETWEEN_PATTERN = re.compile(r"((?:[a-z0-9]+\s+){1,4}?)between\s+" + NUMBER + r"\s+and\s+" + NUMBER, re.IGNORECASE)
+OPERATORS = {
+    "above": ">", "over": ">", "greater than": ">", "more than": ">", "higher than": ">", "at least": ">=",
+    "below": "<", "under": "<", "less than": "<", "lower than": "<", "at most": "<=",
+    ">=": ">=", "<=": "<=", ">": ">", "<": "<"
+}
+COLUMN_STOP_WORDS = GENERIC_TERMS | {"have", "has", "had", "with", "are", "a", "an", "their", "its", "whose", "any", "all"}
+MAX_TABLE_ANSWER_ROWS = 15
+# Only questions asking for a list of rows are answered from the store: "which recipes ...",
+# "list the films ...", "show me ..."; "what happens if the power is over 100 W" is not one
+LIST_QUERY_PATTERN = re.compile(
+    r"^\s*(?:which|list|show(?: me)?|find|give me"
+    r"|what (?:are (?:the )?)?(?:recipes|processes|materials|films|resists|layers|rows|tools))\b",
+    re.IGNORECASE
+)
+# Too common in wiki page titles to name a tool or page on their own
+SCOPE_STOP_WORDS = GENERIC_TERMS | {"recipe", "recipes", "data", "process", "processes", "control", "table",
+                                    "tables", "procedure", "standard", "operating", "old", "overview",
+                                    "guidelines", "https", "wiki", "edu", "ucsb", "nanofab", "index", "php"}
+
+def _column_candidates(phrase):
+    """Longest-first word suffixes of the phrase before the comparison: "etch rate", "rate" """
+    words = [w for w in re.findall(r"[a-z0-9]+", phrase.lower()) if w not in COLUMN_STOP_WORDS]
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+def _scope_terms(text):
+    return {t for t in tokenize(text) if t not in SCOPE_STOP_WORDS and not t.isdigit()}
+
+def scoped_tables(question, store):
+    """
+    Ids of the tables whose page title or URL shares the most words with the question
+    ("ICP" -> the ICP etching tables); empty when the question names no tool or page.
+    """
+    question_terms = _scope_terms(question)
+    best, scope = 0, []
+    for key, info in store.catalog.items():
+        page = str(info["url"]).rstrip("/").rsplit("/", 1)[-1]
+        overlap = len(question_terms & _scope_terms(f"{info['title']} {page}"))
+        if overlap and overlap > best:
+            best, scope = overlap, [key]
+        elif overlap and overlap == best:
+            scope.append(key)
+    return scope
+
+def table_query_answer(question, store, max_rows=MAX_TABLE_ANSWER_ROWS):
+    """
+    Answer list questions with a numeric comparison ("which ICP recipes have a rate above
+    100 nm/min") with a vectorized scan of the typed table store instead of retrieval and
+    generation. Only the tables of the tool or page the question names are scanned.
+
+    Returns:
+        (answer_markdown, sources), or None when the question is not a list query with a
+        comparison, names no page with a matching numeric column, or no row matches, so the
+        question goes through retrieval
+    """
+    if not LIST_QUERY_PATTERN.search(question):
+        return None
+    between = BETWEEN_PATTERN.search(question)
+    comparison = None if between else COMPARISON_PATTERN.search(question)
+    if not (between or comparison):
+        return None
+    match = between or comparison
+    # The column and the value don't name the page
+    tables = scoped_tables(question[:match.start()] + " " + question[match.end():], store)
+    if not tables:
+        return None
+
+    for column in _column_candidates(match.group(1)):
+        if not store.find_columns(column, numeric=True, tables=tables):
+            continue
+        if between:
+            low, high = sorted(float(match.group(i).replace(",", "")) for i in (2, 3))
+            rows = store.range(column, low, high, tables=tables)
+            condition = f"between {low:g} and {high:g}"
+        else:
+            op = OPERATORS[match.group(2).lower()]
+            value = float(match.group(3).replace(",", ""))
+            rows = store.filter(column, op, value, tables=tables)
+            condition = f"{op} {value:g}"
+        # Only answer from rows that match; an empty scan may just mean the wrong column
+        if not rows.empty:
+            break
+    else:
+        return None
+
+    print(f"Table query: {column} {condition} -> {len(rows)} rows")
+
+    lines, sources = [], []
+    for _, row in rows.head(max_rows).iterrows():
+        info = store.catalog[row['table_id']]
+        # Original cell text per header; numeric columns keep theirs in '<column>__raw'
+        cells = {}
+        for name, header in info['columns'].items():
+            cell = row[name + RAW_SUFFIX if name in info['numeric'] else name]
+            cells[header] = "" if pd.isna(cell) else str(cell)
+        value_header = info['columns'][row['matched_column']]
+        labels = [f"{header}: {cells[header]}" for name, header in info['columns'].items()
+                  if name not in info['numeric'] and cells[header].strip()][:2]
+        lines.append(f"- **{value_header}**: {cells[value_header]} ({'; '.join(labels)}) — *{row['table_title']}*")
+        sources.append({
+            'url': row['url'],
+            'title': row['table_title'],
+            'content': json.dumps(cells, ensure_ascii=False),
+            'content_type': 'table_row',
+            'score': 1.0
+        })
+    if len(rows) > max_rows:
+        lines.append(f"- … and {len(rows) - max_rows} more rows")
+    return "\n".join(lines), sources
@@ -0,0 +1,123 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from .vector_search import embed_query, get_embedding_matrix, cosine_similarity_openai, format_results, attached_index
+from .index_utils import top_k
+from .metadata_filters import filter_positions
+
+# Standard RRF damping constant: rank r contributes weight / (RRF_K + r)
+RRF_K = 60
+FUSION_METHODS = ('rrf', 'score')
+
+# Query embedding is a network call; it runs here while BM25 scores locally
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-search")
+
+def reciprocal_rank_fusion(ranked_lists, weights, rrf_k=RRF_K):
+    """
+    Fuse ranked lists of row positions by weighted reciprocal rank.
+
+    Returns:
+        dict of row position -> fused score
+    """
+    fused = {}
+    for positions, weight in zip(ranked_lists, weights):
+        for rank, position in enumerate(positions.tolist(), 1):
+            fused[position] = fused.get(position, 0.0) + weight / (rrf_k + rank)
+    return fused
+
+def normalized_score_fusion(scored_lists, weights):
+    """
+    Fuse (scores, positions) lists by min-max normalizing each list's scores to [0, 1]
+    and taking the weighted sum; a row missing from a list gets 0 from it.
+
+    Returns:
+        dict of row position -> fused score
+    """
+    fused = {}
+    for (scores, positions), weight in zip(scored_lists, weights):
+        if len(scores) == 0:
+            continue
+        low, high = float(scores.min()), float(scores.max())
+        normalized = (scores - low) / (high - low) if high > low else np.ones_like(scores)
+        for position, score in zip(positions.tolist(), normalized.tolist()):
+            fused[position] = fused.get(position, 0.0) + weight * score
+    return fused
+
+def hybrid_similarity_search(query_text, df, client, bm25, k=5, keyword_weight=0.5, fusion='rrf',
+                             candidates=50, index=None, search_params=None, filters=None,
+                             query_embedding=None, require_all=False):
+    """
+    Hybrid lexical + dense retrieval over the chunk DataFrame.
+
+    The query embedding request and the BM25 lookup run concurrently; each retriever
+    contributes its top `candidates` rows and the lists are fused per request.
+
+    Args:
+        query_text: The user's question
+        df: Chunk DataFrame with embedding_vectors (index labels = CSV row numbers)
+        client: OpenAI client used to embed the query
+        bm25: bm25_index.BM25Index built over the same CSV rows
+        k: Number of results to return
+        keyword_weight: Weight [0.0-1.0] of the lexical list; the dense list gets 1 - keyword_weight
+        fusion: 'rrf' (reciprocal rank fusion) or 'score' (min-max normalized score fusion)
+        candidates: Rows taken from each retriever before fusion
+        index, search_params: Optional ANN index for the dense side, as in vector_similarity_search
+        filters: Optional metadata filters applied to both retrievers, as in vector_similarity_search
+        query_embedding: Embedding of query_text when the caller already has it (skips the API call)
+        require_all: Lexical candidates must contain every known query term (posting-list
+            intersection) rather than any of them
+
+    Returns:
+        Results in the vector_similarity_search format, ordered by fused score; 'score' stays the
+        cosine similarity and 'fused_score' / 'keyword_score' are added
+    """
+    if fusion not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion {fusion!r}, expected one of {FUSION_METHODS}")
+
+    if query_embedding is None:
+        embedding_future = _executor.submit(embed_query, query_text, client)
+
+    allowed = filter_positions(df, filters)
+
+    # Lexical side: exact term matches such as "MLA150" or "AutoStep 200"
+    keyword_scores = bm25.aligned_scores(query_text, df.index, require_all=require_all)
+    if allowed is not None:
+        matched = allowed[keyword_scores[allowed] > 0]
+    else:
+        matched = np.flatnonzero(keyword_scores > 0)
+    lexical_scores, best = top_k(keyword_scores[matched], candidates)
+    lexical = (lexical_scores, matched[best])
+
+    if query_embedding is None:
+        query_embedding = embedding_future.result()
+    if query_embedding is None:
+        return []
+    query_vector = np.asarray(query_embedding, dtype=np.float32)
+
+    # Dense side
+    index = index if index is not None else attached_index(df)
+    matrix = get_embedding_matrix(df)
+    if allowed is not None:
+        dense_scores, best = top_k(cosine_similarity_openai(query_vector, matrix[allowed]), candidates)
+        dense = (dense_scores, allowed[best])
+    elif index is not None:
+        dense = index.search(query_vector, candidates, **(search_params or {}))
+    else:
+        dense = top_k(cosine_similarity_openai(query_vector, matrix), candidates)
+
+    weights = (keyword_weight, 1.0 - keyword_weight)
+    if fusion == 'rrf':
+        fused = reciprocal_rank_fusion([lexical[1], dense[1]], weights)
+    else:
+        fused = normalized_score_fusion([lexical, dense], weights)
+
+    ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+    positions = np.asarray(ranked, dtype=np.int64)
+    cosine_scores = cosine_similarity_openai(query_vector, matrix[positions])
+
+    print(f"Hybrid search ({fusion}): {len(lexical[1])} keyword + {len(dense[1])} dense candidates, "
+          f"returning top {k}")
+    results = format_results(df, cosine_scores, positions)
+    for result in results:
+        result['fused_score'] = fused[result['row_position']]
+        result['keyword_score'] = float(keyword_scores[result['row_position']])
+    return results
@@ -0,0 +1,90 @@
+import weakref
+import numpy as np
+
+# (name, id(df)) -> (row count, value) for everything built once per DataFrame
+_frame_cache = {}
+
+def cached_per_frame(df, name, build):
+    """
+    build(df), computed once per DataFrame and reused until it changes length or is collected.
+
+    Keyed by id(df), which is only unique while df is alive, so each entry is dropped by a
+    weakref finalizer when its DataFrame is collected; the row count catches frames that
+    grew or shrank in place.
+    """
+    entry = _frame_cache.get((name, id(df)))
+    if entry is None or entry[0] != len(df):
+        return store_per_frame(df, name, build(df))
+    return entry[1]
+
+def store_per_frame(df, name, value):
+    """Replace the cached_per_frame value for df, e.g. with a memmapped copy; returns value"""
+    key = (name, id(df))
+    if key not in _frame_cache:
+        weakref.finalize(df, _frame_cache.pop, key, None)
+    _frame_cache[key] = (len(df), value)
+    return value
+
+def frame_value(df, name):
+    """The value stored for df under name, or None; never builds anything"""
+    entry = _frame_cache.get((name, id(df)))
+    return entry[1] if entry is not None and entry[0] == len(df) else None
+
+def top_k(scores, k):
+    """Return (scores, positions) of the k highest scores, best first, without a full sort"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+    positions = np.argpartition(-scores, k - 1)[:k]
+    positions = positions[np.argsort(-scores[positions], kind='stable')]
+    return scores[positions], positions
+
+def squared_distances(x, centroids):
+    """Squared L2 distances between the rows of x and the centroids, shape (len(x), len(centroids))"""
+    dists = -2.0 * (x @ centroids.T)
+    dists += (x * x).sum(axis=1, keepdims=True)
+    dists += (centroids * centroids).sum(axis=1)
+    return dists
+
+def assign(x, centroids, batch_size=8192):
+    """Index of the nearest centroid for every row of x, computed in batches to bound memory"""
+    labels = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), batch_size):
+        labels[start:start + batch_size] = squared_distances(x[start:start + batch_size], centroids).argmin(axis=1)
+    return labels
+
+def kmeans(x, n_clusters, n_iter=20, max_train_points=None, seed=0):
+    """
+    Plain Lloyd's k-means in NumPy.
+
+    Args:
+        x: (N, d) float32 training vectors
+        n_clusters: Number of centroids (clipped to N)
+        n_iter: Lloyd iterations
+        max_train_points: Optional subsample size to bound training time
+        seed: RNG seed so rebuilt indexes are reproducible
+
+    Returns:
+        (n_clusters, d) float32 centroids
+    """
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=np.float32)
+    if max_train_points and len(x) > max_train_points:
+        x = x[rng.choice(len(x), max_train_points, replace=False)]
+    n_clusters = min(n_clusters, len(x))
+    centroids = x[rng.choice(len(x), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        labels = assign(x, centroids)
+        counts = np.bincount(labels, minlength=n_clusters)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        # Sum each cluster's members in one pass over the label-sorted rows
+        sums = np.add.reduceat(x[np.argsort(labels, kind='stable')], starts[filled], axis=0)
+        centroids[filled] = sums / counts[filled, None]
+        # Re-seed empty clusters with random points so every code stays in use
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+
+    return centroids
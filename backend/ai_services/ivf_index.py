@@ -0,0 +1,98 @@
+import numpy as np
+from .index_utils import kmeans, assign, top_k
+
+class IVFIndex:
+    """
+    Inverted-file index over the chunk embeddings, pure NumPy.
+
+    k-means splits the corpus into `nlist` cells and every cell keeps its vectors in one
+    contiguous float32 block, so a query only scores the `nprobe` cells whose centroids
+    are closest to it. Vectors can be added or removed later without retraining; rebuild
+    with fit() once the corpus has drifted far from the original centroids.
+
+    Scores are inner products, i.e. cosine similarity for the pre-normalized OpenAI embeddings.
+    """
+
+    def __init__(self, nlist=100, nprobe=8, n_iter=20, seed=0):
+        """
+        Args:
+            nlist: Number of k-means cells (clipped to the corpus size)
+            nprobe: Default number of cells scanned per query; override per request in search()
+            n_iter: k-means iterations
+            seed: RNG seed for reproducible builds
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids = None
+        self.list_vectors = []  # per cell: (capacity, d) float32 block, first list_sizes[l] rows used
+        self.list_ids = []      # per cell: (capacity,) int64 ids, aligned with list_vectors
+        self.list_sizes = None
+        self._location = {}     # id -> (cell, slot)
+
+    def __len__(self):
+        return len(self._location)
+
+    def fit(self, vectors, ids=None):
+        """Train the centroids on vectors and index them; ids default to row positions. Returns self"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ids = np.arange(len(vectors)) if ids is None else np.asarray(ids, dtype=np.int64)
+        self.centroids = kmeans(vectors, self.nlist, self.n_iter, max_train_points=256 * self.nlist,
+                                seed=self.seed)
+        labels = assign(vectors, self.centroids)
+        self.list_vectors, self.list_ids, self._location = [], [], {}
+        self.list_sizes = np.zeros(len(self.centroids), dtype=np.int64)
+        for cell in range(len(self.centroids)):
+            members = np.flatnonzero(labels == cell)
+            self.list_vectors.append(np.ascontiguousarray(vectors[members]))
+            self.list_ids.append(ids[members].copy())
+            self.list_sizes[cell] = len(members)
+            for slot, item_id in enumerate(ids[members].tolist()):
+                self._location[item_id] = (cell, slot)
+        return self
+
+    def add(self, vectors, ids):
+        """Assign new vectors to their nearest cells; re-adding an existing id replaces it"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        self.remove([i for i in ids.tolist() if i in self._location])
+        labels = assign(vectors, self.centroids)
+        for cell in np.unique(labels):
+            members = np.flatnonzero(labels == cell)
+            size, needed = self.list_sizes[cell], self.list_sizes[cell] + len(members)
+            if needed > len(self.list_ids[cell]):
+                # Grow geometrically so repeated small adds stay amortized O(1) per vector
+                capacity = max(needed, 2 * len(self.list_ids[cell]), 16)
+                block = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+                block[:size] = self.list_vectors[cell][:size]
+                block_ids = np.empty(capacity, dtype=np.int64)
+                block_ids[:size] = self.list_ids[cell][:size]
+                self.list_vectors[cell], self.list_ids[cell] = block, block_ids
+            self.list_vectors[cell][size:needed] = vectors[members]
+            self.list_ids[cell][size:needed] = ids[members]
+            for slot, item_id in enumerate(ids[members].tolist(), start=size):
+                self._location[item_id] = (cell, slot)
+            self.list_sizes[cell] = needed
+
+    def remove(self, ids):
+        """Drop ids from the index by moving each cell's last vector into the freed slot"""
+        for item_id in ids:
+            cell, slot = self._location.pop(int(item_id))
+            last = self.list_sizes[cell] - 1
+            if slot != last:
+                moved_id = int(self.list_ids[cell][last])
+                self.list_vectors[cell][slot] = self.list_vectors[cell][last]
+                self.list_ids[cell][slot] = moved_id
+                self._location[moved_id] = (cell, slot)
+            self.list_sizes[cell] = last
+
+    def search(self, query_vector, k=5, nprobe=None):
+        """Return (scores, ids) of the k best vectors among the nprobe closest cells"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probed = top_k(self.centroids @ query, nprobe)[1]
+        scores = [self.list_vectors[c][:self.list_sizes[c]] @ query for c in probed]
+        ids = [self.list_ids[c][:self.list_sizes[c]] for c in probed]
+        scores, best = top_k(np.concatenate(scores), k)
+        return scores, np.concatenate(ids)[best]
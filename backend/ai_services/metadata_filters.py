@@ -0,0 +1,93 @@
+from collections import OrderedDict
+import numpy as np
+from .index_utils import cached_per_frame
+
+FILTER_KEYS = ('content_type', 'url_prefix', 'title')
+# Packed masks kept per (key, value); a 30k-row corpus costs ~4 KB per cached mask
+MAX_CACHED_MASKS = 256
+
+class FilterIndex:
+    """
+    Precomputed row masks for metadata filters over a chunk DataFrame.
+
+    Masks are stored as bitsets (np.packbits, one bit per row): content_type masks are
+    built up front, url-prefix and title masks on first use and then cached. A filter is
+    resolved to row positions before any embedding is touched.
+    """
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        content_types = df['content_type'].astype(str).to_numpy() if 'content_type' in df.columns \
+            else np.full(self.n_rows, 'text', dtype=object)
+        self.masks = {
+            ('content_type', value): np.packbits(content_types == value)
+            for value in np.unique(content_types)
+        }
+        # Sorted urls turn a prefix into one contiguous slice found by binary search
+        urls = df['url'].fillna('').astype(str).to_numpy()
+        self._url_order = np.argsort(urls, kind='stable')
+        self._sorted_urls = urls[self._url_order]
+        self._titles = df['title'].fillna('').astype(str).str.lower().to_numpy()
+        self._cached = OrderedDict()
+
+    def _url_prefix_mask(self, prefix):
+        lo = np.searchsorted(self._sorted_urls, prefix, side='left')
+        hi = np.searchsorted(self._sorted_urls, prefix + '\U0010ffff', side='left')
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self._url_order[lo:hi]] = True
+        return mask
+
+    def _title_mask(self, term):
+        # Substring match, so "ASML" covers the page, its tables and their row chunks
+        term = term.lower()
+        return np.fromiter((term in title for title in self._titles), dtype=bool, count=self.n_rows)
+
+    def mask(self, key, value):
+        """Packed mask of rows where `key` matches `value`"""
+        if key == 'content_type':
+            return self.masks.get((key, value), np.packbits(np.zeros(self.n_rows, dtype=bool)))
+        cache_key = (key, value)
+        packed = self._cached.get(cache_key)
+        if packed is None:
+            if key == 'url_prefix':
+                packed = np.packbits(self._url_prefix_mask(value))
+            elif key == 'title':
+                packed = np.packbits(self._title_mask(value))
+            else:
+                raise ValueError(f"Unknown filter {key!r}, expected one of {FILTER_KEYS}")
+            self._cached[cache_key] = packed
+            if len(self._cached) > MAX_CACHED_MASKS:
+                self._cached.popitem(last=False)
+        else:
+            self._cached.move_to_end(cache_key)
+        return packed
+
+    def positions(self, filters):
+        """
+        Row positions matching every filter key (values within one key are OR-ed).
+
+        Args:
+            filters: e.g. {'content_type': ['table', 'table_row'], 'title': 'SOP'}
+                     or {'content_type': 'image', 'url_prefix': 'https://wiki.nanofab.ucsb.edu/wiki/ASML'}
+        """
+        combined = None
+        for key, values in filters.items():
+            if values is None or values == [] or values == '':
+                continue
+            if isinstance(values, str):
+                values = [values]
+            packed = np.bitwise_or.reduce([self.mask(key, value) for value in values])
+            combined = packed if combined is None else np.bitwise_and(combined, packed)
+        if combined is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(combined, count=self.n_rows))
+
+def get_filter_index(df):
+    """FilterIndex for df, built once per DataFrame"""
+    return cached_per_frame(df, 'filter_index', FilterIndex)
+
+def filter_positions(df, filters):
+    """Row positions of df matching filters, or None when nothing is filtered"""
+    if not filters or not any(filters.values()):
+        return None
+    return get_filter_index(df).positions(filters)
@@ -0,0 +1,60 @@
+import re
+
+# Generation settings per question tier; short lookups get a small output cap and the cheap model.
+# deadline_s overrides the "chat" resilience policy: a long gpt-4o answer needs more than its 45s
+ROUTES = {
+    "lookup": {"model": "gpt-4o-mini", "max_tokens": 300, "temperature": 0.0},
+    "standard": {"model": "gpt-4o-mini", "max_tokens": 1200, "temperature": 0.1},
+    "complex": {"model": "gpt-4o", "max_tokens": 4000, "temperature": 0.1, "deadline_s": 120.0},
+}
+
+# Questions after a single value: "what is the room number for the MLA150", "etch rate of SiO2",
+# "who is the tool owner", "how thick is the oxide". "What is the SOP ..." is not one
+LOOKUP_PATTERN = re.compile(
+    r"\b(room(?: number)?|phone|e-?mail|owner|contact|location|where is|who is"
+    r"|how (?:many|much|long|thick|hot|fast)"
+    r"|(?:etch|deposition|develop|spin|growth) rate|temperature|thickness|pressure|power|dose|wavelength)\b",
+    re.IGNORECASE
+)
+# Phrases that ask for a long, multi-part answer: "walk me through the ASML SOP", "compare the two
+# etchers", "troubleshoot poor adhesion". Single words such as "SOP", "full" or "procedure" are not
+# enough; "What is the SOP for the MLA150?" is an ordinary question
+COMPLEX_PATTERN = re.compile(
+    r"\b(walk (?:me )?through|step[- ]by[- ]step|(?:all|each|every) (?:of )?(?:the )?steps"
+    r"|compare|comparison|differences? between|versus|vs\.?|pros and cons|trade-?offs?"
+    r"|troubleshoot(?:ing)?|design (?:a|an) (?:process|recipe|flow)|process flow for)\b",
+    re.IGNORECASE
+)
+LOOKUP_MAX_WORDS = 14
+COMPLEX_MIN_WORDS = 35
+
+def classify_question(question):
+    """
+    Local complexity tier of a question: 'lookup', 'standard' or 'complex'.
+
+    Returns:
+        (tier, reason)
+    """
+    words = len(question.split())
+    complex_match = COMPLEX_PATTERN.search(question)
+    if complex_match:
+        return "complex", f"matched '{complex_match.group(0).lower()}'"
+    if words >= COMPLEX_MIN_WORDS:
+        return "complex", f"{words} words"
+    # Several questions in one message need more than a one-line answer
+    if question.count("?") > 1:
+        return "standard", "multiple questions"
+    lookup_match = LOOKUP_PATTERN.search(question)
+    if lookup_match and words <= LOOKUP_MAX_WORDS:
+        return "lookup", f"matched '{lookup_match.group(0).strip().lower()}', {words} words"
+    return "standard", f"{words} words"
+
+def route_question(question, routes=ROUTES):
+    """
+    Generation settings for a question.
+
+    Returns:
+        dict with tier, model, max_tokens, temperature and the reason for the decision
+    """
+    tier, reason = classify_question(question)
+    return dict(routes[tier], tier=tier, reason=reason)
@@ -0,0 +1,49 @@
+import os
+import threading
+
+# Shared connection pool for every module that talks to the OpenAI API
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY_S = 120.0
+
+_clients = {}
+_lock = threading.Lock()
+
+def http2_available():
+    """HTTP/2 needs the optional h2 package (pip install "httpx[http2]")"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def get_client(api_key_env="OPENAI_API_KEY"):
+    """
+    Process-wide OpenAI client for the key in `api_key_env`, created on first use.
+
+    Nothing happens at import time: .env is read, and the SDK and HTTP pool are built,
+    only when a client is first requested. Every caller shares one keep-alive pool
+    (HTTP/2 when h2 is installed). The SDK's default retries stay on for direct callers;
+    resilience.bounded turns them off per attempt inside resilient_call, which owns
+    retries and deadlines there.
+    """
+    client = _clients.get(api_key_env)
+    if client is None:
+        with _lock:
+            client = _clients.get(api_key_env)
+            if client is None:
+                import httpx
+                from dotenv import load_dotenv
+                from openai import OpenAI
+                load_dotenv()
+                http_client = httpx.Client(
+                    http2=http2_available(),
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=KEEPALIVE_EXPIRY_S
+                    )
+                )
+                client = OpenAI(api_key=os.getenv(api_key_env), http_client=http_client)
+                _clients[api_key_env] = client
+    return client
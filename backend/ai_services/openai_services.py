@@ -1,10 +1,37 @@
-from openai import OpenAI
-import os
 import json
-from dotenv import load_dotenv
+from .prompt_builder import pack_context, count_tokens, DEFAULT_CONTEXT_BUDGET
+from .model_router import route_question
+from .content_types import chunk_display
+from .resilience import resilient_call, bounded
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# System prompt for RAG. Requests are laid out static-first (this prompt, then earlier turns,
+# then the new context and question) so the provider can serve the shared prefix from its
+# prompt cache; keep this string byte-for-byte constant, nothing per-request belongs in it.
+RAG_SYSTEM_PROMPT = """You are a helpful AI assistant specializing in nanofabrication and laboratory processes. Use the provided context to answer the user's question accurately and comprehensively. 
+
+Guidelines:
+- Base your answer primarily on the provided context
+- The context may include different types of information: text descriptions, table data, and technical specifications
+- When referencing table data, mention specific values and parameters when relevant
+- If the context doesn't contain enough information, say so
+- Include relevant technical details from the context
+- Be clear and concise
+- When referencing information, you can mention it comes from the provided sources"""
+
+def usage_stats(response):
+    """
+    Token usage reported for a chat completion, including the prompt tokens served from the
+    provider's prompt cache (cached_tokens; 0 when nothing was cached or it is not reported)
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {}
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'prompt_tokens': usage.prompt_tokens,
+        'completion_tokens': usage.completion_tokens,
+        'cached_tokens': (getattr(details, 'cached_tokens', None) or 0) if details is not None else 0
+    }
 
 def format_chunk_for_display(chunk_row):
     """
@@ -37,7 +64,24 @@ def format_chunk_for_display(chunk_row):
         # Default case
         return content
 
-def generate_response_with_context(user_prompt, retrieved_chunks, client):
+def build_context(retrieved_chunks):
+    """Join chunk contents into numbered "Source i:" blocks for the model"""
+    context_parts = []
+    for i, (score, chunk_row) in enumerate(retrieved_chunks, 1):
+        # Conversations keep one number per source across turns
+        number = chunk_row.get('source_number') or i
+        context_parts.append(f"Source {number}:\n{chunk_row['content']}\n")
+    return "\n".join(context_parts)
+
+def build_user_message(user_prompt, context, reused_sources=None):
+    """User turn sent to the model; reused_sources are numbers of sources sent in earlier turns"""
+    if reused_sources:
+        numbers = ", ".join(str(n) for n in sorted(reused_sources))
+        context += f"\n(Sources {numbers} from earlier in this conversation are also relevant.)"
+    return f"Context:\n{context}\n\nQuestion: {user_prompt}"
+
+def generate_response_with_context(user_prompt, retrieved_chunks, client, history=None, reused_sources=None,
+                                   context_budget=DEFAULT_CONTEXT_BUDGET, stats=None, route=None, packed=False):
     """
     Generate a response using OpenAI's Chat Completions API with retrieved context.
     Enhanced to handle different content types properly.
@@ -46,23 +90,34 @@ def generate_response_with_context(user_prompt, retrieved_chunks, client):
         user_prompt: The user's question/prompt
         retrieved_chunks: List of (similarity_score, chunk_row) tuples from similarity search
         client: OpenAI client instance
+        history: Earlier turns of the conversation as chat messages, oldest first; their
+                 context is already in the prompt, so only new sources need to be passed
+        reused_sources: Source numbers from history that also apply to this question
+        context_budget: Tokens of source content allowed in the prompt (see prompt_builder.pack_context)
+        stats: Optional dict that receives token accounting for the request (context packing,
+               estimated prompt tokens, and prompt/completion/cached tokens reported by the API)
+        route: Generation settings (model, max_tokens, temperature, optional deadline_s); chosen
+               per question by model_router.route_question when not given, and recorded in stats['route']
+        packed: retrieved_chunks already went through pack_context (with this stats dict);
+                skips packing them again, which would reset the packing stats
 
     Returns:
         tuple: (response_text, enhanced_source_info_list)
     """
-    if not retrieved_chunks:
+    if not retrieved_chunks and not (history and reused_sources):
         return "I couldn't find relevant information to answer your question.", []
     
-    # Build context from retrieved chunks for AI
-    context_parts = []
+    # Build context from retrieved chunks for AI, within the token budget
+    stats = {} if stats is None else stats
+    if not packed:
+        retrieved_chunks = pack_context(user_prompt, retrieved_chunks, context_budget, stats=stats)
+    context = build_context(retrieved_chunks)
     enhanced_source_info = []
     
-    for i, (score, chunk_row) in enumerate(retrieved_chunks, 1):
-        # For AI context, use the raw content
-        context_parts.append(f"Source {i}:\n{chunk_row['content']}\n")
-        
+    for score, chunk_row in retrieved_chunks:
         # For user display, create enhanced source info
-        content_type = chunk_row.get('content_type', 'text')
+        # Display fields are stored with each chunk at chunking time
+        content_type, display_type, icon = chunk_display(chunk_row)
         
         source_info = {
             'title': chunk_row['title'],
@@ -70,52 +125,40 @@ def generate_response_with_context(user_prompt, retrieved_chunks, client):
             'score': score,
             'chunk': chunk_row['chunk_number'],
             'content_type': content_type,
+            'display_type': display_type,
+            'icon': icon,
             'formatted_content': format_chunk_for_display(chunk_row),
             'raw_content': chunk_row['content']  # Keep raw content for reference
         }
         
-        # Add specific handling based on content type
-        if content_type == 'table_row':
-            source_info['display_type'] = 'Table Row'
-            source_info['icon'] = '📊'
-        elif content_type == 'table':
-            source_info['display_type'] = 'Complete Table'
-            source_info['icon'] = '📋'
-        elif content_type == 'text':
-            source_info['display_type'] = 'Text Content'
-            source_info['icon'] = '📄'
-        else:
-            source_info['display_type'] = 'Content'
-            source_info['icon'] = '📝'
-            
         enhanced_source_info.append(source_info)
     
-    context = "\n".join(context_parts)
-    
-    # System prompt for RAG
-    system_prompt = """You are a helpful AI assistant specializing in nanofabrication and laboratory processes. Use the provided context to answer the user's question accurately and comprehensively. 
-
-Guidelines:
-- Base your answer primarily on the provided context
-- The context may include different types of information: text descriptions, table data, and technical specifications
-- When referencing table data, mention specific values and parameters when relevant
-- If the context doesn't contain enough information, say so
-- Include relevant technical details from the context
-- Be clear and concise
-- When referencing information, you can mention it comes from the provided sources"""
+    messages = [
+        {"role": "system", "content": RAG_SYSTEM_PROMPT},
+        *(history or []),
+        {"role": "user", "content": build_user_message(user_prompt, context, reused_sources)}
+    ]
+    stats['prompt_tokens_estimate'] = sum(count_tokens(message["content"]) for message in messages)
+    route = route or route_question(user_prompt)
+    stats['route'] = route
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {user_prompt}"}
-            ],
-            temperature=0.1,
-            max_tokens=4000
-        )
-        
-        return response.choices[0].message.content, enhanced_source_info
-        
+        response = resilient_call("chat", lambda timeout: bounded(client, timeout).chat.completions.create(
+            model=route["model"],
+            messages=messages,
+            temperature=route["temperature"],
+            max_tokens=route["max_tokens"]
+        ), **({'deadline_s': route['deadline_s']} if 'deadline_s' in route else {}))
+        answer = response.choices[0].message.content
     except Exception as e:
-        return f"Error generating response: {e}", enhanced_source_info
\ No newline at end of file
+        return f"Error generating response: {e}", enhanced_source_info
+
+    # Logging only; packing stats are missing when packed=True came without the packing stats dict
+    stats.update(usage_stats(response))
+    stats['truncated'] = getattr(response.choices[0], 'finish_reason', None) == 'length'
+    print(f"Route: {route['tier']} ({route['reason']}) -> {route['model']}, max_tokens={route['max_tokens']}")
+    if 'context_tokens' in stats:
+        print(f"Prompt: {stats['context_tokens']}/{context_budget} context tokens from {stats['sources_packed']} "
+              f"sources ({stats['sources_compressed']} compressed, {stats['sources_dropped']} dropped)")
+    print(f"Prompt: ~{stats['prompt_tokens_estimate']} prompt tokens, {stats.get('cached_tokens', 0)} served from cache")
+    return answer, enhanced_source_info
\ No newline at end of file
@@ -0,0 +1,153 @@
+import numpy as np
+from .index_utils import kmeans, assign, top_k
+
+class PQIndex:
+    """
+    Product-quantization index for the in-memory retriever, optionally IVF-PQ.
+
+    Each embedding is stored as `m` one-byte codes (m bytes instead of 6 KB of float32).
+    Queries are scored with asymmetric distance computation (full-precision query against
+    the quantized chunks), then the best `rerank` candidates are re-scored exactly against
+    the original vectors. Keep those vectors on disk with save()/load(mmap=True) so only
+    the re-ranked rows are ever paged in.
+
+    Scores are inner products, i.e. cosine similarity for the pre-normalized OpenAI embeddings.
+    """
+
+    def __init__(self, m=64, nbits=8, nlist=0, nprobe=8, rerank=50, n_iter=20, seed=0):
+        """
+        Args:
+            m: Number of sub-quantizers = code size in bytes per vector (must divide the dimension)
+            nbits: Bits per sub-quantizer code (<= 8, so codes fit in uint8)
+            nlist: Coarse IVF lists; 0 disables the coarse quantizer (plain PQ, every code is scanned)
+            nprobe: Default number of IVF lists scanned per query
+            rerank: Default number of ADC candidates re-scored with the exact vectors
+            n_iter: k-means iterations for the coarse and sub-quantizer codebooks
+            seed: RNG seed for reproducible builds
+        """
+        if not 1 <= nbits <= 8:
+            raise ValueError("nbits must be between 1 and 8")
+        self.m = m
+        self.ksub = 2 ** nbits
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.n_iter = n_iter
+        self.seed = seed
+        self.coarse = None        # (max(nlist, 1), d) coarse centroids
+        self.codebooks = None     # (m, ksub, d / m) sub-quantizer centroids
+        self.codes = None         # (N, m) uint8, grouped list by list
+        self.ids = None           # (N,) row position of every code
+        self.list_offsets = None  # (nlist + 1,) start of each list in codes / ids
+        self.vectors = None       # (N, d) original vectors for exact re-ranking, may be a memmap
+
+    def fit(self, vectors):
+        """Train the codebooks on vectors, encode them and keep them for re-ranking; returns self"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, d = vectors.shape
+        if d % self.m:
+            raise ValueError(f"Dimension {d} is not divisible by m={self.m}")
+        dsub = d // self.m
+
+        # Coarse quantizer: a single zero centroid when IVF is disabled
+        if self.nlist:
+            self.coarse = kmeans(vectors, self.nlist, self.n_iter, seed=self.seed)
+            labels = assign(vectors, self.coarse)
+        else:
+            self.coarse = np.zeros((1, d), dtype=np.float32)
+            labels = np.zeros(n, dtype=np.int64)
+        residuals = vectors - self.coarse[labels]
+
+        self.codebooks = np.stack([
+            kmeans(residuals[:, j * dsub:(j + 1) * dsub], self.ksub, self.n_iter,
+                   max_train_points=256 * self.ksub, seed=self.seed + j)
+            for j in range(self.m)
+        ])
+        # kmeans clips to the number of training points; pad so every code indexes a row
+        if self.codebooks.shape[1] < self.ksub:
+            pad = self.ksub - self.codebooks.shape[1]
+            self.codebooks = np.pad(self.codebooks, ((0, 0), (0, pad), (0, 0)))
+
+        # Store each list contiguously so a probe is a single slice
+        order = np.argsort(labels, kind='stable')
+        self.ids = order
+        self.codes = self._encode(residuals[order])
+        counts = np.bincount(labels, minlength=len(self.coarse))
+        self.list_offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.vectors = vectors
+        return self
+
+    def _encode(self, residuals):
+        dsub = residuals.shape[1] // self.m
+        codes = np.empty((len(residuals), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = assign(residuals[:, j * dsub:(j + 1) * dsub], self.codebooks[j])
+        return codes
+
+    def search(self, query_vector, k=5, nprobe=None, rerank=None):
+        """
+        Return (scores, row_positions) of the k best chunks for one query vector.
+
+        nprobe and rerank override the index defaults for this request; rerank=0 returns
+        the raw ADC scores without touching the original vectors.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, len(self.coarse))
+        rerank = self.rerank if rerank is None else rerank
+
+        # Probe the closest lists (the single list when IVF is disabled)
+        coarse_scores = self.coarse @ query
+        probed = np.argsort(-coarse_scores)[:nprobe] if self.nlist else np.array([0])
+        slices = [np.arange(self.list_offsets[l], self.list_offsets[l + 1]) for l in probed]
+        rows = np.concatenate(slices)
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        base = np.repeat(coarse_scores[probed], [len(s) for s in slices])
+
+        # ADC: one (m, ksub) lookup table per query, then a gather-and-sum per code
+        tables = np.einsum('mkd,md->mk', self.codebooks, query.reshape(self.m, -1))
+        approx = base + tables[np.arange(self.m), self.codes[rows]].sum(axis=1)
+
+        if not rerank or self.vectors is None:
+            scores, best = top_k(approx, k)
+            return scores, self.ids[rows[best]]
+
+        _, candidates = top_k(approx, max(rerank, k))
+        candidate_ids = np.sort(self.ids[rows[candidates]])  # sorted ids keep memmap reads sequential
+        exact = self.vectors[candidate_ids] @ query
+        scores, best = top_k(exact, k)
+        return scores, candidate_ids[best]
+
+    def memory_bytes(self):
+        """Bytes held in RAM by each component (a memmapped vectors file counts as zero)"""
+        in_ram = self.vectors is not None and not isinstance(self.vectors, np.memmap)
+        return {
+            'codes': self.codes.nbytes + self.ids.nbytes + self.list_offsets.nbytes,
+            'codebooks': self.codebooks.nbytes + self.coarse.nbytes,
+            'rerank_vectors': self.vectors.nbytes if in_ram else 0,
+        }
+
+    def save(self, path):
+        """Write path.npz (codes + codebooks) and path.vectors.npy (re-rank vectors)"""
+        np.savez(f"{path}.npz", coarse=self.coarse, codebooks=self.codebooks, codes=self.codes,
+                 ids=self.ids, list_offsets=self.list_offsets,
+                 params=np.array([self.m, self.ksub, self.nlist, self.nprobe, self.rerank]))
+        if self.vectors is not None:
+            np.save(f"{path}.vectors.npy", self.vectors)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load an index written by save(); with mmap=True the re-rank vectors stay on disk"""
+        data = np.load(f"{path}.npz")
+        m, ksub, nlist, nprobe, rerank = (int(v) for v in data['params'])
+        index = cls(m=m, nbits=int(np.log2(ksub)), nlist=nlist, nprobe=nprobe, rerank=rerank)
+        index.coarse = data['coarse']
+        index.codebooks = data['codebooks']
+        index.codes = data['codes']
+        index.ids = data['ids']
+        index.list_offsets = data['list_offsets']
+        try:
+            index.vectors = np.load(f"{path}.vectors.npy", mmap_mode='r' if mmap else None)
+        except FileNotFoundError:
+            index.vectors = None
+        return index
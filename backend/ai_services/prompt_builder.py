@@ -0,0 +1,130 @@
+from .bm25_index import tokenize
+
+# Tokens of retrieved context allowed per request, and the most any single source may take
+DEFAULT_CONTEXT_BUDGET = 6000
+MAX_SOURCE_TOKENS = 1500
+# Leftover budget below this is not worth a truncated source
+MIN_SOURCE_TOKENS = 80
+# Rough chars-per-token ratio for English when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    """tiktoken encoding of the chat models, or None (tiktoken is optional)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"tiktoken unavailable ({e}), estimating tokens as characters / {CHARS_PER_TOKEN}")
+    return _encoding
+
+def count_tokens(text):
+    """Number of tokens text costs in the prompt"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(str(text)) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(str(text), disallowed_special=()))
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to at most max_tokens tokens, marking the cut"""
+    text = str(text)
+    encoding = _get_encoding()
+    if encoding is None:
+        limit = max_tokens * CHARS_PER_TOKEN
+        return text if len(text) <= limit else text[:limit - 4].rstrip() + " ..."
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens - 2]).rstrip() + " ..."
+
+def compress_table(table_markdown, query, max_tokens):
+    """
+    Shrink a markdown table to its header plus the rows that mention query terms,
+    best matches first, within max_tokens; rows left out are counted in a note.
+    """
+    lines = str(table_markdown).replace(' [LINEBREAK] ', '\n').replace('[LINEBREAK]', '\n').split('\n')
+    table_lines = [line for line in lines if line.count('|') >= 2]
+    if len(table_lines) < 3:
+        return truncate_to_tokens(table_markdown, max_tokens)
+
+    # Header row plus the |---| separator when the table has one
+    header_size = 2 if set(table_lines[1].replace('|', '').strip()) <= set('-: ') else 1
+    header, rows = table_lines[:header_size], table_lines[header_size:]
+    query_terms = set(tokenize(query))
+    matches = [(len(query_terms.intersection(tokenize(row))), i) for i, row in enumerate(rows)]
+    matching = sorted((m for m in matches if m[0] > 0), key=lambda m: -m[0])
+    # Without any matching row, the first rows at least show what the table holds
+    candidates = [i for _, i in matching] or list(range(len(rows)))
+
+    used = count_tokens("\n".join(header)) + 20  # reserve room for the omission note
+    kept = []
+    for i in candidates:
+        cost = count_tokens(rows[i]) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(i)
+        used += cost
+    if not kept:
+        return truncate_to_tokens("\n".join(header + rows), max_tokens)
+
+    summary = header + [rows[i] for i in sorted(kept)]
+    omitted = len(rows) - len(kept)
+    if omitted:
+        summary.append(f"({omitted} of {len(rows)} rows omitted)")
+    return "\n".join(summary)
+
+def compress_source(chunk_row, query, max_tokens):
+    """Content of a source fitted into max_tokens (tables keep their header and query-matching rows)"""
+    if chunk_row.get('content_type') == 'table':
+        return compress_table(chunk_row['content'], query, max_tokens)
+    return truncate_to_tokens(chunk_row['content'], max_tokens)
+
+def pack_context(user_prompt, retrieved_chunks, budget=DEFAULT_CONTEXT_BUDGET,
+                 max_source_tokens=MAX_SOURCE_TOKENS, stats=None):
+    """
+    Fit retrieved sources into a token budget, in the given (relevance) order.
+
+    Sources over max_source_tokens are compressed; a source that does not fit the remaining
+    budget is compressed into it when enough is left, otherwise dropped (later, smaller
+    sources may still fit). Packed chunk_rows carry 'token_count', so packing them again
+    only adds the counts up.
+
+    Args:
+        user_prompt: The user's question, used to pick table rows worth keeping
+        retrieved_chunks: List of (score, chunk_row) tuples, best first
+        budget: Tokens available for source contents
+        max_source_tokens: Cap for a single source
+        stats: Optional dict that receives the per-request token accounting
+
+    Returns:
+        List of (score, chunk_row) tuples that fit the budget
+    """
+    packed = []
+    used = dropped = 0
+    for score, chunk_row in retrieved_chunks:
+        tokens = chunk_row.get('token_count')
+        if tokens is None:
+            tokens = count_tokens(chunk_row['content'])
+        limit = min(max_source_tokens, budget - used)
+        if tokens > limit:
+            if limit < MIN_SOURCE_TOKENS:
+                dropped += 1
+                continue
+            content = compress_source(chunk_row, user_prompt, limit)
+            chunk_row = dict(chunk_row, content=content, compressed_from=tokens)
+            tokens = count_tokens(content)
+        packed.append((score, dict(chunk_row, token_count=tokens)))
+        used += tokens
+
+    if stats is not None:
+        stats.update({
+            'context_budget': budget,
+            'context_tokens': used,
+            'sources_packed': len(packed),
+            'sources_compressed': sum(1 for _, chunk_row in packed if 'compressed_from' in chunk_row),
+            'sources_dropped': dropped
+        })
+    return packed
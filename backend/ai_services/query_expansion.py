@@ -0,0 +1,129 @@
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
+from .vector_search import embed_queries, get_embedding_matrix, format_results
+from .hybrid_search import reciprocal_rank_fusion
+from .metadata_filters import filter_positions
+from .index_utils import top_k
+
+# Time we wait for rewrites before searching with the original question alone
+DEFAULT_REWRITE_BUDGET_S = 1.2
+MAX_CACHED_REWRITES = 512
+# The user's own wording still counts most in the fused ranking
+ORIGINAL_QUERY_WEIGHT = 1.5
+
+REWRITE_PROMPT = (
+    "You help search the UCSB Nanofab wiki (cleanroom tools, recipes, SOPs). "
+    'Reply with JSON {"rewrites": [...], "hypothetical_answer": "..."}: the rewrites are '
+    "standalone search queries for the question using the lab's tool and process names, and "
+    "the hypothetical answer is a short wiki-style passage that would answer it."
+)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="query-expansion")
+_rewrite_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cache_key(query_text, n_rewrites, hyde):
+    return (" ".join(query_text.lower().split()), n_rewrites, hyde)
+
+def _remember(key, texts):
+    with _cache_lock:
+        _rewrite_cache[key] = texts
+        _rewrite_cache.move_to_end(key)
+        if len(_rewrite_cache) > MAX_CACHED_REWRITES:
+            _rewrite_cache.popitem(last=False)
+
+def _request_rewrites(query_text, client, n_rewrites, hyde, model):
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": REWRITE_PROMPT},
+            {"role": "user", "content": f"Question: {query_text}\nNumber of rewrites: {n_rewrites}"}
+        ],
+        temperature=0.3,
+        max_tokens=60 * n_rewrites + (150 if hyde else 0),
+        response_format={"type": "json_object"}
+    )
+    parsed = json.loads(response.choices[0].message.content)
+    texts = [str(text) for text in parsed.get("rewrites", [])[:n_rewrites] if str(text).strip()]
+    if hyde and str(parsed.get("hypothetical_answer", "")).strip():
+        texts.append(str(parsed["hypothetical_answer"]))
+    return texts
+
+def generate_rewrites(query_text, client, n_rewrites=3, hyde=True, model="gpt-4o-mini",
+                      budget_s=DEFAULT_REWRITE_BUDGET_S):
+    """
+    Alternative phrasings (plus a HyDE passage) for query_text, from one chat completion.
+
+    Returns [] when the model does not answer within budget_s or fails; a late answer
+    still lands in the cache, so asking the same question again gets it for free.
+    """
+    key = _cache_key(query_text, n_rewrites, hyde)
+    with _cache_lock:
+        if key in _rewrite_cache:
+            _rewrite_cache.move_to_end(key)
+            return _rewrite_cache[key]
+
+    def cache_result(done):
+        if not done.cancelled() and done.exception() is None:
+            _remember(key, done.result())
+
+    future = _executor.submit(_request_rewrites, query_text, client, n_rewrites, hyde, model)
+    future.add_done_callback(cache_result)
+    try:
+        return future.result(timeout=budget_s)
+    except FutureTimeoutError:
+        print(f"Query rewriting exceeded {budget_s:.1f}s budget, searching with the original question")
+    except Exception as e:
+        print(f"Query rewriting failed ({e}), searching with the original question")
+    return []
+
+def multi_query_search(query_text, df, client, k=5, n_rewrites=3, hyde=True, candidates=50,
+                       budget_s=DEFAULT_REWRITE_BUDGET_S, filters=None):
+    """
+    Search with the question, its rewrites and a hypothetical answer, then fuse the rankings.
+
+    All query texts are embedded in one request and scored against the chunk matrix with a
+    single matrix-matrix product; each column's top `candidates` rows are fused by RRF.
+
+    Args:
+        query_text: The user's question
+        df: Chunk DataFrame with embedding_vectors
+        client: OpenAI client for the rewrites and the embeddings
+        k: Number of results to return
+        n_rewrites: Rewrites requested from the model
+        hyde: Also search with a hypothetical answer passage
+        candidates: Rows taken from each query's ranking before fusion
+        budget_s: Latency cap for rewrite generation
+        filters: Optional metadata filters, as in vector_similarity_search
+
+    Returns:
+        Results in the vector_similarity_search format; 'score' is the cosine similarity to
+        the original question and 'fused_score' is added
+    """
+    query_texts = [query_text] + generate_rewrites(query_text, client, n_rewrites, hyde, budget_s=budget_s)
+    query_matrix = embed_queries(query_texts, client)
+    if query_matrix is None:
+        return []
+    query_matrix /= np.linalg.norm(query_matrix, axis=1, keepdims=True)
+
+    allowed = filter_positions(df, filters)
+    matrix = get_embedding_matrix(df)
+    # (rows, queries); the unfiltered case scores the cached matrix without copying it
+    scores = (matrix if allowed is None else matrix[allowed]) @ query_matrix.T
+
+    ranked_lists = []
+    for j in range(len(query_texts)):
+        best = top_k(scores[:, j], candidates)[1]
+        ranked_lists.append(best if allowed is None else allowed[best])
+    weights = [ORIGINAL_QUERY_WEIGHT] + [1.0] * (len(query_texts) - 1)
+    fused = reciprocal_rank_fusion(ranked_lists, weights)
+
+    positions = np.asarray(sorted(fused, key=fused.get, reverse=True)[:k], dtype=np.int64)
+    print(f"Multi-query search: {len(query_texts)} queries, {len(fused)} fused candidates, returning top {k}")
+    results = format_results(df, matrix[positions] @ query_matrix[0], positions)
+    for result in results:
+        result['fused_score'] = fused[result['row_position']]
+    return results
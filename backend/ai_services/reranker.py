@@ -0,0 +1,113 @@
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .resilience import bounded
+
+# Candidates scored by the re-ranker and the time it may take before we give up on it.
+# Scorers may override both: one chat completion grading 50 passages needs far more than 1.5s.
+DEFAULT_CANDIDATES = 50
+DEFAULT_BUDGET_S = 1.5
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="reranker")
+
+class CrossEncoderScorer:
+    """Local CPU cross-encoder (sentence-transformers); the model is loaded on first use"""
+
+    candidates = DEFAULT_CANDIDATES
+
+    def __init__(self, model_name="cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size=32, max_chars=2000):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        self._model = None
+
+    def score(self, query, texts):
+        if self._model is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError as e:
+                raise RuntimeError("CrossEncoderScorer needs `pip install sentence-transformers`") from e
+            self._model = CrossEncoder(self.model_name, device="cpu")
+        pairs = [(query, str(text)[:self.max_chars]) for text in texts]
+        return np.asarray(self._model.predict(pairs, batch_size=self.batch_size), dtype=np.float32)
+
+class LLMScorer:
+    """
+    Grades every candidate 0-10 in one batched chat completion.
+    Any object exposing chat.completions.create works as client, so tests can pass a stub.
+    The completion itself is bounded by budget_s with no SDK retries, so a slow call is
+    cancelled instead of holding a re-ranker worker after rerank has given up on it.
+    """
+
+    candidates = 20
+
+    SYSTEM_PROMPT = (
+        "You grade how well passages answer a question about nanofabrication lab work. "
+        'Reply with JSON {"scores": [...]}, one integer from 0 (irrelevant) to 10 (answers it fully) per passage, in order.'
+    )
+
+    def __init__(self, client, model="gpt-4o-mini", max_chars=600, budget_s=6.0):
+        self.client = client
+        self.model = model
+        self.max_chars = max_chars
+        self.budget_s = budget_s
+
+    def score(self, query, texts):
+        passages = "\n\n".join(f"[{i}] {str(text)[:self.max_chars]}" for i, text in enumerate(texts))
+        response = bounded(self.client, self.budget_s).chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": f"Question: {query}\n\nPassages:\n{passages}"}
+            ],
+            temperature=0,
+            max_tokens=8 * len(texts) + 20,
+            response_format={"type": "json_object"}
+        )
+        scores = json.loads(response.choices[0].message.content).get("scores", [])
+        # Missing or malformed grades count as 0 rather than failing the whole batch
+        graded = np.zeros(len(texts), dtype=np.float32)
+        for i, value in enumerate(scores[:len(texts)]):
+            try:
+                graded[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return graded
+
+def rerank(query, results, scorer, top_n=5, budget_s=None):
+    """
+    Re-order first-stage results with a scorer, within a latency budget.
+
+    Args:
+        query: The user's question
+        results: Candidates from vector_similarity_search / hybrid_similarity_search, best first;
+            only the scorer's first `candidates` (default DEFAULT_CANDIDATES) are graded
+        scorer: Object with score(query, texts) -> array of relevance scores (higher is better)
+        top_n: Number of results to keep
+        budget_s: Seconds to wait for the scorer, defaulting to the scorer's own budget_s or
+            DEFAULT_BUDGET_S; on timeout or error the first-stage order is kept
+
+    Returns:
+        top_n results; re-ranked ones carry a 'rerank_score'
+    """
+    if len(results) <= 1:
+        return results[:top_n]
+    if budget_s is None:
+        budget_s = getattr(scorer, 'budget_s', DEFAULT_BUDGET_S)
+    results = results[:getattr(scorer, 'candidates', DEFAULT_CANDIDATES)]
+
+    future = _executor.submit(scorer.score, query, [r.get('content', '') for r in results])
+    try:
+        scores = np.asarray(future.result(timeout=budget_s), dtype=np.float32)
+    except FutureTimeoutError:
+        # The scorer keeps running in the background; its result is simply discarded
+        print(f"Re-ranking exceeded {budget_s:.1f}s budget, keeping first-stage order")
+        return results[:top_n]
+    except Exception as e:
+        print(f"Re-ranking failed ({e}), keeping first-stage order")
+        return results[:top_n]
+
+    # Stable sort keeps the first-stage order between equally graded candidates
+    order = np.argsort(-scores, kind='stable')[:top_n]
+    print(f"Re-ranked {len(results)} candidates, returning top {top_n}")
+    return [dict(results[i], rerank_score=float(scores[i])) for i in order]
@@ -0,0 +1,162 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Per call type: total deadline, attempts, backoff bounds, and when to send a hedged duplicate
+POLICIES = {
+    # Query embedding sits in front of every search; hedge slow requests and give up quickly
+    "embed_query": {"deadline_s": 3.0, "attempts": 3, "base_delay_s": 0.1, "max_delay_s": 0.5, "hedge_after_s": 0.4},
+    "chat": {"deadline_s": 45.0, "attempts": 2, "base_delay_s": 0.5, "max_delay_s": 2.0, "hedge_after_s": None},
+    # Offline ingestion: patient, but still bounded
+    "embed_document": {"deadline_s": 60.0, "attempts": 5, "base_delay_s": 1.0, "max_delay_s": 10.0, "hedge_after_s": None},
+    "vision": {"deadline_s": 120.0, "attempts": 5, "base_delay_s": 1.0, "max_delay_s": 15.0, "hedge_after_s": None},
+}
+# Status codes worth another attempt; anything else (400, 401, 404 ...) fails immediately
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="resilience")
+
+class DeadlineExceeded(TimeoutError):
+    """The call did not succeed within its total deadline"""
+
+class CircuitOpenError(RuntimeError):
+    """The circuit breaker for this call type is open; the call was not attempted"""
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for `reset_after_s`;
+    then lets a single probe through (half-open) and closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold=5, reset_after_s=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_after_s else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+_breakers = {name: CircuitBreaker() for name in POLICIES}
+
+def is_retryable(error):
+    # Imported here so the search modules don't load the OpenAI SDK until a call fails
+    from openai import APIConnectionError, APIStatusError
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS
+    return isinstance(error, (APIConnectionError, TimeoutError, ConnectionError))
+
+def bounded(client, timeout):
+    """
+    Client for a single attempt: the attempt's own timeout and no SDK-level retries, so the
+    policy here is the only retry loop. Stub clients without with_options are used as-is.
+    """
+    with_options = getattr(client, "with_options", None)
+    return with_options(max_retries=0, timeout=timeout) if with_options else client
+
+def hedged(fn, timeout, hedge_after_s):
+    """
+    Run fn(timeout); if it has not finished after hedge_after_s, start one duplicate and
+    return whichever succeeds first. Fails only when both copies fail.
+    """
+    started = time.monotonic()
+    first = _executor.submit(fn, timeout)
+    done, _ = wait([first], timeout=hedge_after_s)
+    if done:
+        return first.result()
+    remaining = timeout - (time.monotonic() - started)
+    if remaining <= 0:
+        return first.result(timeout=0)
+    pending = {first, _executor.submit(fn, remaining)}
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=timeout - (time.monotonic() - started), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error or DeadlineExceeded(f"No response within {timeout:.2f}s")
+
+def resilient_call(name, fn, **overrides):
+    """
+    Call fn(timeout) under the named policy: bounded total deadline, exponential backoff
+    with full jitter between retryable failures, a circuit breaker shared by all calls of
+    that type, and an optional hedged duplicate for slow attempts.
+
+    Args:
+        name: Key of POLICIES, e.g. "embed_query"
+        fn: Makes one attempt; must respect the timeout (seconds) it is given, e.g.
+            lambda timeout: bounded(client, timeout).embeddings.create(...)
+        overrides: Per-call policy values, e.g. deadline_s=10.0
+
+    Raises:
+        CircuitOpenError, DeadlineExceeded, or the last non-retryable error
+    """
+    policy = dict(POLICIES[name], **overrides)
+    breaker = _breakers.setdefault(name, CircuitBreaker())
+    if not breaker.allow():
+        raise CircuitOpenError(f"{name}: circuit open after {breaker.failures} consecutive failures")
+
+    deadline = time.monotonic() + policy["deadline_s"]
+    last_error = None
+    for attempt in range(policy["attempts"]):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            if policy["hedge_after_s"] is not None:
+                result = hedged(fn, remaining, policy["hedge_after_s"])
+            else:
+                result = fn(remaining)
+            breaker.record_success()
+            return result
+        except Exception as e:
+            last_error = e
+            # Request errors (400, 401 ...) mean the service answered; they are not outages
+            if not is_retryable(e):
+                breaker.record_success()
+                raise
+        if attempt + 1 == policy["attempts"]:
+            break
+        # Full jitter keeps many clients from retrying in lockstep
+        backoff = random.uniform(0, min(policy["max_delay_s"], policy["base_delay_s"] * 2 ** attempt))
+        if time.monotonic() + backoff >= deadline:
+            break
+        print(f"{name}: attempt {attempt + 1} failed ({last_error}), retrying in {backoff:.2f}s")
+        time.sleep(backoff)
+
+    breaker.record_failure()
+    raise DeadlineExceeded(
+        f"{name}: no success within {policy['deadline_s']:.1f}s ({policy['attempts']} attempts), last error: {last_error}"
+    )
@@ -0,0 +1,34 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Spans kept per process; later ones push out the oldest
+MAX_SPANS = 200
+# (name, seconds) of finished spans in this process, oldest first
+SPANS = deque(maxlen=MAX_SPANS)
+# Names already recorded, for spans that only time the first run
+_recorded = set()
+
+@contextmanager
+def span(name, once=False):
+    """
+    Time a cold-start step and log it, e.g.
+
+        with span("load embeddings", once=True):
+            df = load_data()
+
+    With once=True only the first run of the step is timed, so code that Streamlit re-runs
+    on every interaction logs its cold start once instead of on every message.
+    experiments/startup_profile.py reports these next to the per-module import times.
+    """
+    if once and name in _recorded:
+        yield
+        return
+    _recorded.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPANS.append((name, elapsed))
+        print(f"[startup] {name}: {elapsed * 1000:.0f} ms")
@@ -0,0 +1,225 @@
+import os
+import re
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Written by the chunking step: one Parquet file per wiki table plus a JSON catalog
+DEFAULT_STORE_DIR = "csv_dataframes/tables"
+CATALOG_FILE = "catalog.json"
+
+# Number a cell starts with: "40", "~1,200 nm", "1.5e3", "-20 C", "100-120 nm/min" (-> 100);
+# "CHF3" or "Cl2" are names, not numbers
+NUMBER_PATTERN = re.compile(r"\s*[~<>≈]?\s*([-+]?(?:\d[\d,]*\.?\d*(?:[eE][-+]?\d+)?|\.\d+))")
+# Share of non-empty cells that must parse for a column to be stored as numeric
+NUMERIC_COLUMN_SHARE = 0.8
+RAW_SUFFIX = "__raw"
+COMPARISONS = {
+    ">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+    "==": np.equal, "!=": np.not_equal
+}
+
+def normalize_header(header):
+    """snake_case column name: "Etch Rate (nm/min)" -> "etch_rate_nm_min" """
+    name = re.sub(r"[^0-9a-z]+", "_", str(header).lower()).strip("_")
+    return name or "column"
+
+def parse_number(cell):
+    """Leading numeric value of a cell, or NaN"""
+    match = NUMBER_PATTERN.match(str(cell))
+    if not match:
+        return np.nan
+    try:
+        return float(match.group(1).replace(",", ""))
+    except ValueError:
+        return np.nan
+
+def typed_frame(headers, rows):
+    """
+    Columnar, typed DataFrame for one parsed table.
+
+    Headers are normalized (duplicates get a numeric suffix). Columns whose cells are mostly
+    numbers become float64 (unparseable cells -> NaN) and keep the original text in
+    '<column>__raw'; all other columns are pandas strings.
+
+    Returns:
+        (frame, {normalized name: original header})
+    """
+    columns, names = {}, {}
+    for header in headers:
+        name = normalize_header(header)
+        suffix = 2
+        while name in names:
+            name = f"{normalize_header(header)}_{suffix}"
+            suffix += 1
+        names[name] = header
+        cells = pd.Series([row.get(header, "") for row in rows], dtype="string").str.strip()
+        present = cells.fillna("") != ""
+        numbers = pd.to_numeric(cells.map(parse_number, na_action="ignore"), errors="coerce")
+        if present.any() and numbers[present].notna().mean() >= NUMERIC_COLUMN_SHARE:
+            columns[name] = numbers.astype("float64")
+            columns[name + RAW_SUFFIX] = cells
+        else:
+            columns[name] = cells
+    return pd.DataFrame(columns), names
+
+def table_id(url, page_name, table_number):
+    """Store key of a table: pages with the same title still differ by URL"""
+    digest = hashlib.sha1(str(url).encode("utf-8")).hexdigest()[:8]
+    return f"{normalize_header(page_name)}__{digest}__{table_number}"
+
+class TableStore:
+    """
+    Parsed wiki tables kept as typed columns, one Parquet file per table.
+
+    Queries run as vectorized scans over every table that has a matching column, so
+    "which recipes have a rate above 100 nm/min" is store.filter("rate", ">", 100).
+    Tables are read lazily on first use and kept in memory.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_DIR, catalog=None):
+        self.path = path
+        self.catalog = catalog or {}  # table id -> url, title, columns {name: header}, numeric, rows
+        self._frames = {}
+
+    @classmethod
+    def load(cls, path=DEFAULT_STORE_DIR):
+        with open(os.path.join(path, CATALOG_FILE), encoding="utf-8") as f:
+            return cls(path, json.load(f))
+
+    def add_table(self, url, title, page_name, table_number, headers, rows):
+        """Type a table from chunking.parse_table_to_rows and keep it until save()"""
+        frame, names = typed_frame(headers, rows)
+        key = table_id(url, page_name, table_number)
+        self._frames[key] = frame
+        self.catalog[key] = {
+            "url": url,
+            "title": title,
+            "columns": names,
+            "numeric": [name for name in names if frame[name].dtype == "float64"],
+            "rows": len(frame)
+        }
+        return key
+
+    def save(self, path=None):
+        """Write every table to <path>/<table id>.parquet and the catalog next to them"""
+        self.path = path or self.path
+        os.makedirs(self.path, exist_ok=True)
+        for key, frame in self._frames.items():
+            frame.to_parquet(os.path.join(self.path, f"{key}.parquet"), index=False)
+        with open(os.path.join(self.path, CATALOG_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.catalog, f, ensure_ascii=False, indent=1)
+        print(f"Saved {len(self.catalog)} typed tables to {self.path}")
+
+    def table(self, key):
+        """Typed DataFrame of one table"""
+        if key not in self._frames:
+            self._frames[key] = pd.read_parquet(os.path.join(self.path, f"{key}.parquet"))
+        return self._frames[key]
+
+    def find_columns(self, term, numeric=None, tables=None):
+        """
+        (table id, column) pairs whose normalized name contains every word of term.
+
+        Args:
+            term: Column words, e.g. "etch rate" or "rate"
+            numeric: True / False to keep only numeric / text columns
+            tables: Optional table ids (or a title substring) to search within
+        """
+        words = [w for w in normalize_header(term).split("_") if w]
+        matches = []
+        for key in self._table_ids(tables):
+            info = self.catalog[key]
+            for name in info["columns"]:
+                if numeric is not None and (name in info["numeric"]) != numeric:
+                    continue
+                if all(word in name.split("_") for word in words):
+                    matches.append((key, name))
+        return matches
+
+    def _table_ids(self, tables):
+        if tables is None:
+            return list(self.catalog)
+        if isinstance(tables, str):
+            needle = tables.lower()
+            return [key for key, info in self.catalog.items() if needle in str(info["title"]).lower()]
+        return [key for key in tables if key in self.catalog]
+
+    def _collect(self, hits):
+        """Concatenate matching rows of several tables, tagged with where they came from"""
+        parts = []
+        for key, column, mask in hits:
+            frame = self.table(key)[mask]
+            if frame.empty:
+                continue
+            info = self.catalog[key]
+            parts.append(frame.assign(table_id=key, table_title=info["title"], url=info["url"],
+                                      matched_column=column))
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    def filter(self, column, op, value, tables=None):
+        """
+        Rows where a column matching `column` compares to value, across all tables.
+
+        Args:
+            column: Column words, matched as in find_columns
+            op: One of >, >=, <, <=, ==, != (numeric columns) or 'contains' (text columns)
+            value: Number, or text for 'contains'
+            tables: Optional table ids or title substring
+        """
+        if op == "contains":
+            hits = [(key, name, self.table(key)[name].str.contains(str(value), case=False, regex=False)
+                     .fillna(False).to_numpy(dtype=bool))
+                    for key, name in self.find_columns(column, numeric=False, tables=tables)]
+        else:
+            compare = COMPARISONS[op]
+            hits = [(key, name, compare(self.table(key)[name].to_numpy(), float(value)))
+                    for key, name in self.find_columns(column, numeric=True, tables=tables)]
+        return self._collect(hits)
+
+    def range(self, column, low=None, high=None, tables=None):
+        """Rows whose numeric `column` lies in [low, high] (either bound may be None)"""
+        hits = []
+        for key, name in self.find_columns(column, numeric=True, tables=tables):
+            values = self.table(key)[name].to_numpy()
+            mask = ~np.isnan(values)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+            hits.append((key, name, mask))
+        return self._collect(hits)
+
+    def lookup(self, value, column=None, tables=None):
+        """Rows where a text cell (in `column`, or any text column) equals value, ignoring case"""
+        needle = str(value).strip().lower()
+        hits = []
+        for key in self._table_ids(tables):
+            info = self.catalog[key]
+            names = [n for _, n in self.find_columns(column, numeric=False, tables=[key])] if column \
+                else [n for n in info["columns"] if n not in info["numeric"]]
+            frame = self.table(key)
+            matched, mask = None, np.zeros(len(frame), dtype=bool)
+            for name in names:
+                equal = (frame[name].str.lower() == needle).fillna(False).to_numpy(dtype=bool)
+                if equal.any():
+                    matched = matched or name
+                    mask |= equal
+            if matched:
+                hits.append((key, matched, mask))
+        return self._collect(hits)
+
+def build_table_store(parsed_tables, path=DEFAULT_STORE_DIR):
+    """
+    Build and save the store at chunking time.
+
+    Args:
+        parsed_tables: Iterable of dicts with url, title, page_name, table_number, headers, rows
+    """
+    store = TableStore(path)
+    for table in parsed_tables:
+        store.add_table(table["url"], table["title"], table["page_name"], table["table_number"],
+                        table["headers"], table["rows"])
+    store.save()
+    return store
@@ -1,57 +1,110 @@
 import pandas as pd
 import numpy as np
 import json
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+from .index_utils import top_k, cached_per_frame, store_per_frame, frame_value
+from .pq_index import PQIndex
+from .metadata_filters import filter_positions
+from .content_types import add_content_columns, chunk_display
+from .resilience import resilient_call, bounded
 
 def cosine_similarity_openai(query_vector, chunk_vectors):
     """Calculate cosine similarity - OpenAI embeddings are pre-normalized"""
     return np.dot(chunk_vectors, query_vector)
 
-def vector_similarity_search(query_text, df, client, k=5):
-    """Find most similar chunks to the query with enhanced content type info"""
+def get_embedding_matrix(df):
+    """
+    Stack df['embedding_vectors'] into a contiguous, L2-normalized float32 matrix.
+    Built once per DataFrame and cached, so queries are a single matrix-vector product.
+    """
+    return cached_per_frame(df, 'embedding_matrix', _build_embedding_matrix)
+
+def _build_embedding_matrix(df):
+    matrix = np.asarray(df['embedding_vectors'].tolist(), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms > 0, norms, 1.0)
+    return matrix
+
+def use_pq_index(df, path, **pq_kwargs):
+    """
+    Opt-in low-memory mode: serve df from a PQIndex instead of the float32 matrix.
+
+    Loads path.npz (or builds and saves it from df on first use), then keeps only the uint8
+    codes in RAM: get_embedding_matrix(df) becomes the memmapped path.vectors.npy, used for
+    re-ranking and by the stages that read single rows, and df's embedding_vectors lists are
+    dropped. Unfiltered searches over df then go through the index by default.
+
+    Args:
+        df: Chunk DataFrame from load_chunked_data_from_csv; modified in place
+        path: Index path prefix, as in PQIndex.save
+        pq_kwargs: PQIndex options used when the index has to be (re)built
+
+    Returns:
+        The loaded PQIndex
+    """
+    index = PQIndex.load(path, mmap=True) if os.path.exists(f"{path}.npz") else None
+    if index is None or index.vectors is None or len(index.vectors) != len(df):
+        print(f"Building PQ index for {len(df)} chunks at {path}...")
+        PQIndex(**pq_kwargs).fit(get_embedding_matrix(df)).save(path)
+        index = PQIndex.load(path, mmap=True)
+    store_per_frame(df, 'embedding_matrix', index.vectors)
+    store_per_frame(df, 'pq_index', index)
+    df.drop(columns=['embedding_vectors', 'vectors'], errors='ignore', inplace=True)
+    memory = index.memory_bytes()
+    print(f"PQ index loaded: {(memory['codes'] + memory['codebooks']) / 2**20:.1f} MB in RAM, "
+          f"re-rank vectors memmapped from {path}.vectors.npy")
+    return index
+
+def attached_index(df):
+    """The index attached to df by use_pq_index, or None"""
+    return frame_value(df, 'pq_index')
+
+def vector_similarity_search(query_text, df, client, k=5, index=None, search_params=None, filters=None,
+                             query_embedding=None):
+    """
+    Find most similar chunks to the query with enhanced content type info
+
+    index: Optional approximate index (pq_index.PQIndex, ivf_index.IVFIndex) built over
+           get_embedding_matrix(df) with row positions as ids; replaces the exact scan.
+           Defaults to the index attached by use_pq_index, if any
+    search_params: Per-request index options, e.g. {'nprobe': 16} or {'rerank': 100}
+    filters: Optional metadata filters, e.g. {'content_type': 'image'} or
+             {'content_type': ['table', 'table_row'], 'title': 'SOP'}; only the matching
+             rows are scored (exactly, the index is not used for filtered queries)
+    query_embedding: Embedding of query_text when the caller already has it (skips the API call)
+    """
     
     # Embed the query
-    query_embedding = embed_query(query_text, client)
+    if query_embedding is None:
+        query_embedding = embed_query(query_text, client)
     if query_embedding is None:
         return []
+    query_vector = np.asarray(query_embedding, dtype=np.float32)
     
-    # Calculate similarities with all chunks
-    similarities = []
-    for idx, row in df.iterrows():
-        chunk_embedding = row['embedding_vectors']
-        if chunk_embedding:
-            similarity = cosine_similarity_openai(query_embedding, chunk_embedding)
-            
-            # Create enhanced row data with content type information
-            enhanced_row = row.to_dict()
-            
-            # Ensure content_type exists
-            if 'content_type' not in enhanced_row or pd.isna(enhanced_row['content_type']):
-                # Try to infer content type from other fields
-                if 'table' in str(enhanced_row.get('title', '')).lower():
-                    enhanced_row['content_type'] = 'table'
-                elif any(keyword in str(enhanced_row.get('content', '')) for keyword in ['{', '}', ':', '"']):
-                    # Looks like JSON - probably a table row
-                    enhanced_row['content_type'] = 'table_row'
-                else:
-                    enhanced_row['content_type'] = 'text'
-            
-            similarities.append((similarity, enhanced_row))
-    
-    # Sort by similarity (highest first) and return top k
-    similarities.sort(key=lambda x: x[0], reverse=True)
-    
-    print(f"Found {len(similarities)} chunks, returning top {k}")
+    # Score all chunks with one matrix-vector product, or ask the index for candidates
+    index = index if index is not None else attached_index(df)
+    allowed = filter_positions(df, filters)
+    if allowed is not None:
+        scores, best = top_k(cosine_similarity_openai(query_vector, get_embedding_matrix(df)[allowed]), k)
+        positions = allowed[best]
+    elif index is not None:
+        scores, positions = index.search(query_vector, k, **(search_params or {}))
+    else:
+        scores, positions = top_k(cosine_similarity_openai(query_vector, get_embedding_matrix(df)), k)
     
+    searched = len(df) if allowed is None else len(allowed)
+    print(f"Found {searched} chunks, returning top {k}")
+    return format_results(df, scores, positions)
+
+def format_results(df, scores, positions):
+    """Turn (score, row position) pairs into the result dicts expected by the frontend"""
     # FIXED: Convert to the format expected by frontend
     results = []
-    for i, (score, chunk) in enumerate(similarities[:k], 1):
-        content_type = chunk.get('content_type', 'unknown')
+    for i, (score, position) in enumerate(zip(scores, positions), 1):
+        chunk = df.iloc[position].to_dict()
+        
+        # content_type, display_type and icon were stored at chunking time (see content_types)
+        content_type, display_type, icon = chunk_display(chunk)
         print(f"  {i}. Score: {score:.3f} | Type: {content_type} | {chunk['title'][:50]}...")
         
         # Format result for frontend
@@ -61,25 +114,41 @@ def vector_similarity_search(query_text, df, client, k=5):
             'chunk': chunk.get('chunk_number', i),
             'content': chunk.get('content', ''),  # ← KEY FIX: Include actual content
             'content_type': content_type,
+            'display_type': display_type,
+            'icon': icon,
             'score': float(score),
-            'metadata': chunk.get('metadata', {})
+            'metadata': chunk.get('metadata', {}),
+            'row_position': int(position)  # position in df, for post-processing stages
         }
         results.append(result)
     
     return results
 
 def embed_query(query_text, client):
-    """Generate embedding for user query"""
+    """Generate embedding for user query (deadline, retries and hedging per resilience.POLICIES)"""
     try:
-        response = client.embeddings.create(
+        response = resilient_call("embed_query", lambda timeout: bounded(client, timeout).embeddings.create(
             input=query_text,
             model="text-embedding-3-small"
-        )
+        ))
         return response.data[0].embedding
     except Exception as e:
         print(f"Error generating query embedding: {e}")
         return None
 
+def embed_queries(query_texts, client):
+    """Embed several query texts in one request; returns an (n, d) float32 array or None"""
+    try:
+        response = resilient_call("embed_query", lambda timeout: bounded(client, timeout).embeddings.create(
+            input=list(query_texts),
+            model="text-embedding-3-small"
+        ))
+        ordered = sorted(response.data, key=lambda item: item.index)
+        return np.asarray([item.embedding for item in ordered], dtype=np.float32)
+    except Exception as e:
+        print(f"Error generating query embeddings: {e}")
+        return None
+
 def load_chunked_data_from_csv(csv_path="csv_dataframes/embeddings/chunked_pages_with_embeddings.csv"):
     """Load chunked data with embeddings from CSV and ensure content_type is available"""
     print(f"Loading chunked data from {csv_path}...")
@@ -94,22 +163,8 @@ def load_chunked_data_from_csv(csv_path="csv_dataframes/embeddings/chunked_pages
     # Filter out rows without embeddings
     df_with_embeddings = df[df['embedding_vectors'].notna()].copy()
     
-    # Ensure content_type column exists
-    if 'content_type' not in df_with_embeddings.columns:
-        print("Adding content_type column...")
-        df_with_embeddings['content_type'] = 'text'  # Default to text
-        
-        # Try to infer content types
-        for idx, row in df_with_embeddings.iterrows():
-            title = str(row.get('title', '')).lower()
-            content = str(row.get('content', ''))
-            
-            if 'table' in title and 'row' in title:
-                df_with_embeddings.at[idx, 'content_type'] = 'table_row'
-            elif 'table' in title:
-                df_with_embeddings.at[idx, 'content_type'] = 'table'
-            elif content.startswith('{') and content.endswith('}'):
-                df_with_embeddings.at[idx, 'content_type'] = 'table_row'
+    # Categorical content_type with its display fields, as written by the chunking step
+    add_content_columns(df_with_embeddings)
     
     print(f"Loaded {len(df_with_embeddings)} chunks with embeddings")
     
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .startup_timing import span
+
+# Dummy search run once the data is loaded; its results are discarded
+WARMUP_QUERY = "What equipment is available for lithography?"
+
+# Set once warm-up has finished (successfully or not); /ready also checks status["state"]
+ready = threading.Event()
+# 'idle' -> 'warming' -> 'ready' | 'failed', with seconds per step and the error if any
+status = {"state": "idle", "steps": {}, "error": None}
+
+# Seconds after a failed warm-up before start_warm_up tries again
+RETRY_AFTER_S = 30.0
+
+_lock = threading.Lock()
+_thread = None
+_server = None
+_failed_at = None
+
+@contextmanager
+def _step(name):
+    start = time.perf_counter()
+    with span(f"warm-up: {name}"):
+        yield
+    status["steps"][name] = round(time.perf_counter() - start, 3)
+
+def warm_up(load_resources, query=WARMUP_QUERY):
+    """
+    Pay every first-query cost up front, then set `ready`.
+
+    Imports the search modules, loads the data, builds and touches the cached embedding
+    matrix, filter index and neighbour map, creates the shared OpenAI client and runs one
+    search, which opens its pooled TLS connection.
+
+    Args:
+        load_resources: Returns {'df': ..., 'bm25': ..., ...}; run here so the (cached)
+            loaders do their work off the request path
+        query: Question for the dummy search
+    """
+    global _failed_at
+    status.update(state="warming", steps={}, error=None)
+    try:
+        with _step("import search modules"):
+            import numpy as np
+            from .vector_search import vector_similarity_search, get_embedding_matrix
+            from .hybrid_search import hybrid_similarity_search
+            from .metadata_filters import get_filter_index
+            from .context_expansion import get_neighbour_map
+            from .prompt_builder import count_tokens
+            from .openai_client import get_client
+        with _step("load data"):
+            resources = load_resources()
+        df, bm25 = resources.get('df'), resources.get('bm25')
+        if df is None:
+            raise RuntimeError("knowledge base could not be loaded")
+        with _step("touch index"):
+            # Summing reads every page, so the first query doesn't fault them in;
+            # a memmapped PQ re-rank file is left on disk on purpose
+            matrix = get_embedding_matrix(df)
+            if not isinstance(matrix, np.memmap):
+                float(matrix.sum())
+            get_filter_index(df)
+            get_neighbour_map(df)
+            if bm25 is not None:
+                float(bm25.weights.sum())
+            count_tokens(query)
+        with _step("create client"):
+            client = get_client()
+        with _step("dummy search"):
+            if bm25 is not None:
+                hybrid_similarity_search(query, df, client, bm25, k=5)
+            else:
+                vector_similarity_search(query, df, client, k=5)
+        status["state"] = "ready"
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        status["state"] = "failed"
+        status["error"] = str(e)
+        _failed_at = time.monotonic()
+    finally:
+        ready.set()
+
+def start_warm_up(load_resources, readiness_port=None):
+    """
+    Start warm_up in a background thread, once per process; later calls are no-ops, except
+    that a failed warm-up is started again once RETRY_AFTER_S have passed (e.g. the data
+    files appeared after the process started).
+
+    Args:
+        load_resources: See warm_up
+        readiness_port: Also serve the readiness endpoint on this port (see serve_readiness)
+
+    Returns:
+        The `ready` event
+    """
+    global _thread
+    with _lock:
+        retry = status["state"] == "failed" and _failed_at is not None and \
+            time.monotonic() - _failed_at >= RETRY_AFTER_S and not _thread.is_alive()
+        if _thread is None or retry:
+            if retry:
+                print("Retrying warm-up after a failure")
+                ready.clear()
+            status["state"] = "warming"
+            _thread = threading.Thread(target=warm_up, args=(load_resources,), name="warm-up", daemon=True)
+            _thread.start()
+        if readiness_port:
+            serve_readiness(int(readiness_port))
+    return ready
+
+def wait_until_ready(timeout=None):
+    """Block until warm-up has finished or timeout seconds pass; True if it finished"""
+    return ready.wait(timeout)
+
+class ReadinessHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/ready"):
+            code = 200 if ready.is_set() and status["state"] == "ready" else 503
+        elif self.path.startswith("/health"):
+            code = 200
+        else:
+            code = 404
+        body = json.dumps(status).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve_readiness(port):
+    """
+    Serve GET /ready (200 once warm-up has succeeded, 503 while warming or after it failed;
+    the body carries `status`) and GET /health (always 200) on port, in a daemon thread.
+    """
+    global _server
+    if _server is not None:
+        return _server
+    try:
+        _server = ThreadingHTTPServer(("0.0.0.0", port), ReadinessHandler)
+    except OSError as e:
+        print(f"Readiness endpoint not started on port {port}: {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="readiness", daemon=True).start()
+    print(f"Readiness endpoint on http://0.0.0.0:{port}/ready")
+    return _server
@@ -3,6 +3,12 @@ import pandas as pd
 import json
 import re
 import os
+try:
+    from ai_services.table_store import build_table_store
+    from ai_services.content_types import add_content_columns
+except ImportError:  # run as python -m backend.chunking.chunking from the project root
+    from backend.ai_services.table_store import build_table_store
+    from backend.ai_services.content_types import add_content_columns
 
 # Initialize text splitter for regular text content
 text_splitter = CharacterTextSplitter(
@@ -179,6 +185,8 @@ def create_row_chunks(rows, table_metadata):
 
 # List to store all chunk data (text, tables, and images)
 all_chunks = []
+# Parsed tables, kept typed for structured queries (ai_services.table_store)
+parsed_tables = []
 
 print("=== Processing Text Content ===")
 # Read the text CSV file from raw folder
@@ -267,6 +275,14 @@ try:
                 row_chunks = create_row_chunks(rows, table_metadata)
                 all_chunks.extend(row_chunks)
                 print(f"  Created {len(row_chunks)} individual row chunks")
+                parsed_tables.append({
+                    'url': url,
+                    'title': title,
+                    'page_name': page_name,
+                    'table_number': table_number,
+                    'headers': headers,
+                    'rows': rows
+                })
             else:
                 print(f"  No parseable rows found in table")
                 
@@ -278,6 +294,13 @@ except FileNotFoundError:
 except Exception as e:
     print(f"Error processing tables: {e}")
 
+# APPROACH 3: Typed columnar copy of every parsed table for filter / lookup / range queries
+if parsed_tables:
+    try:
+        build_table_store(parsed_tables)
+    except Exception as e:
+        print(f"Error saving table store: {e}")
+
 print("\n=== Processing Images ===")
 # Read the images CSV file from raw folder
 print("Loading images CSV...")
@@ -311,6 +334,9 @@ except Exception as e:
 print("\n=== Combining and Saving ===")
 print("Creating DataFrame...")
 chunks_df = pd.DataFrame(all_chunks)
+# content_type, display_type and icon are fixed here, once, for every later stage
+if not chunks_df.empty:
+    add_content_columns(chunks_df)
 
 # Count different types of chunks
 text_chunks = len(chunks_df[chunks_df['content_type'] == 'text']) if 'content_type' in chunks_df.columns else 0
@@ -5,9 +5,13 @@ import httpx
 import csv
 import pandas as pd
 from urllib.parse import urljoin, urlparse, urlunparse
-from dotenv import load_dotenv
-from openai import OpenAI
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
+try:
+    from ai_services.resilience import resilient_call, bounded
+    from ai_services.openai_client import get_client
+except ImportError:  # run as python -m backend.extraction.wiki_images from the project root
+    from backend.ai_services.resilience import resilient_call, bounded
+    from backend.ai_services.openai_client import get_client
 
 # Import the multi-page scraper to get page text
 try:
@@ -44,12 +48,6 @@ def load_wiki_urls_from_csv():
         print(f"❌ Error reading CSV: {e}")
         return []
 
-# Initialize OpenAI client
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-MULTI_LINKS = load_wiki_urls_from_csv()
-
 MODEL_VISION = "gpt-4o-mini"
 
 # Save to csv_dataframes/raw/ folder
@@ -126,7 +124,7 @@ def summarize_image_with_context(data_url: str, context_text: str, alt=None, cap
         prompt += f"\n\nContext:\n{context}"
     
     try:
-        resp = client.chat.completions.create(
+        resp = resilient_call("vision", lambda timeout: bounded(get_client(), timeout).chat.completions.create(
             model=MODEL_VISION,
             messages=[{
                 "role": "user",
@@ -135,7 +133,7 @@ def summarize_image_with_context(data_url: str, context_text: str, alt=None, cap
                     {"type": "image_url", "image_url": {"url": data_url}}
                 ]
             }]
-        )
+        ))
         return resp.choices[0].message.content.strip()
     except Exception as e:
         return f"[error] OpenAI API call failed: {e}"
@@ -145,7 +143,7 @@ async def main():
     print("🔍 Starting UCSB Wiki Image Extraction...")
     
     # Get pages to process from CSV
-    pages = MULTI_LINKS
+    pages = load_wiki_urls_from_csv()
     if not pages:
         print("❌ No pages to process!")
         print("🔧 Please run wiki_all_pages_links.py first")
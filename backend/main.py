@@ -367,7 +367,7 @@ class NanofabRAGPipeline:
             try:
                 logger.info("🔄 Importing embedding services...")
                 from ai_services.embedding_generator import embed_chunks_with_openai
-                from ai_services.openai_services import client
+                from ai_services.openai_client import get_client
                 logger.info("✅ Successfully imported embedding services")
             except ImportError as ie:
                 logger.error(f"❌ Failed to import ai_services: {ie}")
@@ -391,15 +391,20 @@ class NanofabRAGPipeline:
             
             # Generate embeddings
             logger.info("🤖 Starting embedding generation with OpenAI...")
-            embedded_df = embed_chunks_with_openai(chunks_df, client)
+            embedded_df = embed_chunks_with_openai(chunks_df, get_client())
             
             # Create output directory and save to first possible location
             output_path = possible_output_paths[0]  # Use relative path
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             embedded_df.to_csv(output_path, index=False)
             
+            # Keyword index for hybrid search, keyed by the same CSV row numbers
+            from ai_services.bm25_index import build_chunk_index, DEFAULT_INDEX_PATH
+            build_chunk_index(embedded_df).save(DEFAULT_INDEX_PATH)
+            
             logger.info(f"✅ Step 5 Completed: Generated embeddings for {len(embedded_df)} chunks")
             logger.info(f"📁 Embeddings saved to: {output_path}")
+            logger.info(f"📁 BM25 keyword index saved to: {DEFAULT_INDEX_PATH}")
             return True
             
         except Exception as e:
@@ -495,8 +500,10 @@ class NanofabRAGPipeline:
         """Test the RAG system with a sample query"""
         logger.info("\n🧪 Testing RAG System...")
         try:
-            from ai_services.vector_search import vector_similarity_search, client
+            from ai_services.vector_search import vector_similarity_search
+            from ai_services.openai_client import get_client
             from ai_services.openai_services import generate_response_with_context
+            from ai_services.content_types import add_content_columns
             import pandas as pd
             import json
             
@@ -509,8 +516,9 @@ class NanofabRAGPipeline:
             df['embedding_vectors'] = df['vectors'].apply(
                 lambda x: json.loads(x) if pd.notna(x) and x != 'None' else None
             )
-            df_with_embeddings = df[df['embedding_vectors'].notna()].copy()
+            df_with_embeddings = add_content_columns(df[df['embedding_vectors'].notna()].copy())
             
+            client = get_client()
             test_query = "What equipment is available for lithography?"
             logger.info(f"🔍 Test Query: '{test_query}'")
             
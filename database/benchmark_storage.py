@@ -0,0 +1,92 @@
+"""
+Compare embedding storage modes (vector / halfvec / bit + re-rank) on a copy of `items`.
+
+    python benchmark_storage.py [sample_rows] [queries] [k]
+
+For every mode the script builds a scratch table bench_<mode>, times the index build,
+reports table/index size and query latency, and measures recall@k against an exact
+(sequential-scan) float32 search. Query vectors are embeddings of random stored
+chunks, so no OpenAI calls are needed. Scratch tables are dropped at the end.
+"""
+import os, sys, time
+import numpy as np
+from dotenv import load_dotenv
+import psycopg
+from psycopg import sql
+from pgvector.psycopg import register_vector
+from storage import STORAGE_MODES, column_type, distance_sql, index_order_sql, index_sql, candidate_count
+load_dotenv()
+DATABASE_URL = os.environ["DATABASE_URL"]
+SAMPLE_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+N_QUERIES = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+K = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+LISTS = max(10, SAMPLE_ROWS // 1000)
+SEARCH_SQL = """
+SELECT id FROM (
+    SELECT id, {distance} AS distance FROM {table} ORDER BY {order} LIMIT %(candidates)s
+) c ORDER BY distance LIMIT %(k)s
+"""
+
+def bench_table(mode: str) -> str:
+    return f"bench_{mode}"
+
+def exact_top_k(cur, qvec) -> set:
+    cur.execute("SET LOCAL enable_indexscan = off")
+    cur.execute(sql.SQL(SEARCH_SQL).format(table=sql.Identifier(bench_table("vector")),
+                                           distance=sql.SQL(distance_sql("vector")),
+                                           order=sql.SQL(distance_sql("vector"))),
+                {"qvec": qvec, "k": K, "candidates": K})
+    return {r[0] for r in cur.fetchall()}
+
+with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+    register_vector(conn)
+    with conn.cursor() as cur:
+        cur.execute("SET ivfflat.probes = 10")
+        cur.execute("SET hnsw.ef_search = 100")
+        results = {}
+        for mode in STORAGE_MODES:
+            table = bench_table(mode)
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(table)))
+            cur.execute(sql.SQL(
+                "CREATE TABLE {t} AS SELECT id, embedding::{ct} AS embedding FROM items "
+                "WHERE embedding IS NOT NULL ORDER BY id LIMIT %s"
+            ).format(t=sql.Identifier(table), ct=sql.SQL(column_type(mode))), [SAMPLE_ROWS])
+            start = time.time()
+            cur.execute(index_sql(table, LISTS, mode))
+            build_s = time.time() - start
+            cur.execute(sql.SQL("VACUUM (ANALYZE) {}").format(sql.Identifier(table)))
+            cur.execute("SELECT pg_table_size(%s), pg_indexes_size(%s)", [table, table])
+            table_bytes, index_bytes = cur.fetchone()
+            results[mode] = {"build_s": build_s, "table_mb": table_bytes / 2**20, "index_mb": index_bytes / 2**20}
+
+        cur.execute(sql.SQL("SELECT embedding FROM {} ORDER BY random() LIMIT %s").format(
+            sql.Identifier(bench_table("vector"))), [N_QUERIES])
+        queries = [np.asarray(r[0], dtype=np.float32) for r in cur.fetchall()]
+        truth = []
+        with conn.transaction():
+            for q in queries:
+                truth.append(exact_top_k(cur, q))
+
+        for mode in STORAGE_MODES:
+            query_sql = sql.SQL(SEARCH_SQL).format(table=sql.Identifier(bench_table(mode)),
+                                                   distance=sql.SQL(distance_sql(mode)),
+                                                   order=sql.SQL(index_order_sql(mode)))
+            latencies, hits = [], 0
+            for q, expected in zip(queries, truth):
+                start = time.perf_counter()
+                cur.execute(query_sql, {"qvec": q, "k": K, "candidates": candidate_count(K, mode)})
+                found = {r[0] for r in cur.fetchall()}
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(found & expected)
+            results[mode]["p50_ms"] = float(np.percentile(latencies, 50))
+            results[mode]["p95_ms"] = float(np.percentile(latencies, 95))
+            results[mode]["recall"] = hits / (K * len(queries)) if queries else 0.0
+
+        for mode in STORAGE_MODES:
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(bench_table(mode))))
+
+print(f"\n{SAMPLE_ROWS} rows, {N_QUERIES} queries, recall@{K} vs exact float32 search")
+print(f"{'mode':8} {'table MB':>9} {'index MB':>9} {'build s':>8} {'p50 ms':>7} {'p95 ms':>7} {'recall':>7}")
+for mode, r in results.items():
+    print(f"{mode:8} {r['table_mb']:9.1f} {r['index_mb']:9.1f} {r['build_s']:8.2f} "
+          f"{r['p50_ms']:7.2f} {r['p95_ms']:7.2f} {r['recall']:7.3f}")
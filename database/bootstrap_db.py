@@ -1,10 +1,14 @@
 import os
 from dotenv import load_dotenv
 import psycopg
+from psycopg import sql
 from pgvector.psycopg import register_vector
+from sources import SOURCES, DEFAULT_PARTITION, partition_name, partition_lists
+from storage import STORAGE, column_type, index_sql
+from fulltext import PART_NUMBERS_FUNCTION
 load_dotenv()
 DATABASE_URL = os.environ["DATABASE_URL"]
-DDL = """
+DDL = f"""
 CREATE EXTENSION IF NOT EXISTS vector;
 DO $$
 BEGIN
@@ -12,8 +16,22 @@ BEGIN
         CREATE TYPE content_type AS ENUM ('text', 'image', 'table');
     END IF;
 END$$;
+-- Text search config for lab jargon: hyphenated words (lift-off, e-beam) keep their compound
+-- and parts unstemmed; plain words still use english_stem. It does not keep part numbers
+-- whole: the parser splits SPR-220 into "spr" and "-220" before any mapping applies, so those
+-- go into part_tsv below
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'nanofab') THEN
+        CREATE TEXT SEARCH CONFIGURATION nanofab (COPY = english);
+        ALTER TEXT SEARCH CONFIGURATION nanofab
+            ALTER MAPPING FOR asciihword, hword, hword_asciipart, hword_part WITH simple;
+    END IF;
+END$$;
+{PART_NUMBERS_FUNCTION}
 CREATE TABLE IF NOT EXISTS items (
-    id              bigserial PRIMARY KEY,
+    id              bigserial,
+    source          text NOT NULL,
     url             text,
     title           text,
     content         text,
@@ -22,15 +40,73 @@ CREATE TABLE IF NOT EXISTS items (
     character_count integer,
     metadata        jsonb,
     content_type    content_type NOT NULL,
-    embedding       vector(1536),
+    embedding       {column_type()},
+    content_hash    text,
     created_at      timestamptz DEFAULT now(),
-    UNIQUE (url, chunk_number)
-);
-CREATE INDEX IF NOT EXISTS items_embedding_ivf_cos
-ON items USING ivfflat (embedding vector_cosine_ops) WITH (lists=100);
+    PRIMARY KEY (source, id),
+    UNIQUE (source, url, chunk_number)
+) PARTITION BY LIST (source);
+ALTER TABLE items ADD COLUMN IF NOT EXISTS content_hash text;
+-- Lexical retrieval: titles (tool/page names) weigh more than body text
+ALTER TABLE items ADD COLUMN IF NOT EXISTS content_tsv tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('nanofab'::regconfig, coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('nanofab'::regconfig, coalesce(content, '')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS items_content_tsv_gin ON items USING gin (content_tsv);
+-- Part numbers (SPR-220, AZ4210) as verbatim lexemes, matched exactly by search.LEXICAL_SQL
+ALTER TABLE items ADD COLUMN IF NOT EXISTS part_tsv tsvector GENERATED ALWAYS AS (
+    array_to_tsvector(nanofab_part_numbers(coalesce(title, '') || ' ' || coalesce(content, '')))
+) STORED;
+CREATE INDEX IF NOT EXISTS items_part_tsv_gin ON items USING gin (part_tsv);
 """
-with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
-    with conn.cursor() as cur:
+# Older deployments have a single, unpartitioned items heap; move it aside so
+# the partitioned table can be created and the rows copied over.
+LEGACY_TABLE = "items_unpartitioned"
+IS_PLAIN_TABLE = "SELECT relkind = 'r' FROM pg_class WHERE oid = to_regclass('items')"
+COLUMNS = "url, title, content, chunk_number, total_chunks, character_count, metadata, content_type, embedding, created_at"
+
+def create_partition(cur, source: str, values: list[str] | None):
+    """Create the list partition for one source (values=None makes the DEFAULT partition)."""
+    table = sql.Identifier(partition_name(source))
+    if values is None:
+        cur.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF items DEFAULT").format(table))
+    else:
+        cur.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF items FOR VALUES IN ({})").format(
+            table, sql.SQL(", ").join(sql.Literal(v) for v in values)))
+
+def create_vector_index(cur, source: str):
+    """Per-partition vector index; built after any data copy so ivfflat lists are trained on real rows."""
+    cur.execute(index_sql(partition_name(source), partition_lists(source)))
+
+def source_case_sql() -> sql.Composable:
+    """SQL expression deriving the source key from url, mirroring sources.source_for_url."""
+    host = sql.SQL("lower(substring(url from '^[a-zA-Z]+://([^/]+)'))")
+    whens = [
+        sql.SQL("WHEN {} = ANY({}) THEN {}").format(host, sql.Literal(cfg["hosts"]), sql.Literal(key))
+        for key, cfg in SOURCES.items()
+    ]
+    return sql.SQL("CASE {} ELSE {} END").format(sql.SQL(" ").join(whens), sql.Literal(DEFAULT_PARTITION))
+
+# One transaction: if any step fails the rename is rolled back too, so a re-run sees the
+# plain items table again instead of an orphaned items_unpartitioned.
+with psycopg.connect(DATABASE_URL) as conn:
+    with conn.transaction(), conn.cursor() as cur:
+        cur.execute(IS_PLAIN_TABLE)
+        row = cur.fetchone()
+        migrate = bool(row and row[0])
+        if migrate:
+            cur.execute(sql.SQL("ALTER TABLE items RENAME TO {}").format(sql.Identifier(LEGACY_TABLE)))
+            cur.execute("DROP INDEX IF EXISTS items_embedding_ivf_cos")
         cur.execute(DDL)               # 1) create extension + schema first
+        for source in SOURCES:
+            create_partition(cur, source, [source])
+        create_partition(cur, DEFAULT_PARTITION, None)
+        if migrate:
+            cur.execute(sql.SQL("INSERT INTO items (source, {cols}) SELECT {src}, {cols} FROM {legacy}").format(
+                cols=sql.SQL(COLUMNS), src=source_case_sql(), legacy=sql.Identifier(LEGACY_TABLE)))
+            print(f"Copied {cur.rowcount} rows from {LEGACY_TABLE}; drop it once you've checked the copy.")
+        for source in SOURCES:
+            create_vector_index(cur, source)
+        create_vector_index(cur, DEFAULT_PARTITION)
     register_vector(conn)              # 2) now the type exists; safe to register
-print(":white_check_mark: DB bootstrapped: extension + schema + index ready") 
\ No newline at end of file
+print(f":white_check_mark: DB bootstrapped: extension + partitioned schema + per-source {STORAGE} indexes ready")
@@ -1,25 +1,35 @@
-import os, csv, json
+import os, csv, json, hashlib
 from dotenv import load_dotenv
 import psycopg
 from pgvector.psycopg import register_vector
 from psycopg.types.json import Json  # <-- wrap dicts for jsonb
+from sources import source_for_url
 load_dotenv()
 DATABASE_URL = os.environ["DATABASE_URL"]
 # Set this to your actual CSV path if needed
 CSV_PATH = "chunked_pages_with_embeddings.csv"
 SQL = """
 INSERT INTO items
-(url, title, content, chunk_number, total_chunks, character_count, metadata, content_type, embedding)
-VALUES (%(url)s, %(title)s, %(content)s, %(chunk_number)s, %(total_chunks)s, %(character_count)s, %(metadata)s, %(content_type)s, %(embedding)s)
-ON CONFLICT (url, chunk_number) DO UPDATE
+(source, url, title, content, chunk_number, total_chunks, character_count, metadata, content_type, embedding, content_hash)
+VALUES (%(source)s, %(url)s, %(title)s, %(content)s, %(chunk_number)s, %(total_chunks)s, %(character_count)s, %(metadata)s, %(content_type)s, %(embedding)s, %(content_hash)s)
+ON CONFLICT (source, url, chunk_number) DO UPDATE
 SET title = EXCLUDED.title,
     content = EXCLUDED.content,
     total_chunks = EXCLUDED.total_chunks,
     character_count = EXCLUDED.character_count,
     metadata = EXCLUDED.metadata,
     content_type = EXCLUDED.content_type,
-    embedding = EXCLUDED.embedding;
+    embedding = EXCLUDED.embedding,
+    content_hash = EXCLUDED.content_hash
+WHERE items.content_hash IS DISTINCT FROM EXCLUDED.content_hash;
 """
+EXISTING_SQL = "SELECT source, url, chunk_number, content_hash FROM items WHERE source = ANY(%s)"
+DELETE_SQL = """
+DELETE FROM items
+WHERE source = %s AND url IS NOT DISTINCT FROM %s AND chunk_number IS NOT DISTINCT FROM %s
+"""
+# Every CSV column that ends up in the row; if none of them changed the row is left untouched
+HASHED_FIELDS = ("title", "content", "total_chunks", "character_count", "metadata", "content_type", "vectors")
 def to_int(x):
     try:
         return int(x)
@@ -28,38 +38,71 @@ def to_int(x):
 def norm_content_type(x: str | None) -> str:
     v = (x or "").strip().lower()
     return v if v in ("text", "image", "table") else "text"
+def content_hash(row: dict) -> str:
+    h = hashlib.sha256()
+    for field in HASHED_FIELDS:
+        h.update((row.get(field) or "").encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+def to_record(row: dict, key: tuple, digest: str) -> dict:
+    # vectors column is a JSON array in the CSV
+    emb_str = row.get("vectors")
+    embedding = json.loads(emb_str) if emb_str else None
+    # metadata may be JSON string or empty
+    meta_str = row.get("metadata")
+    if meta_str:
+        try:
+            meta_obj = json.loads(meta_str)
+        except Exception:
+            # store raw string if it wasn't valid JSON
+            meta_obj = {"raw": meta_str}
+        metadata = Json(meta_obj)   # <-- wrap for jsonb
+    else:
+        metadata = None
+    source, url, chunk_number = key
+    return {
+        "source": source,
+        "url": url,
+        "title": row.get("title"),
+        "content": row.get("content"),
+        "chunk_number": chunk_number,
+        "total_chunks": to_int(row.get("total_chunks")),
+        "character_count": to_int(row.get("character_count")),
+        "metadata": metadata,
+        "content_type": norm_content_type(row.get("content_type")),
+        "embedding": embedding,  # list[float] OK with register_vector
+        "content_hash": digest,
+    }
+# 1) hash every chunk in the CSV; a later duplicate key wins, as the old per-row upsert did
+incoming = {}
+with open(CSV_PATH, newline="", encoding="utf-8") as f:
+    for row in csv.DictReader(f):
+        key = (source_for_url(row.get("url")), row.get("url"), to_int(row.get("chunk_number")))
+        incoming[key] = row
+counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
 with psycopg.connect(DATABASE_URL) as conn:
     register_vector(conn)  # enables python list -> vector
-    with conn.cursor() as cur, open(CSV_PATH, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        n = 0
-        for row in reader:
-            # vectors column is a JSON array in the CSV
-            emb_str = row.get("vectors")
-            embedding = json.loads(emb_str) if emb_str else None
-            # metadata may be JSON string or empty
-            meta_str = row.get("metadata")
-            if meta_str:
-                try:
-                    meta_obj = json.loads(meta_str)
-                except Exception:
-                    # store raw string if it wasn't valid JSON
-                    meta_obj = {"raw": meta_str}
-                metadata = Json(meta_obj)   # <-- wrap for jsonb
+    with conn.cursor() as cur:
+        # 2) compare against what the touched source partitions already hold
+        cur.execute(EXISTING_SQL, [sorted({key[0] for key in incoming})])
+        existing = {(src, url, chunk): digest for src, url, chunk, digest in cur.fetchall()}
+        upserts = []
+        for key, row in incoming.items():
+            digest = content_hash(row)
+            if key not in existing:
+                counts["inserted"] += 1
+            elif existing[key] != digest:
+                counts["updated"] += 1
             else:
-                metadata = None
-            rec = {
-                "url": row.get("url"),
-                "title": row.get("title"),
-                "content": row.get("content"),
-                "chunk_number": to_int(row.get("chunk_number")),
-                "total_chunks": to_int(row.get("total_chunks")),
-                "character_count": to_int(row.get("character_count")),
-                "metadata": metadata,
-                "content_type": norm_content_type(row.get("content_type")),
-                "embedding": embedding,  # list[float] OK with register_vector
-            }
-            cur.execute(SQL, rec)
-            n += 1
+                counts["unchanged"] += 1
+                continue
+            upserts.append(to_record(row, key, digest))
+        # 3) only changed rows are written; chunks gone from the source are removed
+        if upserts:
+            cur.executemany(SQL, upserts)
+        stale = [key for key in existing if key not in incoming]
+        if stale:
+            cur.executemany(DELETE_SQL, stale)
+        counts["deleted"] = len(stale)
     conn.commit()
-print(":white_check_mark: Ingest complete.")
\ No newline at end of file
+print(":white_check_mark: Ingest complete: " + ", ".join(f"{n} {label}" for label, n in counts.items()))
\ No newline at end of file
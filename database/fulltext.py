@@ -0,0 +1,28 @@
+import re
+
+# Part numbers and formulas: letters, then a digit, then optional -/. separated parts
+# (SPR-220, SPR-220-3.0, AZ4210, S1813, LOL2000, SiO2). The default text search parser splits
+# "SPR-220" into the word "spr" and the number "-220", whatever the configuration maps them to,
+# so these tokens are also stored verbatim in the part_tsv column and matched exactly.
+PART_NUMBER_REGEX = r"[A-Za-z]+-?[0-9][A-Za-z0-9]*(?:[-.][A-Za-z0-9]+)*"
+_PART_NUMBER = re.compile(rf"(?<![A-Za-z0-9_]){PART_NUMBER_REGEX}(?![A-Za-z0-9_])")
+
+# Same extraction in SQL, used by the generated part_tsv column (see bootstrap_db.py)
+PART_NUMBERS_FUNCTION = """
+CREATE OR REPLACE FUNCTION nanofab_part_numbers(doc text) RETURNS text[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT coalesce(array_agg(DISTINCT lower(m[1])), ARRAY[]::text[])
+    FROM regexp_matches(doc, '\\m(""" + PART_NUMBER_REGEX + """)\\M', 'g') AS m
+$fn$;
+"""
+
+def part_numbers(text: str | None) -> list[str]:
+    """Lowercased part numbers in text, as nanofab_part_numbers extracts them."""
+    return sorted({match.lower() for match in _PART_NUMBER.findall(text or "")})
+
+def part_number_tsquery(text: str | None) -> str:
+    """
+    tsquery text OR-ing the part numbers of text as quoted, verbatim prefix lexemes, so "SPR-220"
+    also finds "SPR-220-3.0" ('' if there are none).
+    """
+    return " | ".join(f"'{part}':*" for part in part_numbers(text))
@@ -0,0 +1,48 @@
+"""
+Switch an existing `items` table between embedding storage modes (see storage.py).
+
+    python quantize_db.py halfvec    # float16 column + halfvec index
+    python quantize_db.py bit        # float32 column + binary-quantized HNSW index
+    python quantize_db.py vector     # back to the original layout
+
+Afterwards set EMBEDDING_STORAGE to the same mode for search.py / chunk_csv.py.
+"""
+import os, sys, time
+from dotenv import load_dotenv
+import psycopg
+from psycopg import sql
+from sources import all_partitions, partition_name, partition_lists
+from storage import STORAGE_MODES, EMBED_DIM, check_storage, column_type, index_name, index_sql
+load_dotenv()
+DATABASE_URL = os.environ["DATABASE_URL"]
+CURRENT_TYPE_SQL = """
+SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+WHERE attrelid = 'items'::regclass AND attname = 'embedding'
+"""
+if len(sys.argv) != 2:
+    print(__doc__)
+    sys.exit(1)
+target = check_storage(sys.argv[1])
+with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+    with conn.cursor() as cur:
+        # 1) drop every embedding index so the column rewrite doesn't rebuild them
+        for source in all_partitions():
+            table = partition_name(source)
+            for mode in STORAGE_MODES:
+                cur.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(index_name(table, mode))))
+        # 2) rewrite the column when the element type changes (cascades to all partitions)
+        cur.execute(CURRENT_TYPE_SQL)
+        current, wanted = cur.fetchone()[0], column_type(target)
+        if current != wanted:
+            start = time.time()
+            cur.execute(sql.SQL("ALTER TABLE items ALTER COLUMN embedding TYPE {t} USING embedding::{t}").format(
+                t=sql.SQL(wanted)))
+            print(f"Converted embedding {current} -> {wanted} in {time.time() - start:.1f}s")
+        # 3) rebuild the per-partition indexes for the new mode and refresh stats
+        for source in all_partitions():
+            table = partition_name(source)
+            start = time.time()
+            cur.execute(index_sql(table, partition_lists(source), target))
+            cur.execute(sql.SQL("VACUUM (ANALYZE) {}").format(sql.Identifier(table)))
+            print(f"  {table}: {index_name(table, target)} built in {time.time() - start:.1f}s")
+print(f":white_check_mark: items now uses {target} storage ({EMBED_DIM} dims); set EMBEDDING_STORAGE={target}")
@@ -1,31 +1,112 @@
 import os
+import sys
+from functools import lru_cache
 from dotenv import load_dotenv
 import psycopg
+from psycopg import sql
 from pgvector.psycopg import register_vector
-from openai import OpenAI
-load_dotenv()
-DATABASE_URL = os.environ["DATABASE_URL"]
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY_DEV"))
+from sources import all_partitions, partition_name, check_sources
+from storage import distance_sql, index_order_sql, candidate_count
+from fulltext import part_number_tsquery
+# Project root on sys.path so the shared OpenAI client and call policies are importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.ai_services.openai_client import get_client
+from backend.ai_services.resilience import resilient_call, bounded
 EMBED_MODEL = "text-embedding-3-small"  # 1536-dim
+API_KEY_ENV = "OPENAI_API_KEY_DEV"
+# .env, the database URL and the OpenAI client are resolved on first use, not at import
+@lru_cache(maxsize=None)
+def database_url() -> str:
+    load_dotenv()
+    return os.environ["DATABASE_URL"]
 def embed(text: str):
-    e = client.embeddings.create(model=EMBED_MODEL, input=text)
+    """Query embedding through the shared, pooled client, under the embed_query deadline/retry policy."""
+    client = get_client(API_KEY_ENV)
+    e = resilient_call("embed_query", lambda timeout: bounded(client, timeout).embeddings.create(
+        model=EMBED_MODEL, input=text))
     return e.data[0].embedding
-def search(query: str, k: int = 5, content_type: str | None = None):
+# One kNN subquery per partition so each uses its own vector index; the outer
+# query re-ranks the candidates by exact distance and merges them into the global
+# top-k (with binary-quantized indexes the index order is only approximate).
+PARTITION_SQL = """
+(SELECT id, source, url, title, content_type, left(content, 240) AS snippet,
+        {distance} AS distance
+ FROM {table}
+ {where}
+ ORDER BY {order}
+ LIMIT %(candidates)s)
+"""
+# Lexical side: websearch syntax ("quoted phrases", -exclusions) against the GIN-indexed tsvector,
+# plus exact part-number matches (SPR-220, AZ4210) against part_tsv, which the parser can't keep whole
+LEXICAL_SQL = """
+SELECT id, source, row_number() OVER (ORDER BY ts_rank_cd(content_tsv, tsq) + ts_rank_cd(part_tsv, ptq) DESC) AS rank
+FROM items, websearch_to_tsquery('nanofab', %(query)s) tsq, CAST(%(part_query)s AS tsquery) ptq
+WHERE (content_tsv @@ tsq OR part_tsv @@ ptq) {filters}
+ORDER BY ts_rank_cd(content_tsv, tsq) + ts_rank_cd(part_tsv, ptq) DESC
+LIMIT %(candidates)s
+"""
+# Both candidate lists are fused with weighted reciprocal rank (60 = standard RRF constant)
+HYBRID_SQL = """
+WITH lexical AS ({lexical}),
+dense AS (
+    SELECT id, source, row_number() OVER (ORDER BY distance) AS rank
+    FROM ({dense}) d
+)
+SELECT i.id, i.url, i.title, i.content_type, left(i.content, 240) AS snippet,
+       coalesce(%(keyword_weight)s / (60.0 + l.rank), 0)
+     + coalesce((1 - %(keyword_weight)s) / (60.0 + d.rank), 0) AS score
+FROM lexical l
+FULL OUTER JOIN dense d ON d.source = l.source AND d.id = l.id
+JOIN items i ON i.source = coalesce(l.source, d.source) AND i.id = coalesce(l.id, d.id)
+ORDER BY score DESC
+LIMIT %(k)s;
+"""
+def dense_sql(content_type: str | None, sources: list[str] | None) -> sql.Composed:
+    """UNION ALL of one kNN subquery per selected source partition; unknown sources raise ValueError."""
+    check_sources(sources)
+    where = sql.SQL("WHERE content_type = %(content_type)s" if content_type else "")
+    parts = [
+        sql.SQL(PARTITION_SQL).format(table=sql.Identifier(partition_name(s)), where=where,
+                                      distance=sql.SQL(distance_sql()), order=sql.SQL(index_order_sql()))
+        for s in (sources or all_partitions())
+    ]
+    return sql.SQL(" UNION ALL ").join(parts)
+def search(query: str, k: int = 5, content_type: str | None = None, sources: list[str] | None = None):
+    """Fan the kNN query out over the selected source partitions (all by default) and merge top-k."""
+    check_sources(sources)
     qvec = embed(query)
-    sql = """
-    SELECT id, url, title, content_type, left(content, 240) AS snippet,
-           1 - (embedding <=> %s::vector) AS score
-    FROM items
-    {where}
-    ORDER BY embedding <-> %s::vector
-    LIMIT %s;
-    """.format(where="WHERE content_type = %s" if content_type else "")
-    with psycopg.connect(DATABASE_URL) as conn:
+    query_sql = sql.SQL("""
+    SELECT id, url, title, content_type, snippet, 1 - distance AS score
+    FROM ({parts}) hits
+    ORDER BY distance
+    LIMIT %(k)s;
+    """).format(parts=dense_sql(content_type, sources))
+    with psycopg.connect(database_url()) as conn:
         register_vector(conn)
         with conn.cursor() as cur:
-            params = ([qvec] + ([content_type] if content_type else []) + [qvec, k]) \
-                     if content_type else ([qvec, qvec, k])
-            cur.execute(sql, params)
+            cur.execute(query_sql, {"qvec": qvec, "k": k, "candidates": candidate_count(k),
+                                    "content_type": content_type})
+            return cur.fetchall()
+def hybrid_search(query: str, k: int = 5, content_type: str | None = None, sources: list[str] | None = None,
+                  keyword_weight: float = 0.5, candidates: int = 50):
+    """Full-text (ts_rank_cd) and kNN retrieval fused with RRF in a single round-trip; score is the fused RRF score."""
+    check_sources(sources)
+    qvec = embed(query)
+    filters = []
+    if content_type:
+        filters.append("AND content_type = %(content_type)s")
+    if sources:
+        filters.append("AND source = ANY(%(sources)s)")
+    query_sql = sql.SQL(HYBRID_SQL).format(
+        lexical=sql.SQL(LEXICAL_SQL).format(filters=sql.SQL(" ".join(filters))),
+        dense=dense_sql(content_type, sources))
+    with psycopg.connect(database_url()) as conn:
+        register_vector(conn)
+        with conn.cursor() as cur:
+            cur.execute(query_sql, {"query": query, "part_query": part_number_tsquery(query), "qvec": qvec, "k": k,
+                                    "candidates": max(candidates, candidate_count(k)),
+                                    "content_type": content_type, "sources": sources,
+                                    "keyword_weight": keyword_weight})
             return cur.fetchall()
 if __name__ == "__main__":
     rows = search("vernier alignment mark", k=5, content_type="text")
@@ -33,4 +114,4 @@ if __name__ == "__main__":
         _id, url, title, ctype, snip, score = r
         print(f"{score:.3f} | {ctype:5} | {title or ''}")
         print(f"  {url}")
-        print(f"  {snip}…\n")
\ No newline at end of file
+        print(f"  {snip}…\n")
@@ -0,0 +1,37 @@
+from urllib.parse import urlparse
+
+# Every source gets its own list partition of `items` (items_<key>) with its own
+# vector index, so a single wiki can be reloaded, re-indexed or vacuumed on its own.
+# Rows whose host isn't listed here land in the items_default partition.
+SOURCES = {
+    "nanofab": {"hosts": ["wiki.nanofab.ucsb.edu"], "lists": 100},
+}
+DEFAULT_PARTITION = "default"
+DEFAULT_LISTS = 10
+
+def source_for_url(url: str | None) -> str:
+    """Map a chunk URL to its source key; hosts without a configured partition map to the default one."""
+    host = urlparse(url or "").netloc.lower()
+    for key, cfg in SOURCES.items():
+        if host in cfg["hosts"]:
+            return key
+    return DEFAULT_PARTITION
+
+def partition_name(source: str) -> str:
+    return f"items_{source}"
+
+def partition_lists(source: str) -> int:
+    return SOURCES.get(source, {}).get("lists", DEFAULT_LISTS)
+
+def all_partitions() -> list[str]:
+    """Source keys that own a partition, including the catch-all default one."""
+    return list(SOURCES) + [DEFAULT_PARTITION]
+
+def check_sources(sources: list[str] | None) -> list[str] | None:
+    """Return sources unchanged if every key owns a partition; raise ValueError naming the unknown ones."""
+    if not sources:
+        return sources
+    unknown = [s for s in sources if s not in all_partitions()]
+    if unknown:
+        raise ValueError(f"Unknown source(s) {unknown}, expected some of {all_partitions()}")
+    return sources
@@ -0,0 +1,53 @@
+import os
+from psycopg import sql
+
+# How `items.embedding` is stored and indexed:
+#   vector  - float32 column, ivfflat cosine index (original layout)
+#   halfvec - float16 column and index, half the heap/TOAST and index size; the ivfflat
+#             candidates are over-fetched and re-ranked by exact distance on the float16
+#             column, since this mode keeps no float32 copy
+#   bit     - float32 column, but only the binary-quantized codes are indexed (HNSW,
+#             hamming); the top candidates are re-ranked with the full-precision vectors
+STORAGE_MODES = ("vector", "halfvec", "bit")
+STORAGE = os.getenv("EMBEDDING_STORAGE", "vector")
+EMBED_DIM = 1536
+# Candidates fetched per partition for every result when the index is lossy
+RERANK_FACTOR = 4
+# Modes whose index order only approximates the exact distance, so they over-fetch and re-rank
+RERANKED_MODES = ("halfvec", "bit")
+
+def check_storage(storage: str) -> str:
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Unknown EMBEDDING_STORAGE {storage!r}, expected one of {STORAGE_MODES}")
+    return storage
+
+def column_type(storage: str = STORAGE) -> str:
+    return f"halfvec({EMBED_DIM})" if check_storage(storage) == "halfvec" else f"vector({EMBED_DIM})"
+
+def index_name(table: str, storage: str = STORAGE) -> str:
+    suffix = {"vector": "ivf_cos", "halfvec": "half_ivf_cos", "bit": "bit_hnsw"}[check_storage(storage)]
+    return f"{table}_embedding_{suffix}"
+
+def index_sql(table: str, lists: int, storage: str = STORAGE) -> sql.Composed:
+    """CREATE INDEX statement for one partition (or any table with an embedding column)."""
+    if check_storage(storage) == "bit":
+        method = sql.SQL(f"hnsw ((binary_quantize(embedding)::bit({EMBED_DIM})) bit_hamming_ops)")
+    else:
+        ops = "halfvec_cosine_ops" if storage == "halfvec" else "vector_cosine_ops"
+        method = sql.SQL("ivfflat (embedding {}) WITH (lists={})").format(sql.SQL(ops), sql.Literal(lists))
+    return sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} USING {}").format(
+        sql.Identifier(index_name(table, storage)), sql.Identifier(table), method)
+
+def distance_sql(storage: str = STORAGE) -> str:
+    """Exact cosine distance against the stored embedding, using the %(qvec)s parameter."""
+    return f"embedding <=> %(qvec)s::{column_type(storage)}"
+
+def index_order_sql(storage: str = STORAGE) -> str:
+    """ORDER BY expression that the storage mode's index can serve."""
+    if check_storage(storage) == "bit":
+        return (f"binary_quantize(embedding)::bit({EMBED_DIM}) "
+                f"<~> binary_quantize(%(qvec)s::vector({EMBED_DIM}))")
+    return distance_sql(storage)
+
+def candidate_count(k: int, storage: str = STORAGE) -> int:
+    return k * RERANK_FACTOR if check_storage(storage) in RERANKED_MODES else k
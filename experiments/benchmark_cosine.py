@@ -0,0 +1,74 @@
+"""
+Microbenchmark for the semantic stage of hybrid_search.
+
+    python -m experiments.benchmark_cosine [--rows 20000] [--filtered 0.3] [--repeats 20]
+
+Compares the old per-row `apply(cosine_similarity)` over Python-list embeddings with one
+batched product against the cached, pre-normalized float32 matrix restricted to the
+keyword-prefiltered rows. Uses the real corpus when the embeddings CSV exists, random
+unit vectors otherwise.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from backend.ai_services.vector_search import get_embedding_matrix
+from experiments.hybrid_search import cosine_similarity
+
+def load_corpus(csv_path, rows):
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path)
+        df['embedding_vectors'] = df['vectors'].apply(
+            lambda x: json.loads(x) if pd.notna(x) and x != 'None' else None
+        )
+        return df[df['embedding_vectors'].notna()].copy()
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(rows, 1536)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return pd.DataFrame({'embedding_vectors': [v.tolist() for v in vectors]})
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="csv_dataframes/embeddings/chunked_pages_with_embeddings.csv")
+    parser.add_argument("--rows", type=int, default=20000, help="synthetic corpus size when the CSV is missing")
+    parser.add_argument("--filtered", type=float, default=0.3, help="fraction of rows passing the keyword prefilter")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    df = load_corpus(args.csv, args.rows)
+    rng = np.random.default_rng(1)
+    positions = np.sort(rng.choice(len(df), max(1, int(len(df) * args.filtered)), replace=False))
+    query = np.asarray(df['embedding_vectors'].iloc[0], dtype=np.float32)
+
+    # First call builds and caches the matrix, exactly as the first hybrid_search query does
+    build_ms, _ = best_of(lambda: get_embedding_matrix(df), 1)
+
+    def per_row_apply():
+        filtered = df.iloc[positions]
+        return filtered['embedding_vectors'].apply(lambda vec: cosine_similarity(query.tolist(), vec)).to_numpy()
+
+    def batched():
+        q_vec = query / np.linalg.norm(query)
+        return get_embedding_matrix(df)[positions] @ q_vec
+
+    apply_ms, expected = best_of(per_row_apply, max(1, args.repeats // 10))
+    batched_ms, actual = best_of(batched, args.repeats)
+
+    print(f"\n{len(df)} chunks, {len(positions)} after keyword prefilter")
+    print(f"one-off matrix build:   {build_ms:9.2f} ms")
+    print(f"per-row apply:          {apply_ms:9.2f} ms/query")
+    print(f"batched float32 matmul: {batched_ms:9.2f} ms/query  ({apply_ms / batched_ms:.0f}x faster)")
+    print(f"max abs score diff:     {np.abs(expected - actual).max():.2e}")
+
+if __name__ == "__main__":
+    main()
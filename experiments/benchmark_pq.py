@@ -0,0 +1,74 @@
+"""
+Benchmark the in-memory PQ / IVF-PQ index against exact search on our corpus.
+
+    python -m experiments.benchmark_pq [--queries 200] [--k 5]
+
+Holds out random chunks as queries, indexes the remaining ones and reports memory
+footprint, build time, QPS and recall@k against the exact matrix-vector scan.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from backend.ai_services.vector_search import load_chunked_data_from_csv, get_embedding_matrix
+from backend.ai_services.index_utils import top_k
+from backend.ai_services.pq_index import PQIndex
+
+CONFIGS = [
+    # label, PQIndex kwargs, search kwargs
+    ("PQ m=32", dict(m=32), dict(rerank=0)),
+    ("PQ m=64", dict(m=64), dict(rerank=0)),
+    ("PQ m=64 +rerank50", dict(m=64), dict(rerank=50)),
+    ("PQ m=96 +rerank50", dict(m=96), dict(rerank=50)),
+    ("IVF-PQ m=64 +rerank50", dict(m=64, nlist=64), dict(nprobe=8, rerank=50)),
+]
+
+def python_list_bytes(vectors):
+    """RAM held by one list-of-floats embedding column entry (what load_chunked_data_from_csv keeps)"""
+    return sys.getsizeof(vectors) + sum(sys.getsizeof(v) for v in vectors)
+
+def run_queries(search, queries, k):
+    start = time.perf_counter()
+    found = [set(search(q, k).tolist()) for q in queries]
+    return found, len(queries) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="csv_dataframes/embeddings/chunked_pages_with_embeddings.csv")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    df = load_chunked_data_from_csv(args.csv)
+    matrix = get_embedding_matrix(df)
+    rng = np.random.default_rng(0)
+    held_out = rng.choice(len(matrix), min(args.queries, len(matrix) // 10), replace=False)
+    queries = matrix[held_out]
+    base = np.delete(matrix, held_out, axis=0)
+
+    list_bytes = python_list_bytes(df['embedding_vectors'].iloc[0]) * len(base)
+    print(f"\n{len(base)} chunks x {base.shape[1]} dims, {len(queries)} held-out queries")
+    print(f"Python-list embeddings: {list_bytes / 2**20:8.1f} MB")
+    print(f"float32 matrix:         {base.nbytes / 2**20:8.1f} MB\n")
+
+    truth, exact_qps = run_queries(lambda q, k: top_k(base @ q, k)[1], queries, args.k)
+    print(f"{'index':24} {'codes MB':>9} {'+vectors MB':>12} {'build s':>8} {'QPS':>8} {'recall@' + str(args.k):>9}")
+    print(f"{'exact':24} {'-':>9} {base.nbytes / 2**20:12.1f} {'-':>8} {exact_qps:8.0f} {1.0:9.3f}")
+
+    for label, index_kwargs, search_kwargs in CONFIGS:
+        start = time.perf_counter()
+        index = PQIndex(**index_kwargs).fit(base)
+        build_s = time.perf_counter() - start
+        found, qps = run_queries(lambda q, k: index.search(q, k, **search_kwargs)[1], queries, args.k)
+        recall = np.mean([len(f & t) / args.k for f, t in zip(found, truth)])
+        memory = index.memory_bytes()
+        codes_mb = (memory['codes'] + memory['codebooks']) / 2**20
+        vectors_mb = memory['rerank_vectors'] / 2**20 if search_kwargs.get('rerank') else 0.0
+        print(f"{label:24} {codes_mb:9.1f} {vectors_mb:12.1f} {build_s:8.1f} {qps:8.0f} {recall:9.3f}")
+
+    print("\nThe app only gets these savings with PQ_INDEX_PATH set (vector_search.use_pq_index): the codes")
+    print("stay in RAM, re-rank vectors are memmapped and the Python-list embeddings are dropped. Without it")
+    print("the app keeps the float32 matrix and building a PQIndex would only add memory on top.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Local OpenAI-compatible mock server that injects faults, for exercising resilience.py.
+
+    python -m experiments.fault_injection_server [--port 8765] [--error-rate 0.1] [--rate-limit-rate 0.05]
+        [--slow-rate 0.1] [--slow-ms 1500] [--hang-rate 0.02] [--bench 200]
+
+Serves /v1/embeddings and /v1/chat/completions with deterministic fake payloads. Each
+request independently fails with a 500, a 429, is delayed by --slow-ms, or hangs for 60 s.
+With --bench N it starts the server in-process and calls embed_query N times through a
+plain single-attempt call and through resilient_call, printing success rate and latency
+percentiles for both; without it, it serves until interrupted (point a client at
+http://127.0.0.1:<port>/v1).
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from openai import OpenAI
+from backend.ai_services.resilience import resilient_call, bounded, CircuitOpenError
+
+EMBED_DIM = 1536
+
+class FaultInjectingHandler(BaseHTTPRequestHandler):
+    faults = {}  # set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        roll = random.random()
+        faults = self.faults
+        if roll < faults["hang_rate"]:
+            time.sleep(60)
+        roll -= faults["hang_rate"]
+        if roll < faults["error_rate"]:
+            return self._reply(500, {"error": {"message": "injected server error", "type": "server_error"}})
+        roll -= faults["error_rate"]
+        if roll < faults["rate_limit_rate"]:
+            return self._reply(429, {"error": {"message": "injected rate limit", "type": "rate_limit_error"}})
+        roll -= faults["rate_limit_rate"]
+        if roll < faults["slow_rate"]:
+            time.sleep(faults["slow_ms"] / 1000)
+
+        if self.path.endswith("/embeddings"):
+            inputs = request.get("input", "")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            data = []
+            for i, text in enumerate(inputs):
+                seed = int.from_bytes(hashlib.sha256(str(text).encode("utf-8")).digest()[:4], "little")
+                vector = np.random.default_rng(seed).normal(size=EMBED_DIM)
+                data.append({"object": "embedding", "index": i, "embedding": (vector / np.linalg.norm(vector)).tolist()})
+            return self._reply(200, {"object": "list", "data": data, "model": request.get("model"),
+                                     "usage": {"prompt_tokens": 8, "total_tokens": 8}})
+        if self.path.endswith("/chat/completions"):
+            return self._reply(200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                "model": request.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Mock answer."}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 3, "total_tokens": 103,
+                          "prompt_tokens_details": {"cached_tokens": 0}}
+            })
+        return self._reply(404, {"error": {"message": f"unknown path {self.path}"}})
+
+def serve(port, faults):
+    FaultInjectingHandler.faults = faults
+    server = ThreadingHTTPServer(("127.0.0.1", port), FaultInjectingHandler)
+    server.daemon_threads = True
+    return server
+
+def percentiles(latencies):
+    if not latencies:
+        return "n/a"
+    p50, p95, p99, worst = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99, 100])
+    return f"p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms  max {worst:7.1f} ms"
+
+def bench(port, calls):
+    client = OpenAI(api_key="mock", base_url=f"http://127.0.0.1:{port}/v1", max_retries=0)
+
+    def plain(text):
+        # One attempt bounded only by the SDK timeout, as embed_query used to call the API
+        return client.embeddings.create(input=text, model="text-embedding-3-small")
+
+    def resilient(text):
+        return resilient_call("embed_query", lambda timeout: bounded(client, timeout).embeddings.create(
+            input=text, model="text-embedding-3-small"
+        ))
+
+    for label, call in (("single attempt", plain), ("resilient_call", resilient)):
+        latencies, failures, rejected = [], 0, 0
+        for i in range(calls):
+            start = time.perf_counter()
+            try:
+                call(f"query {i}")
+            except CircuitOpenError:
+                rejected += 1
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+        ok = calls - failures - rejected
+        print(f"{label:15} ok {ok}/{calls}  failed {failures}  rejected by breaker {rejected}")
+        print(f"{'':15} {percentiles(latencies)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--slow-ms", type=float, default=1500)
+    parser.add_argument("--hang-rate", type=float, default=0.0,
+                        help="hung requests stall a single-attempt client for its full SDK timeout")
+    parser.add_argument("--bench", type=int, default=0, metavar="N", help="run N embed calls against the server and exit")
+    args = parser.parse_args()
+
+    faults = {"error_rate": args.error_rate, "rate_limit_rate": args.rate_limit_rate,
+              "slow_rate": args.slow_rate, "slow_ms": args.slow_ms, "hang_rate": args.hang_rate}
+    server = serve(args.port, faults)
+    if not args.bench:
+        print(f"Fault-injecting mock OpenAI API on http://127.0.0.1:{args.port}/v1 ({faults})")
+        server.serve_forever()
+        return
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        bench(args.port, args.bench)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import pandas as pd
 import json
-import re
+import os
 import numpy as np
-from backend.ai_services.vector_search import embed_query
-from backend.ai_services.openai_services import client
+from backend.ai_services.vector_search import embed_query, get_embedding_matrix
+from backend.ai_services.openai_client import get_client
+from backend.ai_services.bm25_index import BM25Index, get_chunk_index, DEFAULT_INDEX_PATH
 
 # -- Helper: cosine similarity between two vectors
 def cosine_similarity(a: list, b: list) -> float:
@@ -15,7 +16,9 @@ def hybrid_search(
     query: str,
     df: pd.DataFrame,
     keyword_weight: float = 0.5,
-    k: int = 5
+    k: int = 5,
+    bm25: BM25Index | None = None,
+    require_all: bool = False
 ) -> pd.DataFrame:
     """
     Perform hybrid semantic + keyword search over pre-embedded chunks.
@@ -25,34 +28,37 @@ def hybrid_search(
         df: DataFrame with columns ['content','embedding_vectors',...].
         keyword_weight: Weight [0.0-1.0] for keyword vs. semantic.
         k: Number of top results to return.
+        bm25: Prebuilt BM25 index keyed by df's index labels (CSV row numbers);
+            built from df once and cached if omitted.
+        require_all: Keep only chunks containing every query term (posting-list
+            intersection) instead of any of them.
 
     Returns:
         DataFrame of top-k rows sorted by hybrid_score.
     """
-    # 1) Keyword overlap score
-    keywords = set(re.findall(r"\w+", query.lower()))
-    if keywords:
-        df = df.copy()
-        df['kw_score'] = df['content'].apply(
-            lambda txt: len(keywords & set(re.findall(r"\w+", txt.lower()))) / len(keywords)
-        )
-    else:
-        df = df.copy()
-        df['kw_score'] = 0.0
-
-    # 2) Pre-filter: keep chunks with any keyword match
-    filtered = df[df['kw_score'] > 0].copy()
-    if filtered.empty:
-        filtered = df.copy()
-        filtered['kw_score'] = 0.0
+    if bm25 is None:
+        bm25 = get_chunk_index(df)
+
+    # 1) Keyword score: BM25 from the inverted index, scaled to [0, 1] by the best match
+    kw_scores = bm25.aligned_scores(query, df.index, require_all=require_all)
+    if kw_scores.max(initial=0.0) > 0:
+        kw_scores = kw_scores / kw_scores.max()
+
+    # 2) Pre-filter: keep chunks with a keyword match (any term, or every term with require_all)
+    positions = np.flatnonzero(kw_scores > 0)
+    if len(positions) == 0:
+        positions = np.arange(len(df))
+    filtered = df.iloc[positions].copy()
+    filtered['kw_score'] = kw_scores[positions]
 
     # 3) Embed the query once
-    q_emb = embed_query(query, client)
+    q_emb = embed_query(query, get_client())
 
-    # 4) Semantic similarity score
-    filtered['sem_score'] = filtered['embedding_vectors'].apply(
-        lambda vec: cosine_similarity(q_emb, vec)
-    )
+    # 4) Semantic similarity score: one batched dot product against the cached,
+    #    pre-normalized float32 matrix, restricted to the pre-filtered rows
+    q_vec = np.asarray(q_emb, dtype=np.float32)
+    q_vec /= np.linalg.norm(q_vec)
+    filtered['sem_score'] = get_embedding_matrix(df)[positions] @ q_vec
 
     # 5) Combined hybrid score
     alpha = 1 - keyword_weight
@@ -75,9 +81,10 @@ def run_hybrid(
     # Load pre-embedded chunks
     df = pd.read_csv(csv_path, encoding='utf-8')
     df['embedding_vectors'] = df['vectors'].apply(lambda s: json.loads(s))
+    bm25 = BM25Index.load(DEFAULT_INDEX_PATH) if os.path.exists(DEFAULT_INDEX_PATH) else None
 
     # Run the search
-    results = hybrid_search(query, df, keyword_weight=keyword_weight, k=k)
+    results = hybrid_search(query, df, keyword_weight=keyword_weight, k=k, bm25=bm25)
 
     # Display
     for rank, row in results.reset_index(drop=True).iterrows():
@@ -87,10 +94,8 @@ def run_hybrid(
 
     return results
 
-results = run_hybrid("What is the step 1 of autostep200 masking guidance", keyword_weight=0.3, k=3)
-
-query= "What is the main idea of the document?"
-# Inspect the returned answers
-print(results[['content','hybrid_score']])
+if __name__ == "__main__":
+    results = run_hybrid("What is the step 1 of autostep200 masking guidance", keyword_weight=0.3, k=3)
 
-set(re.findall(r"\w+", query.lower()))
+    # Inspect the returned answers
+    print(results[['content','hybrid_score']])
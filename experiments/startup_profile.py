@@ -0,0 +1,130 @@
+"""
+Cold-start profiler for the Chat page.
+
+    python -m experiments.startup_profile [--top 20] [--match backend] [--no-data] [--no-client]
+
+Starts a fresh interpreter with -X importtime that imports frontend/pages/Chat.py and then
+runs the page's startup steps (search-module imports, embeddings load, keyword index, table
+store, OpenAI client) inside startup_timing spans, as a Railway restart would. Prints the
+total wall time, each span, the slowest top-level imports by cumulative time, and import
+self time summed per package. --match lists every module whose name contains the text,
+e.g. --match backend for the project's own modules.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE_MODULE = "frontend.pages.Chat"
+# What Chat.main() imports after the header is drawn
+SEARCH_MODULES = [
+    "backend.ai_services.vector_search",
+    "backend.ai_services.openai_client",
+    "backend.ai_services.hybrid_search",
+    "backend.ai_services.query_expansion",
+    "backend.ai_services.reranker",
+    "backend.ai_services.diversify",
+    "backend.ai_services.context_expansion",
+    "backend.ai_services.conversation",
+    "backend.ai_services.openai_services",
+    "backend.ai_services.prompt_builder",
+    "backend.ai_services.fast_path",
+]
+RESULT_MARKER = "__startup_profile__"
+
+# Runs in the profiled interpreter; a failing step is reported and the rest still run.
+# Modules are loaded with __import__ because -X importtime does not time importlib.import_module.
+CHILD = r"""
+import json, os, sys, time
+start = time.perf_counter()
+os.chdir({root!r})
+sys.path.insert(0, {root!r})
+from backend.ai_services.startup_timing import span, SPANS
+errors = []
+def step(name, fn):
+    try:
+        with span(name):
+            return fn()
+    except Exception as e:
+        errors.append(f"{{name}}: {{type(e).__name__}}: {{e}}")
+page = step("import page (first paint)", lambda: __import__({page!r}, fromlist=["main"]))
+step("import search modules", lambda: [__import__(m) for m in {modules!r}])
+if page is not None and {data!r}:
+    step("load embeddings", page.load_data)
+    step("load keyword index", page.load_keyword_index)
+    step("load table store", page.load_table_store)
+if {client!r}:
+    step("create OpenAI client", lambda: __import__("backend.ai_services.openai_client", fromlist=["get_client"]).get_client())
+print({marker!r} + json.dumps({{"spans": list(SPANS), "errors": errors, "total": time.perf_counter() - start}}))
+"""
+
+def parse_importtime(stderr):
+    """(module, self µs, cumulative µs, nesting level) per line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line.split("|")
+        if len(parts) != 3:
+            continue
+        raw = parts[2].rstrip()
+        level = (len(raw) - len(raw.lstrip()) - 1) // 2
+        rows.append((raw.strip(), int(parts[0].split(":")[1]), int(parts[1]), level))
+    return rows
+
+def profile(data=True, client=True):
+    code = CHILD.format(root=PROJECT_ROOT, page=PAGE_MODULE, modules=SEARCH_MODULES, data=data,
+                        client=client, marker=RESULT_MARKER)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                          cwd=PROJECT_ROOT)
+    wall = time.perf_counter() - started
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            result = json.loads(line[len(RESULT_MARKER):])
+    if result is None:
+        raise RuntimeError(f"Profiled interpreter failed:\n{proc.stderr[-2000:]}")
+    return wall, result, parse_importtime(proc.stderr)
+
+def report(wall, result, imports, top=20, match=None):
+    print(f"Cold start: {wall * 1000:.0f} ms wall, {result['total'] * 1000:.0f} ms after interpreter start")
+    print("\nStartup spans")
+    for name, seconds in result["spans"]:
+        print(f"  {seconds * 1000:9.1f} ms  {name}")
+    for error in result["errors"]:
+        print(f"  failed: {error}")
+
+    print(f"\nSlowest top-level imports (cumulative, top {top})")
+    for name, _, cumulative, _ in sorted((r for r in imports if r[3] == 0), key=lambda r: -r[2])[:top]:
+        print(f"  {cumulative / 1000:9.1f} ms  {name}")
+
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in imports:
+        by_package[name.split(".")[0]] += self_us
+    total = sum(by_package.values())
+    print(f"\nImport self time by package (top {top} of {total / 1000:.0f} ms)")
+    for package, self_us in sorted(by_package.items(), key=lambda p: -p[1])[:top]:
+        print(f"  {self_us / 1000:9.1f} ms  {100 * self_us / max(total, 1):5.1f}%  {package}")
+
+    if match:
+        print(f"\nModules matching {match!r} (cumulative / self)")
+        for name, self_us, cumulative, _ in sorted((r for r in imports if match in r[0]), key=lambda r: -r[2]):
+            print(f"  {cumulative / 1000:9.1f} ms  {self_us / 1000:8.1f} ms  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--match", help="also list every module whose name contains this text")
+    parser.add_argument("--no-data", action="store_true", help="skip loading the embeddings, index and table store")
+    parser.add_argument("--no-client", action="store_true", help="skip creating the OpenAI client")
+    args = parser.parse_args()
+    wall, result, imports = profile(data=not args.no_data, client=not args.no_client)
+    report(wall, result, imports, top=args.top, match=args.match)
+
+if __name__ == "__main__":
+    main()
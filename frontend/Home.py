@@ -1,4 +1,10 @@
 import streamlit as st
+import sys
+import os
+
+# Project root on sys.path, as in pages/Chat.py, so both pages share frontend.knowledge_base
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frontend.knowledge_base import start_warm_up
 
 st.set_page_config(
     page_title="UCSB Nanofab - Home",
@@ -8,6 +14,9 @@ st.set_page_config(
 )
 
 def main():
+    # frontend/serve.py already started the warm-up; this covers a plain `streamlit run` and retries a failed one
+    start_warm_up()
+    
     # MINIMAL CSS - Only headers, sidebars, and content cards
     st.markdown("""
     <style>
@@ -0,0 +1,95 @@
+import streamlit as st
+import json
+import os
+from backend.ai_services import warmup
+
+# Loaders shared by the pages. Cached per process (not per session), so the warm-up thread
+# started by whichever page is opened first fills the same caches the Chat page reads.
+frontend_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(frontend_dir)
+
+# Seconds a question waits for an unfinished warm-up before searching anyway
+WARMUP_WAIT_S = 30.0
+
+@st.cache_resource(show_spinner=False)
+def load_data():
+    """
+    Load the embedded data, once per process.
+
+    Raises instead of returning None when the file is missing or unreadable: Streamlit
+    caches return values but not exceptions, so the next run retries once the data appears.
+    Runs on the warm-up thread too, so it logs rather than calling st.error.
+    """
+    import pandas as pd
+    from backend.ai_services.content_types import add_content_columns
+    try:
+        embeddings_path = os.path.join(project_root, "csv_dataframes", "embeddings", "chunked_pages_with_embeddings.csv")
+        
+        if not os.path.exists(embeddings_path):
+            alt_paths = [
+                "csv_dataframes/embeddings/chunked_pages_with_embeddings.csv",
+                "../csv_dataframes/embeddings/chunked_pages_with_embeddings.csv",
+                "../../csv_dataframes/embeddings/chunked_pages_with_embeddings.csv"
+            ]
+            
+            for alt_path in alt_paths:
+                if os.path.exists(alt_path):
+                    embeddings_path = alt_path
+                    break
+            else:
+                raise FileNotFoundError(f"Embeddings file not found: {embeddings_path}")
+            
+        df = pd.read_csv(embeddings_path)
+        
+        # Convert JSON string embeddings back to lists
+        df['embedding_vectors'] = df['vectors'].apply(
+            lambda x: json.loads(x) if pd.notna(x) and x != 'None' else None
+        )
+        
+        # Filter out rows without embeddings
+        df_with_embeddings = df[df['embedding_vectors'].notna()].copy()
+        
+        # Categorical content_type with its display fields, as written by the chunking step
+        add_content_columns(df_with_embeddings)
+        # Opt-in: keep PQ codes in RAM and the float32 vectors memmapped, instead of the full matrix
+        pq_index_path = os.getenv("PQ_INDEX_PATH")
+        if pq_index_path:
+            from backend.ai_services.vector_search import use_pq_index
+            use_pq_index(df_with_embeddings, os.path.join(project_root, pq_index_path))
+        return df_with_embeddings
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        raise
+
+@st.cache_resource
+def load_keyword_index():
+    """Load the BM25 index written by the embedding step (None if it hasn't been built yet)"""
+    from backend.ai_services.bm25_index import BM25Index, DEFAULT_INDEX_PATH
+    index_path = os.path.join(project_root, DEFAULT_INDEX_PATH)
+    if not os.path.exists(index_path):
+        return None
+    return BM25Index.load(index_path)
+
+@st.cache_resource
+def load_table_store():
+    """Load the typed table store written by the chunking step (None if it hasn't been built yet)"""
+    from backend.ai_services.table_store import TableStore, DEFAULT_STORE_DIR, CATALOG_FILE
+    store_path = os.path.join(project_root, DEFAULT_STORE_DIR)
+    if not os.path.exists(os.path.join(store_path, CATALOG_FILE)):
+        return None
+    return TableStore.load(store_path)
+
+def load_resources():
+    return {'df': load_data(), 'bm25': load_keyword_index(), 'table_store': load_table_store()}
+
+def start_warm_up():
+    """
+    Warm the search stack in the background, once per process: data, index, client and a
+    dummy search. Called by frontend/serve.py at process start and again by the pages (a
+    no-op unless a failed warm-up is due for a retry). Set READINESS_PORT to also serve
+    GET /ready, which turns 200 once it succeeds.
+    """
+    return warmup.start_warm_up(load_resources, readiness_port=os.getenv("READINESS_PORT"))
+
+def wait_until_ready(timeout=WARMUP_WAIT_S):
+    return warmup.wait_until_ready(timeout)
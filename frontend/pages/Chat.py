@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import json
 import sys
 import os
@@ -11,9 +10,10 @@ parent_dir = os.path.dirname(current_dir)
 grandparent_dir = os.path.dirname(parent_dir)
 sys.path.append(grandparent_dir)
 
-# Now import from the correct backend modules
-from backend.ai_services.vector_search import vector_similarity_search, client
-from backend.ai_services.openai_services import generate_response_with_context
+# Backend search modules (pandas, numpy, the OpenAI SDK) are imported inside main() once the
+# page header is drawn, so a cold start paints before they load
+from backend.ai_services.startup_timing import span
+from frontend.knowledge_base import load_data, load_keyword_index, load_table_store, start_warm_up, wait_until_ready
 
 def init_theme():
     """Initialize theme in session state if not exists"""
@@ -24,61 +24,9 @@ def toggle_theme():
     """Toggle between dark and light mode"""
     st.session_state.dark_mode = not st.session_state.dark_mode
 
-def load_data():
-    """Load the embedded data"""
-    try:
-        # Get the project root directory
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        frontend_dir = os.path.dirname(current_dir)
-        project_root = os.path.dirname(frontend_dir)
-        embeddings_path = os.path.join(project_root, "csv_dataframes", "embeddings", "chunked_pages_with_embeddings.csv")
-        
-        if not os.path.exists(embeddings_path):
-            alt_paths = [
-                "csv_dataframes/embeddings/chunked_pages_with_embeddings.csv",
-                "../csv_dataframes/embeddings/chunked_pages_with_embeddings.csv",
-                "../../csv_dataframes/embeddings/chunked_pages_with_embeddings.csv"
-            ]
-            
-            for alt_path in alt_paths:
-                if os.path.exists(alt_path):
-                    embeddings_path = alt_path
-                    break
-            else:
-                return None
-            
-        df = pd.read_csv(embeddings_path)
-        
-        # Convert JSON string embeddings back to lists
-        df['embedding_vectors'] = df['vectors'].apply(
-            lambda x: json.loads(x) if pd.notna(x) and x != 'None' else None
-        )
-        
-        # Filter out rows without embeddings
-        df_with_embeddings = df[df['embedding_vectors'].notna()].copy()
-        
-        # Ensure content_type column exists
-        if 'content_type' not in df_with_embeddings.columns:
-            df_with_embeddings['content_type'] = 'text'
-            
-            for idx, row in df_with_embeddings.iterrows():
-                title = str(row.get('title', '')).lower()
-                content = str(row.get('content', ''))
-                
-                if 'table' in title and 'row' in title:
-                    df_with_embeddings.at[idx, 'content_type'] = 'table_row'
-                elif 'table' in title:
-                    df_with_embeddings.at[idx, 'content_type'] = 'table'
-                elif content.startswith('{') and content.endswith('}'):
-                    df_with_embeddings.at[idx, 'content_type'] = 'table_row'
-        
-        return df_with_embeddings
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return None
-
 def display_sources(sources):
     """Display sources with proper formatting based on content type"""
+    from backend.ai_services.content_types import chunk_display
     for i, source in enumerate(sources, 1):
         if isinstance(source, dict):
             content_type = source.get('content_type', 'text')
@@ -89,19 +37,8 @@ def display_sources(sources):
         else:
             continue
         
-        # Set icon and display type based on content type
-        if content_type == 'table_row':
-            icon = '📊'
-            display_type = 'Table Row'
-        elif content_type == 'table':
-            icon = '📋'
-            display_type = 'Complete Table'
-        elif content_type == 'text':
-            icon = '📄'
-            display_type = 'Text Content'
-        else:
-            icon = '📝'
-            display_type = 'Content'
+        # Icon and display type come with the result (stored at chunking time)
+        content_type, display_type, icon = chunk_display(source)
         
         # Display in expander
         with st.expander(f"{icon} Source {i}: {title} ({display_type}, Score: {score:.3f})"):
@@ -164,7 +101,11 @@ def convert_chunks_for_openai_service(retrieved_chunks):
             'content': chunk.get('content', ''),
             'chunk_number': chunk.get('chunk', 1),
             'content_type': chunk.get('content_type', 'text'),
-            'metadata': chunk.get('metadata', {})
+            'display_type': chunk.get('display_type'),
+            'icon': chunk.get('icon'),
+            'metadata': chunk.get('metadata', {}),
+            'row_position': chunk.get('row_position'),
+            'source_number': chunk.get('source_number')
         }
         converted_chunk = (chunk.get('score', 0.0), chunk_data)
         converted_chunks.append(converted_chunk)
@@ -181,6 +122,8 @@ def main():
     
     # Initialize theme
     init_theme()
+    # No-op after the first page load in this process
+    start_warm_up()
     
     # Theme toggle in top right
     col1, col2, col3 = st.columns([8, 1, 1])
@@ -331,19 +274,84 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # Load data
+    # Load the search stack and data
     with st.spinner("Loading knowledge base..."):
-        df = load_data()
-    
-    if df is None:
-        st.error("⚠️ Could not load the knowledge base. Please ensure the data files are available.")
-        st.stop()
+        with span("import search modules", once=True):
+            from backend.ai_services.vector_search import vector_similarity_search
+            from backend.ai_services.openai_client import get_client
+            from backend.ai_services.hybrid_search import hybrid_similarity_search
+            from backend.ai_services.query_expansion import multi_query_search
+            from backend.ai_services.reranker import rerank, LLMScorer
+            from backend.ai_services.diversify import diversify, DEFAULT_POOL
+            from backend.ai_services.context_expansion import expand_results
+            from backend.ai_services.conversation import ConversationState
+            from backend.ai_services.openai_services import generate_response_with_context
+            from backend.ai_services.prompt_builder import pack_context, DEFAULT_CONTEXT_BUDGET
+            from backend.ai_services.fast_path import extractive_answer, table_query_answer
+        try:
+            with span("load embeddings", once=True):
+                df = load_data()
+        except Exception as e:
+            st.error(f"⚠️ Could not load the knowledge base ({e}). Please ensure the data files are available.")
+            st.stop()
     
     st.success(f"✅ Knowledge base loaded with {len(df)} chunks!")
     
+    # Retrieval settings (hybrid needs the BM25 index from the embedding step)
+    with span("load keyword index", once=True):
+        bm25 = load_keyword_index()
+    with span("load table store", once=True):
+        table_store = load_table_store()
+    with st.sidebar:
+        retrieval_modes = ["Hybrid", "Semantic", "Multi-query"] if bm25 is not None else ["Semantic", "Multi-query"]
+        retrieval_mode = st.radio(
+            "🔎 Retrieval mode", retrieval_modes,
+            help="Hybrid fuses keyword (BM25) and semantic results so exact tool names and part numbers match; "
+                 "Multi-query also searches with rewrites and a hypothetical answer for vague questions"
+        )
+        keyword_weight = st.slider("Keyword weight", 0.0, 1.0, 0.5, 0.05, disabled=retrieval_mode != "Hybrid")
+        require_all_terms = st.checkbox(
+            "Match every keyword", disabled=retrieval_mode != "Hybrid",
+            help="Keyword candidates must contain all the words of the question, not just one"
+        )
+        use_reranker = st.checkbox(
+            f"Re-rank top {LLMScorer.candidates} candidates",
+            help="Grades the candidates with one batched LLM call; falls back to the search order if it is slow"
+        )
+        diversify_sources = st.checkbox(
+            "Diversify sources", value=True,
+            help="Skips near-duplicate chunks and table rows already covered by their complete table"
+        )
+        context_expansion = st.selectbox(
+            "Context around text hits", ["Neighbouring chunks", "Whole section", "Hit only"],
+            help="Searches small chunks but sends the surrounding passage of the page to the model"
+        )
+        content_type_filter = st.multiselect(
+            "Only content types", ["text", "table", "table_row", "image"],
+            help="Leave empty to search everything"
+        )
+        title_filter = st.text_input("Only pages/tools titled", placeholder="e.g. ASML, SOP")
+        search_filters = {'content_type': content_type_filter, 'title': title_filter.strip()}
+        context_budget = st.slider(
+            "Context budget (tokens)", 1000, 16000, DEFAULT_CONTEXT_BUDGET, 500,
+            help="Sources are packed by relevance up to this size; large tables keep only the rows matching the question"
+        )
+        instant_answers = st.checkbox(
+            "Instant answers from table rows", value=True,
+            help="Simple lookups (e.g. an etch rate) and list questions with a comparison over one tool's tables "
+                 "(e.g. which ICP recipes have a rate above 100 nm/min) are answered without calling the model"
+        )
+        use_history = st.checkbox(
+            "Use conversation history", value=True,
+            help="Follow-up questions are rewritten into standalone searches; sources already sent are reused"
+        )
+    
     # Chat interface
     if "messages" not in st.session_state:
         st.session_state.messages = []
+    if "conversation" not in st.session_state:
+        st.session_state.conversation = ConversationState()
+    conversation = st.session_state.conversation
     
     # Display chat messages
     for message in st.session_state.messages:
@@ -358,18 +366,93 @@ def main():
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
+        # The first question after a deploy waits for warm-up rather than racing it
+        if not wait_until_ready(timeout=0):
+            with st.spinner("Warming up the search index..."):
+                wait_until_ready()
+        # Built on the first question (or by warm-up), then shared by every search and generation call
+        client = get_client()
         
         # Generate response
         with st.chat_message("assistant"):
             with st.spinner("Searching knowledge base..."):
                 try:
-                    retrieved_chunks = vector_similarity_search(prompt, df, client, k=5)
+                    pool_k = DEFAULT_POOL if diversify_sources else 5
+                    search_k = max(LLMScorer.candidates, pool_k) if use_reranker else pool_k
+                    # Numeric comparisons over table columns are answered by a scan of the table store
+                    table_answer = table_query_answer(prompt, table_store) \
+                        if instant_answers and table_store is not None else None
+                    search_query = conversation.standalone_query(prompt, client) \
+                        if use_history and not table_answer else prompt
+                    settings_key = (search_query, retrieval_mode, keyword_weight, require_all_terms, use_reranker,
+                                    diversify_sources, context_expansion, tuple(content_type_filter),
+                                    title_filter.strip())
+                    cached = None if table_answer else conversation.cached_results(settings_key)
+                    if table_answer:
+                        retrieved_chunks, row_answer = [], None
+                    elif cached is not None:
+                        retrieved_chunks, row_answer = cached
+                    else:
+                        # Multi-query embeds its own batch of queries, so only the other modes embed here
+                        if retrieval_mode == "Hybrid" and bm25 is not None:
+                            retrieved_chunks = hybrid_similarity_search(
+                                search_query, df, client, bm25, k=search_k, keyword_weight=keyword_weight,
+                                filters=search_filters, query_embedding=conversation.embed(search_query, client),
+                                require_all=require_all_terms
+                            )
+                        elif retrieval_mode == "Multi-query":
+                            retrieved_chunks = multi_query_search(
+                                search_query, df, client, k=search_k, filters=search_filters
+                            )
+                        else:
+                            retrieved_chunks = vector_similarity_search(
+                                search_query, df, client, k=search_k, filters=search_filters,
+                                query_embedding=conversation.embed(search_query, client)
+                            )
+                        if use_reranker:
+                            retrieved_chunks = rerank(search_query, retrieved_chunks, LLMScorer(client), top_n=pool_k)
+                        # Row lookups are checked before diversify folds table rows into their table
+                        row_answer = extractive_answer(prompt, retrieved_chunks)
+                        if diversify_sources:
+                            retrieved_chunks = diversify(retrieved_chunks, df, k=5)
+                        if context_expansion != "Hit only":
+                            mode = 'section' if context_expansion == "Whole section" else 'neighbours'
+                            retrieved_chunks = expand_results(retrieved_chunks, df, mode=mode)
+                        conversation.remember_results(settings_key, (retrieved_chunks, row_answer))
                     
-                    if retrieved_chunks:
-                        converted_chunks = convert_chunks_for_openai_service(retrieved_chunks)
+                    fast_answer = table_answer or (row_answer if instant_answers else None)
+                    if fast_answer:
+                        response, sources = fast_answer
+                        st.markdown(response)
+                        st.caption("Answered directly from table rows, no model call")
+                        with st.expander("📚 Sources"):
+                            display_sources(sources)
+                        st.session_state.messages.append({
+                            "role": "assistant",
+                            "content": response,
+                            "sources": sources
+                        })
+                        if use_history:
+                            conversation.record_turn(prompt, search_query, [], [], response)
+                    elif retrieved_chunks:
+                        if use_history:
+                            new_chunks, reused_sources = conversation.split_sources(retrieved_chunks)
+                            history = conversation.history()
+                        else:
+                            new_chunks, reused_sources, history = retrieved_chunks, None, None
+                        # Packed here (once) so the conversation records exactly what was sent
+                        request_stats = {}
+                        converted_chunks = pack_context(
+                            prompt, convert_chunks_for_openai_service(new_chunks), context_budget, stats=request_stats
+                        )
+                        if use_history:
+                            conversation.number_sources(converted_chunks)
                         
                         try:
-                            result = generate_response_with_context(prompt, converted_chunks, client)
+                            result = generate_response_with_context(
+                                prompt, converted_chunks, client, history=history, reused_sources=reused_sources,
+                                context_budget=context_budget, stats=request_stats, packed=True
+                            )
                             
                             if isinstance(result, tuple) and len(result) == 2:
                                 response, openai_sources = result
@@ -377,6 +460,8 @@ def main():
                             else:
                                 response = result
                                 sources = retrieved_chunks
+                            if use_history:
+                                conversation.record_turn(prompt, search_query, converted_chunks, reused_sources, response)
                                 
                         except Exception as e:
                             st.error(f"Error generating response: {e}")
@@ -384,6 +469,15 @@ def main():
                             sources = retrieved_chunks
                         
                         st.markdown(response)
+                        if 'prompt_tokens_estimate' in request_stats:
+                            st.caption(
+                                f"Context: {request_stats['context_tokens']}/{context_budget} tokens from "
+                                f"{request_stats['sources_packed']} sources ({request_stats['sources_compressed']} compressed, "
+                                f"{request_stats['sources_dropped']} dropped) · prompt "
+                                f"{request_stats.get('prompt_tokens', request_stats['prompt_tokens_estimate'])} tokens"
+                                f" ({request_stats.get('cached_tokens', 0)} cached)"
+                                f" · {request_stats['route']['model']} ({request_stats['route']['tier']})"
+                            )
                         
                         with st.expander("📚 Sources"):
                             display_sources(sources)
@@ -440,6 +534,7 @@ def main():
         
         if st.button("🗑️ Clear Chat History", key="clear_chat", use_container_width=True):
             st.session_state.messages = []
+            st.session_state.conversation = ConversationState()
             st.rerun()
 
 if __name__ == "__main__":
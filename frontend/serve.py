@@ -0,0 +1,25 @@
+"""
+Process entrypoint for deployments (see railway.toml):
+
+    python frontend/serve.py --server.port $PORT --server.address 0.0.0.0
+
+Starts the warm-up thread, and the readiness endpoint when READINESS_PORT is set, before
+Streamlit accepts its first session, then runs Streamlit in this same process so the
+per-process caches the warm-up fills are the ones the pages read. Arguments are passed on
+to `streamlit run frontend/Home.py`.
+"""
+import os
+import sys
+
+frontend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(frontend_dir))
+from frontend.knowledge_base import start_warm_up
+
+def main():
+    start_warm_up()
+    from streamlit.web import cli
+    sys.argv = ["streamlit", "run", os.path.join(frontend_dir, "Home.py"), *sys.argv[1:]]
+    sys.exit(cli.main())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+from types import SimpleNamespace
+
+# Stands in for the OpenAI client in tests; records every chat request
+
+class StubClient:
+    def __init__(self, answer="stub answer", finish_reason="stop"):
+        self.requests = []
+        self.answer = answer
+        self.finish_reason = finish_reason
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **request):
+        self.requests.append(request)
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, prompt_tokens_details=None)
+        choice = SimpleNamespace(message=SimpleNamespace(content=self.answer), finish_reason=self.finish_reason)
+        return SimpleNamespace(choices=[choice], usage=usage)
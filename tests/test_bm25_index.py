@@ -0,0 +1,57 @@
+import math
+from collections import Counter
+import numpy as np
+import pandas as pd
+from backend.ai_services.bm25_index import BM25Index, tokenize, get_chunk_index
+
+DOCS = [
+    "ASML PAS 5500 stepper lithography SOP",
+    "Etch rate of SiO2 in the ICP etcher is 100 nm/min",
+    "ICP etcher recipes: SiO2, Si3N4 and photoresist ashing",
+    "Lithography bay: MLA150 maskless aligner and ASML stepper",
+    "Thermal oxide furnace for SiO2 growth",
+]
+
+def reference_scores(query, docs, k1=1.5, b=0.75):
+    """Per-query Okapi BM25 over the raw texts, as computed before the index existed"""
+    tokenized = [tokenize(d) for d in docs]
+    avgdl = sum(len(t) for t in tokenized) / len(tokenized)
+    scores = []
+    for terms in tokenized:
+        tf = Counter(terms)
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in t for t in tokenized)
+            if not tf[term]:
+                continue
+            idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(terms) / avgdl))
+        scores.append(score)
+    return np.asarray(scores)
+
+def test_scores_match_per_query_scorer():
+    index = BM25Index.build(DOCS)
+    for query in ["SiO2 etch rate", "ASML stepper", "ICP etcher photoresist", "unknown words"]:
+        np.testing.assert_allclose(index.scores(query), reference_scores(query, DOCS), rtol=1e-5, atol=1e-6)
+
+def test_require_all_keeps_documents_with_every_term():
+    index = BM25Index.build(DOCS, doc_ids=[10, 11, 12, 13, 14])
+    _, any_term = index.search("ICP SiO2", k=10)
+    _, all_terms = index.search("ICP SiO2", k=10, require_all=True)
+    assert set(any_term.tolist()) == {11, 12, 14}
+    assert set(all_terms.tolist()) == {11, 12}
+
+def test_aligned_scores_follow_labels():
+    index = BM25Index.build(DOCS, doc_ids=[10, 11, 12, 13, 14])
+    aligned = index.aligned_scores("thermal oxide", pd.Index([14, 99, 10]))
+    assert aligned[0] > 0 and aligned[1] == 0 and aligned[2] == 0
+
+def test_save_and_load(tmp_path):
+    index = BM25Index.build(DOCS)
+    index.save(tmp_path / "bm25.npz")
+    loaded = BM25Index.load(tmp_path / "bm25.npz")
+    np.testing.assert_allclose(loaded.scores("SiO2 etcher"), index.scores("SiO2 etcher"))
+
+def test_chunk_index_is_built_once_per_frame():
+    df = pd.DataFrame({'title': ["a", "b"], 'content': DOCS[:2]})
+    assert get_chunk_index(df) is get_chunk_index(df)
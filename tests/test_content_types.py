@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from backend.ai_services.content_types import add_content_columns, chunk_display, DISPLAY
+
+def chunks():
+    return pd.DataFrame({
+        'title': ["Etch - table_1", "Etch - table_1 - Row 2", "Furnace SOP"],
+        'content': ["| a | b |", '{"Recipe": "SiO2"}', "Load the wafers"],
+    })
+
+def test_csv_round_trip_restores_the_columns(tmp_path):
+    df = add_content_columns(chunks())
+    assert df['content_type'].tolist() == ["table", "table_row", "text"]
+    df.to_csv(tmp_path / "chunks.csv", index=False)
+    loaded = add_content_columns(pd.read_csv(tmp_path / "chunks.csv"))
+    for column in ('content_type', 'display_type', 'icon'):
+        assert loaded[column].dtype == 'category'
+        assert loaded[column].tolist() == df[column].tolist()
+    assert loaded['display_type'].tolist() == [DISPLAY[t][0] for t in df['content_type']]
+
+def test_missing_display_cells_are_filled():
+    df = chunks()
+    df['display_type'] = ["Custom", np.nan, np.nan]
+    df['icon'] = [np.nan, "X", np.nan]
+    df = add_content_columns(df)
+    assert df['display_type'].tolist() == ["Custom", "Table Row", "Text Content"]
+    assert df['icon'].tolist() == [DISPLAY["table"][1], "X", DISPLAY["text"][1]]
+
+def test_chunk_display_ignores_nan():
+    assert chunk_display({'content_type': "table", 'display_type': np.nan, 'icon': None}) == \
+        ("table", *DISPLAY["table"])
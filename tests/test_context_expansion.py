@@ -0,0 +1,22 @@
+import pandas as pd
+from backend.ai_services.context_expansion import expand_results, get_neighbour_map
+
+def page():
+    return pd.DataFrame({
+        'url': ["https://wiki/A"] * 4,
+        'chunk_number': [1, 2, 3, 4],
+        'content_type': ['text'] * 4,
+        'content': ["## Setup", "Load the wafer.", "## Exposure", "Expose for 2 s."],
+    })
+
+def test_neighbour_map_follows_rows_added_in_place():
+    df = page()
+    assert len(get_neighbour_map(df)) == 4
+    df.loc[4] = ["https://wiki/A", 5, 'text', "Unload."]
+    assert get_neighbour_map(df)[("https://wiki/A", 5)] == 4
+
+def test_neighbours_and_sections():
+    df = page()
+    hit = {'url': "https://wiki/A", 'chunk': 2, 'content_type': 'text', 'content': "Load the wafer."}
+    assert expand_results([hit], df, window=1)[0]['expanded_chunks'] == [1, 2, 3]
+    assert expand_results([hit], df, mode='section')[0]['expanded_chunks'] == [1, 2]
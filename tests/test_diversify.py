@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from backend.ai_services.diversify import mmr_select, relevance_scores, collapse_table_families, diversify
+
+def test_mmr_skips_near_duplicates():
+    vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    relevance = np.array([0.9, 0.89, 0.7], dtype=np.float32)
+    assert mmr_select(relevance, vectors, 2, lambda_mult=0.5) == [0, 2]
+    # Pure relevance keeps the duplicate
+    assert mmr_select(relevance, vectors, 2, lambda_mult=1.0) == [0, 1]
+
+def test_relevance_prefers_rerank_then_fused_score():
+    results = [{'score': 0.9, 'fused_score': 0.01, 'rerank_score': 2},
+               {'score': 0.5, 'fused_score': 0.03, 'rerank_score': 8}]
+    assert relevance_scores(results).tolist() == [0.0, 1.0]
+    for r in results:
+        del r['rerank_score']
+    assert relevance_scores(results).tolist() == [0.0, 1.0]
+    assert np.allclose(relevance_scores([{'score': 0.9}, {'score': 0.5}]), [0.9, 0.5])
+
+def test_rows_fold_into_their_retrieved_table():
+    results = [{'content_type': 'table_row', 'url': "u", 'title': "Etch - table_1 - Row 3"},
+               {'content_type': 'text', 'url': "u", 'title': "Etch"},
+               {'content_type': 'table', 'url': "u", 'title': "Etch - table_1"}]
+    assert [r['content_type'] for r in collapse_table_families(results)] == ['table', 'text']
+
+def test_diversify_keeps_the_reranker_order():
+    df = pd.DataFrame({'embedding_vectors': [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]]})
+    results = [{'row_position': i, 'content_type': 'text', 'score': score, 'rerank_score': rerank}
+               for i, (score, rerank) in enumerate([(0.9, 1), (0.5, 9), (0.7, 5)])]
+    picked = diversify(results, df, k=3, lambda_mult=1.0)
+    assert [r['rerank_score'] for r in picked] == [9, 5, 1]
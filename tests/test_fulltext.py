@@ -0,0 +1,21 @@
+import os
+import re
+import sys
+
+# database/ holds flat scripts that import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database"))
+from fulltext import part_numbers, part_number_tsquery, PART_NUMBERS_FUNCTION, PART_NUMBER_REGEX
+
+def test_part_numbers_are_kept_whole():
+    text = "Spin SPR-220-3.0 or AZ4210, then S1813 on SiO2 and develop in MF-26A for 60 s."
+    assert part_numbers(text) == ["az4210", "mf-26a", "s1813", "sio2", "spr-220-3.0"]
+    assert part_numbers("plain words, 1.5 um and -220") == []
+
+def test_query_matches_longer_part_numbers_by_prefix():
+    assert part_number_tsquery("spin speed for SPR-220?") == "'spr-220':*"
+    assert part_number_tsquery("AZ4210 vs S1813") == "'az4210':* | 's1813':*"
+    assert part_number_tsquery("no part numbers here") == ""
+
+def test_sql_function_uses_the_same_pattern():
+    assert "\\m(" + PART_NUMBER_REGEX + ")\\M" in PART_NUMBERS_FUNCTION
+    assert re.fullmatch(PART_NUMBER_REGEX, "SPR-220-3.0")
@@ -0,0 +1,21 @@
+import numpy as np
+from backend.ai_services.hybrid_search import reciprocal_rank_fusion, normalized_score_fusion
+
+def test_rrf_rewards_agreement_between_lists():
+    fused = reciprocal_rank_fusion([np.array([1, 2, 3]), np.array([3, 1, 4])], [0.5, 0.5])
+    ranking = sorted(fused, key=fused.get, reverse=True)
+    # 1 is near the top of both lists, 4 appears once at the bottom
+    assert ranking[0] == 1 and ranking[-1] == 4
+    assert fused[2] < fused[3]
+
+def test_rrf_weights_shift_the_order():
+    lists = [np.array([1, 2]), np.array([2, 1])]
+    keyword_heavy = reciprocal_rank_fusion(lists, [0.9, 0.1])
+    dense_heavy = reciprocal_rank_fusion(lists, [0.1, 0.9])
+    assert keyword_heavy[1] > keyword_heavy[2]
+    assert dense_heavy[2] > dense_heavy[1]
+
+def test_normalized_score_fusion_scales_each_list():
+    fused = normalized_score_fusion([(np.array([10.0, 5.0]), np.array([1, 2])),
+                                     (np.array([0.9, 0.8]), np.array([2, 3]))], [0.5, 0.5])
+    assert fused == {1: 0.5, 2: 0.5, 3: 0.0}
@@ -0,0 +1,26 @@
+import gc
+import pandas as pd
+from backend.ai_services import index_utils
+from backend.ai_services.index_utils import cached_per_frame
+
+def test_built_once_per_frame_and_rebuilt_when_it_changes_length():
+    builds = []
+    def build(df):
+        builds.append(len(df))
+        return len(df)
+    df = pd.DataFrame({'a': [1, 2]})
+    assert cached_per_frame(df, 'rows', build) == cached_per_frame(df, 'rows', build) == 2
+    df.loc[2] = 3
+    assert cached_per_frame(df, 'rows', build) == 3
+    assert builds == [2, 3]
+    # Another name is another entry for the same frame
+    assert cached_per_frame(df, 'other', lambda d: 'x') == 'x'
+
+def test_entries_are_dropped_with_their_frame():
+    df = pd.DataFrame({'a': [1]})
+    cached_per_frame(df, 'rows', len)
+    key = ('rows', id(df))
+    assert key in index_utils._frame_cache
+    del df
+    gc.collect()
+    assert key not in index_utils._frame_cache
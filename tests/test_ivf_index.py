@@ -0,0 +1,22 @@
+import numpy as np
+from backend.ai_services.ivf_index import IVFIndex
+from vector_data import clustered_vectors, recall
+
+
+def test_ivf_recall_against_brute_force():
+    vectors = clustered_vectors()
+    queries = vectors[:50] + 0.05
+    index = IVFIndex(nlist=32, nprobe=8).fit(vectors)
+    assert recall(lambda q: index.search(q, k=10), vectors, queries) >= 0.9
+    # Probing every cell is exact
+    assert recall(lambda q: index.search(q, k=10, nprobe=32), vectors, queries) == 1.0
+
+def test_ivf_add_and_remove():
+    vectors = clustered_vectors(n=500)
+    index = IVFIndex(nlist=8, nprobe=8).fit(vectors[:400])
+    index.add(vectors[400:], np.arange(400, 500))
+    assert len(index) == 500
+    assert index.search(vectors[450], k=1)[1].tolist() == [450]
+    index.remove([450])
+    assert len(index) == 499
+    assert 450 not in index.search(vectors[450], k=10)[1].tolist()
@@ -0,0 +1,27 @@
+from backend.ai_services.model_router import classify_question, route_question, ROUTES
+
+def test_short_lookups():
+    assert classify_question("What is the room number for the MLA150?")[0] == "lookup"
+    assert classify_question("etch rate of SiO2 in the ICP")[0] == "lookup"
+
+def test_complex_questions():
+    assert classify_question("Walk me through the full ASML stepper SOP")[0] == "complex"
+    assert classify_question("Compare the two ICP etchers")[0] == "complex"
+    assert classify_question(" ".join(["word"] * 40))[0] == "complex"
+
+def test_standard_questions():
+    assert classify_question("Is the MLA150 down? Who should I email?")[0] == "standard"
+    assert classify_question("Tell me about the evaporator")[0] == "standard"
+
+def test_route_carries_the_tier_settings():
+    route = route_question("Compare the two ICP etchers")
+    assert route['tier'] == "complex" and route['model'] == ROUTES["complex"]["model"]
+
+def test_single_keywords_do_not_make_a_question_complex():
+    for question in ["What is the SOP for the MLA150?", "Is there a full list of PECVD recipes?",
+                     "Where is the complete procedure for the Fiji?", "Who can help me plan a design review?"]:
+        assert classify_question(question)[0] != "complex", question
+
+def test_open_what_questions_are_not_lookups():
+    assert classify_question("What is the process for developing SPR-220 photoresist?")[0] == "standard"
+    assert classify_question("What is the SOP for the MLA150?")[0] == "standard"
@@ -0,0 +1,45 @@
+from backend.ai_services import openai_services
+from backend.ai_services.openai_services import generate_response_with_context
+from backend.ai_services.model_router import ROUTES
+from backend.ai_services.resilience import POLICIES
+from backend.ai_services.prompt_builder import pack_context, count_tokens
+from stub_openai import StubClient
+
+def chunks():
+    return [(0.9, {'title': "MLA150", 'url': "https://wiki/MLA150", 'chunk_number': 1, 'content_type': 'text',
+                   'content': "The MLA150 is in room 1101."})]
+
+def test_packed_call_without_stats_returns_the_answer():
+    client = StubClient()
+    packed = pack_context("Where is the MLA150?", chunks())
+    answer, sources = generate_response_with_context("Where is the MLA150?", packed, client, packed=True)
+    assert answer == "stub answer"
+    assert len(sources) == 1 and len(client.requests) == 1
+
+def test_packing_stats_are_kept_when_packed_once():
+    stats = {}
+    budget = count_tokens(chunks()[0][1]['content'])
+    packed = pack_context("Where is the MLA150?", chunks() * 3, budget=budget, stats=stats)
+    generate_response_with_context("Where is the MLA150?", packed, StubClient(), stats=stats, packed=True)
+    assert stats['sources_dropped'] == 2
+    assert stats['completion_tokens'] == 20 and stats['truncated'] is False
+
+def test_each_tier_sends_its_model_and_cap():
+    for question, tier in [("What is the room number for the MLA150?", "lookup"),
+                           ("What is the SOP for the MLA150?", "standard"),
+                           ("Walk me through the ASML stepper SOP step by step", "complex")]:
+        client, stats = StubClient(), {}
+        generate_response_with_context(question, chunks(), client, stats=stats)
+        assert stats['route']['tier'] == tier
+        assert client.requests[0]['model'] == ROUTES[tier]['model']
+        assert client.requests[0]['max_tokens'] == ROUTES[tier]['max_tokens']
+
+def test_complex_answers_get_a_longer_deadline(monkeypatch):
+    deadlines = []
+    def record(name, fn, **overrides):
+        deadlines.append(overrides.get('deadline_s', POLICIES[name]['deadline_s']))
+        return fn(1.0)
+    monkeypatch.setattr(openai_services, "resilient_call", record)
+    generate_response_with_context("Compare the two ICP etchers", chunks(), StubClient())
+    generate_response_with_context("Where is the MLA150?", chunks(), StubClient())
+    assert deadlines == [ROUTES['complex']['deadline_s'], POLICIES['chat']['deadline_s']]
@@ -0,0 +1,41 @@
+import numpy as np
+from backend.ai_services.index_utils import top_k
+from backend.ai_services.pq_index import PQIndex
+from vector_data import clustered_vectors, recall
+
+def test_top_k_matches_full_sort():
+    scores = np.random.default_rng(1).normal(size=500).astype(np.float32)
+    values, positions = top_k(scores, 10)
+    assert positions.tolist() == np.argsort(-scores)[:10].tolist()
+    assert np.all(np.diff(values) <= 0)
+    assert len(top_k(scores, 0)[1]) == 0
+    assert len(top_k(scores[:3], 10)[1]) == 3
+
+def test_pq_recall_against_brute_force():
+    vectors = clustered_vectors()
+    queries = vectors[:50] + 0.05
+    index = PQIndex(m=16, nbits=8, rerank=100).fit(vectors)
+    assert recall(lambda q: index.search(q, k=10), vectors, queries) >= 0.9
+    ivf_pq = PQIndex(m=16, nbits=8, nlist=16, nprobe=8, rerank=100).fit(vectors)
+    assert recall(lambda q: ivf_pq.search(q, k=10), vectors, queries) >= 0.85
+
+def test_pq_save_and_load(tmp_path):
+    vectors = clustered_vectors(n=500)
+    index = PQIndex(m=8, nbits=6, rerank=20).fit(vectors)
+    index.save(str(tmp_path / "pq"))
+    loaded = PQIndex.load(str(tmp_path / "pq"))
+    query = vectors[7]
+    assert loaded.search(query, k=5)[1].tolist() == index.search(query, k=5)[1].tolist()
+
+def test_use_pq_index_keeps_only_codes_in_ram(tmp_path):
+    import pandas as pd
+    from backend.ai_services.vector_search import use_pq_index, get_embedding_matrix, vector_similarity_search
+    vectors = clustered_vectors(n=500)
+    df = pd.DataFrame({'title': [f"chunk {i}" for i in range(len(vectors))],
+                       'content': [f"text {i}" for i in range(len(vectors))],
+                       'embedding_vectors': list(vectors)})
+    use_pq_index(df, str(tmp_path / "pq"), m=8, nbits=6, rerank=20)
+    assert 'embedding_vectors' not in df.columns
+    assert isinstance(get_embedding_matrix(df), np.memmap)
+    results = vector_similarity_search("", df, None, k=3, query_embedding=vectors[42])
+    assert results[0]['row_position'] == 42
@@ -0,0 +1,34 @@
+from backend.ai_services.prompt_builder import pack_context, count_tokens, MIN_SOURCE_TOKENS
+
+def chunk(words, content_type='text'):
+    return {'content': " ".join(["wafer"] * words), 'content_type': content_type}
+
+def test_pack_context_stays_within_budget():
+    chunks = [(1.0, chunk(300)), (0.9, chunk(300)), (0.8, chunk(300))]
+    budget = count_tokens(chunks[0][1]['content']) * 2
+    stats = {}
+    packed = pack_context("wafer", chunks, budget=budget, max_source_tokens=budget, stats=stats)
+    assert stats['context_tokens'] <= budget
+    assert stats['sources_packed'] == len(packed) == 2
+    assert stats['sources_dropped'] == 1
+    assert stats['sources_compressed'] == 0
+
+def test_oversized_source_is_compressed_not_dropped():
+    stats = {}
+    packed = pack_context("wafer", [(1.0, chunk(2000))], budget=1000, max_source_tokens=200, stats=stats)
+    assert stats['sources_compressed'] == 1 and stats['sources_dropped'] == 0
+    assert packed[0][1]['token_count'] <= 200
+
+def test_small_remainder_drops_then_later_source_fits():
+    big, small = chunk(400), {'content': "short note", 'content_type': 'text'}
+    budget = count_tokens(big['content']) + MIN_SOURCE_TOKENS - 1
+    stats = {}
+    packed = pack_context("wafer", [(1.0, big), (0.9, chunk(400)), (0.8, small)], budget=budget,
+                          max_source_tokens=budget, stats=stats)
+    assert [row['content'] for _, row in packed] == [big['content'], "short note"]
+    assert stats['sources_dropped'] == 1
+
+def test_packing_twice_keeps_the_counts():
+    chunks = [(1.0, chunk(300)), (0.9, chunk(300))]
+    first = pack_context("wafer", chunks, budget=10000)
+    assert pack_context("wafer", first, budget=10000) == first
@@ -0,0 +1,36 @@
+import json
+import time
+
+from backend.ai_services.reranker import rerank, LLMScorer
+from stub_openai import StubClient
+
+class BoundedStubClient(StubClient):
+    def __init__(self, answer):
+        super().__init__(answer=answer)
+        self.options = []
+
+    def with_options(self, **options):
+        self.options.append(options)
+        return self
+
+class SlowScorer:
+    budget_s = 0.05
+
+    def score(self, query, texts):
+        time.sleep(0.5)
+        return [1.0] * len(texts)
+
+def test_llm_scorer_reorders_within_its_candidates():
+    results = [{'content': f"passage {i}"} for i in range(30)]
+    client = BoundedStubClient(json.dumps({"scores": [1, 9] + [0] * 18}))
+    ranked = rerank("question", results, LLMScorer(client), top_n=2)
+    assert [r['content'] for r in ranked] == ["passage 1", "passage 0"]
+    # Only the scorer's candidates are sent, in one completion bounded by its budget
+    assert client.requests[0]['max_tokens'] == 8 * LLMScorer.candidates + 20
+    assert client.options == [{'max_retries': 0, 'timeout': LLMScorer(client).budget_s}]
+
+def test_timeout_uses_the_scorer_budget_and_keeps_the_first_stage_order():
+    results = [{'content': "a"}, {'content': "b"}, {'content': "c"}]
+    started = time.perf_counter()
+    assert rerank("question", results, SlowScorer(), top_n=2) == results[:2]
+    assert time.perf_counter() - started < 0.4
@@ -0,0 +1,50 @@
+from backend.ai_services import resilience
+from backend.ai_services.resilience import CircuitBreaker
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_breaker_opens_after_threshold(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=3, reset_after_s=10.0)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+def test_half_open_lets_one_probe_through(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=1, reset_after_s=10.0)
+    breaker.record_failure()
+    clock.now += 10.0
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+def test_failed_probe_reopens(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=5, reset_after_s=10.0)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 10.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+def test_bounded_turns_off_sdk_retries_per_attempt():
+    class Client:
+        def with_options(self, **options):
+            return options
+    assert resilience.bounded(Client(), 2.5) == {'max_retries': 0, 'timeout': 2.5}
+    stub = object()
+    assert resilience.bounded(stub, 2.5) is stub
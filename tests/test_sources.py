@@ -0,0 +1,16 @@
+import os
+import sys
+import pytest
+
+# database/ holds flat scripts that import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database"))
+from sources import check_sources, all_partitions, source_for_url
+
+def test_known_sources_pass_through():
+    assert check_sources(None) is None
+    assert check_sources(all_partitions()) == all_partitions()
+    assert check_sources([source_for_url("https://wiki.nanofab.ucsb.edu/wiki/ASML")]) == ["nanofab"]
+
+def test_unknown_sources_are_named():
+    with pytest.raises(ValueError, match="items; DROP TABLE"):
+        check_sources(["nanofab", "items; DROP TABLE"])
@@ -0,0 +1,57 @@
+import numpy as np
+from backend.ai_services.table_store import typed_frame, table_id, TableStore, RAW_SUFFIX
+from backend.ai_services.fast_path import table_query_answer
+
+HEADERS = ["Recipe", "Rate (nm/min)", "Gas"]
+ROWS = [
+    {"Recipe": "SiO2", "Rate (nm/min)": "~1,200", "Gas": "CHF3"},
+    {"Recipe": "Si3N4", "Rate (nm/min)": "80", "Gas": "CF4"},
+    {"Recipe": "Resist", "Rate (nm/min)": "", "Gas": "O2"},
+]
+
+def test_typed_frame_parses_numeric_columns():
+    frame, names = typed_frame(HEADERS, ROWS)
+    assert names == {"recipe": "Recipe", "rate_nm_min": "Rate (nm/min)", "gas": "Gas"}
+    assert frame["rate_nm_min"].dtype == "float64"
+    assert frame["rate_nm_min"].tolist()[:2] == [1200.0, 80.0] and np.isnan(frame["rate_nm_min"][2])
+    assert frame["rate_nm_min" + RAW_SUFFIX].tolist()[0] == "~1,200"
+    # Gas names such as CHF3 are text, not numbers
+    assert frame["gas"].dtype == "string"
+
+def test_table_id_differs_per_page_url():
+    assert table_id("https://a/Etch", "Etch", "table_1") != table_id("https://b/Etch", "Etch", "table_1")
+
+def store_with_two_tools(path):
+    store = TableStore(path=str(path))
+    store.add_table("https://wiki/ICP_Etching_Recipes", "ICP_Etching_Recipes - table_1", "ICP_Etching_Recipes",
+                    "table_1", HEADERS, ROWS)
+    store.add_table("https://wiki/Sputter_Recipes", "Sputter_Recipes - table_1", "Sputter_Recipes", "table_1",
+                    ["Target", "Power (W)", "Rate (nm/min)"],
+                    [{"Target": "Ti", "Power (W)": "200", "Rate (nm/min)": "300"}])
+    return store
+
+def test_filter_scans_every_table(tmp_path):
+    store = store_with_two_tools(tmp_path)
+    assert store.filter("rate", ">", 100)["table_title"].tolist() == \
+        ["ICP_Etching_Recipes - table_1", "Sputter_Recipes - table_1"]
+
+def test_table_answer_is_scoped_to_the_named_tool(tmp_path):
+    store = store_with_two_tools(tmp_path)
+    answer, sources = table_query_answer("Which ICP recipes have a rate above 100?", store)
+    assert "SiO2" in answer and "Ti" not in answer
+    assert [s['url'] for s in sources] == ["https://wiki/ICP_Etching_Recipes"]
+    # Nothing matches: fall through to retrieval
+    assert table_query_answer("Which ICP recipes have a rate above 5000?", store) is None
+
+def test_non_list_questions_fall_through(tmp_path):
+    store = store_with_two_tools(tmp_path)
+    for question in ["What happens if the power is over 100 W on the ICP?",
+                     "Can I run the sputter at more than 150 W?",
+                     "Is an etch rate above 100 too fast for resist?"]:
+        assert table_query_answer(question, store) is None
+
+def test_questions_without_a_tool_fall_through(tmp_path):
+    store = store_with_two_tools(tmp_path)
+    assert table_query_answer("Which recipes have a rate above 100?", store) is None
+    # The ICP tables have no power column, so no other tool's rows are returned
+    assert table_query_answer("Which ICP recipes use a power above 100?", store) is None
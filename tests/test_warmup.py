@@ -0,0 +1,49 @@
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from backend.ai_services import warmup
+
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(warmup, "ready", threading.Event())
+    monkeypatch.setattr(warmup, "status", {"state": "idle", "steps": {}, "error": None})
+    monkeypatch.setattr(warmup, "_thread", None)
+    monkeypatch.setattr(warmup, "_failed_at", None)
+
+def test_failed_warm_up_is_not_ready_and_retries(monkeypatch):
+    fresh_state(monkeypatch)
+    calls = []
+    def load_resources():
+        calls.append(1)
+        raise FileNotFoundError("no embeddings yet")
+    warmup.start_warm_up(load_resources)
+    assert warmup.wait_until_ready(10)
+    assert warmup.status["state"] == "failed" and "no embeddings" in warmup.status["error"]
+
+    # Within RETRY_AFTER_S nothing restarts; afterwards the next call tries again
+    warmup.start_warm_up(load_resources)
+    warmup._thread.join(10)
+    assert len(calls) == 1
+    monkeypatch.setattr(warmup, "RETRY_AFTER_S", 0.0)
+    warmup.start_warm_up(load_resources)
+    warmup._thread.join(10)
+    assert len(calls) == 2 and warmup.status["state"] == "failed"
+
+def test_ready_endpoint_reports_only_success(monkeypatch):
+    fresh_state(monkeypatch)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), warmup.ReadinessHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    def code(path):
+        try:
+            return urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}{path}").status
+        except urllib.error.HTTPError as e:
+            return e.code
+    try:
+        assert code("/ready") == 503 and code("/health") == 200
+        warmup.status["state"] = "failed"
+        warmup.ready.set()
+        assert code("/ready") == 503
+        warmup.status["state"] = "ready"
+        assert code("/ready") == 200
+    finally:
+        server.shutdown()
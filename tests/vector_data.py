@@ -0,0 +1,17 @@
+import numpy as np
+
+# Shared by the in-memory index tests
+
+def clustered_vectors(n=2000, d=64, clusters=20, seed=0):
+    """Normalized vectors around a few centres, like topic clusters of chunk embeddings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, d))
+    x = centres[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, d))
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+def brute_force(vectors, query, k):
+    return np.argsort(-(vectors @ query), kind='stable')[:k]
+
+def recall(index_search, vectors, queries, k=10):
+    hits = [len(set(index_search(q)[1].tolist()) & set(brute_force(vectors, q, k).tolist())) for q in queries]
+    return sum(hits) / (k * len(queries))